@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# Benchmarks for testnado's own overhead. Prints one JSON document, so runs
+# can be saved and compared to catch regressions:
+#
+#   python benchmarks/run.py > before.json
+#   python benchmarks/run.py --quick --only mock_client_fetch
+#
+# Timings are wall clock on whatever machine runs them, so only compare
+# results from the same machine.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tornado  # noqa: E402
+from tornado import gen  # noqa: E402
+from tornado.httpclient import AsyncHTTPClient  # noqa: E402
+from tornado.httputil import HTTPHeaders, HTTPServerRequest  # noqa: E402
+from tornado.ioloop import IOLoop  # noqa: E402
+from tornado.testing import AsyncTestCase  # noqa: E402
+from tornado.web import Application, RequestHandler  # noqa: E402
+
+from testnado import HandlerTestCase  # noqa: E402
+from testnado.credentials import HeaderCredentials  # noqa: E402
+from testnado.load_generator import generate_load  # noqa: E402
+from testnado.mock_client import MockClient  # noqa: E402
+from testnado.mock_service import MockService  # noqa: E402
+from testnado.service_case_helpers import ServiceCaseHelpers  # noqa: E402
+
+
+BENCHMARKS = []
+
+
+def benchmark(function):
+    BENCHMARKS.append(function)
+    return function
+
+
+def per_call(function, number):
+    # microseconds per call, best of three
+    timer = timeit.Timer(function)
+    return min(timer.repeat(3, number)) / number * 1e6
+
+
+def run_on_new_loop(function):
+    # runs `function` (a coroutine function) on a fresh IOLoop, which is
+    # the current one while it runs, and closes the loop afterwards
+    io_loop = IOLoop()
+    try:
+        return io_loop.run_sync(function)
+    finally:
+        io_loop.close(all_fds=True)
+
+
+@benchmark
+def mock_service_throughput(quick):
+    requests = 500 if quick else 5000
+    results = {}
+    for concurrency in (1, 10, 50):
+
+        @gen.coroutine
+        def throughput():
+            service = MockService(IOLoop.current())
+            service.add_method(
+                "GET", "/", lambda handler: handler.finish("OK"))
+            service.listen()
+            client = AsyncHTTPClient(force_instance=True)
+            url = service.url("/")
+            load = yield generate_load(
+                lambda: client.fetch(url, raise_error=False),
+                concurrency=concurrency, requests=requests)
+            client.close()
+            service.stop()
+            raise gen.Return(load)
+
+        load = run_on_new_loop(throughput)
+        results["concurrency_{}".format(concurrency)] = {
+            "requests": load.requests,
+            "errors": load.errors,
+            "throughput": load.throughput,
+            "p50_ms": load.p50 * 1000,
+            "p99_ms": load.p99 * 1000
+        }
+    return results
+
+
+@benchmark
+def assert_requested_by_log_size(quick):
+    sizes = (10, 1000, 10000) if quick else (10, 1000, 10000, 100000)
+    results = {}
+    for size in sizes:
+        service = MockService(IOLoop.current())
+        handler = service.add_method("GET", "/items", lambda h: h.finish())
+        for index in range(size):
+            handler.request_log.record(HTTPServerRequest(
+                method="GET", uri="/items?page={}".format(index),
+                headers=HTTPHeaders({"X-Index": str(index)})))
+        last = {"X-Index": str(size - 1)}
+        results["log_{}".format(size)] = {
+            "hit_us": per_call(
+                lambda: handler.assert_requested("GET", "/items", {}), 1000),
+            "hit_headers_us": per_call(
+                lambda: handler.assert_requested("GET", "/items", last), 100),
+            "count_us": per_call(
+                lambda: handler.request_log.count("GET", "/items"), 1000)
+        }
+        service.stop()
+    return results
+
+
+@benchmark
+def mock_client_fetch(quick):
+    depths = (1, 100, 10000)
+    results = {}
+    for depth in depths:
+        calls = min(depth, 1000 if quick else 10000)
+
+        @gen.coroutine
+        def fetch_all():
+            mock_client = MockClient(IOLoop.current())
+            # patch() overhead, with `depth` responses queued up front
+            for _ in range(depth):
+                mock_client.mock_url("http://api.test/items")
+            started = time.time()
+            with mock_client.patch():
+                client = AsyncHTTPClient()
+                for _ in range(calls):
+                    yield client.fetch("http://api.test/items")
+            patched = time.time() - started
+
+            for _ in range(calls):
+                mock_client.mock_url("http://api.test/items")
+            started = time.time()
+            with mock_client.install():
+                client = AsyncHTTPClient()
+                for _ in range(calls):
+                    yield client.fetch("http://api.test/items")
+            raise gen.Return((patched, time.time() - started))
+
+        elapsed, installed = run_on_new_loop(fetch_all)
+        results["depth_{}".format(depth)] = {
+            "calls": calls,
+            "patch_us": elapsed / calls * 1e6,
+            "install_us": installed / calls * 1e6
+        }
+    return results
+
+
+class _FetchHandler(RequestHandler):
+
+    def get(self):
+        self.finish("OK")
+
+
+class _FetchCase(HandlerTestCase):
+
+    def get_app(self):
+        return Application([("/", _FetchHandler)])
+
+    def get_credentials(self):
+        return HeaderCredentials({"Authorization": "token"})
+
+    def runTest(self):
+        pass
+
+
+@benchmark
+def authenticated_fetch_overhead(quick):
+    calls = 200 if quick else 2000
+    results = {}
+    for in_process in (False, True):
+        case = type("Case", (_FetchCase,), {"in_process": in_process})()
+        case.setUp()
+        try:
+            fetch = per_call(lambda: case.fetch("/"), calls)
+            authenticated = per_call(
+                lambda: case.authenticated_fetch("/"), calls)
+        finally:
+            case.tearDown()
+        results["in_process" if in_process else "socket"] = {
+            "fetch_us": fetch,
+            "authenticated_fetch_us": authenticated,
+            "overhead_us": authenticated - fetch
+        }
+    return results
+
+
+@benchmark
+def service_case_setup_teardown(quick):
+    tests = 20 if quick else 200
+    results = {}
+    for scope in (None, "class"):
+
+        def test_services(self):
+            for _ in range(3):
+                self.add_service().add_method(
+                    "GET", "/", lambda handler: handler.finish())
+            self.start_services()
+
+        methods = dict(
+            ("test_{}".format(index), test_services)
+            for index in range(tests))
+        methods["service_pool_scope"] = scope
+        case = type("Case", (ServiceCaseHelpers, AsyncTestCase), methods)
+
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(case)
+        result = unittest.TestResult()
+        started = time.time()
+        suite.run(result)
+        elapsed = time.time() - started
+        if result.errors or result.failures:
+            raise AssertionError(result.errors + result.failures)
+        results["scope_{}".format(scope or "test")] = {
+            "tests": tests,
+            "per_test_ms": elapsed / tests * 1000
+        }
+    return results
+
+
+@benchmark
+def import_time(quick):
+    # milliseconds to import each entry point in a fresh interpreter, which
+    # every sharded test worker pays up front
+    runs = 3 if quick else 10
+    statements = {
+        "testnado": "import testnado",
+        "testnado_credentials":
+            "from testnado.credentials import HeaderCredentials",
+        "handler_test_case": "from testnado import HandlerTestCase",
+        "mock_service": "from testnado.mock_service import MockService",
+        "mock_client": "from testnado.mock_client import MockClient"
+    }
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    baseline = _interpreter_ms("pass", runs, root)
+    results = {"interpreter_ms": baseline}
+    for name, statement in statements.items():
+        results["{}_ms".format(name)] = \
+            _interpreter_ms(statement, runs, root) - baseline
+    return results
+
+
+def _interpreter_ms(statement, runs, cwd):
+    timings = []
+    for _ in range(runs):
+        started = time.time()
+        subprocess.check_call([sys.executable, "-c", statement], cwd=cwd)
+        timings.append(time.time() - started)
+    return min(timings) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark testnado's helpers and print JSON results.")
+    parser.add_argument(
+        "--quick", action="store_true", help="smaller sizes, for a smoke run")
+    parser.add_argument(
+        "--only", action="append", default=[],
+        help="benchmark name to run (can be repeated)")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    options = parser.parse_args(argv)
+
+    results = {}
+    for function in BENCHMARKS:
+        if options.only and function.__name__ not in options.only:
+            continue
+        started = time.time()
+        results[function.__name__] = function(options.quick)
+        results[function.__name__]["elapsed_s"] = time.time() - started
+
+    report = {
+        "version": 1,
+        "timestamp": time.time(),
+        "quick": options.quick,
+        "python": platform.python_version(),
+        "tornado": tornado.version,
+        "platform": platform.platform(),
+        "results": results
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 
 import os
-import sys
 from setuptools import setup, find_packages
 
 
@@ -9,10 +8,7 @@ with open("VERSION") as version_fp:
     VERSION = version_fp.read().strip()
 
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
-INSTALL_REQUIRES = ["tornado>=4"]
-
-if sys.version_info[0] == 2:
-    INSTALL_REQUIRES.append("mock")
+INSTALL_REQUIRES = ["tornado>=6.0"]
 
 setup(
     name="testnado",
@@ -23,5 +19,12 @@ setup(
     url="http://github.com/joshmarshall/testnado/",
     license="http://www.apache.org/licenses/LICENSE-2.0",
     packages=find_packages(where=PROJECT_ROOT, exclude=["tests", "dist"]),
-    install_requires=INSTALL_REQUIRES
+    python_requires=">=3.7",
+    install_requires=INSTALL_REQUIRES,
+    extras_require={
+        "uvloop": ["uvloop"]
+    },
+    entry_points={
+        "console_scripts": ["testnado = testnado.runner:main"]
+    }
 )
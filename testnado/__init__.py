@@ -1,3 +1,10 @@
-from testnado.authenticated_fetch_case import AuthenticatedFetchCase
-from testnado.fetch_case import FetchCase
-from testnado.handler_test_case import HandlerTestCase
+from testnado._lazy import lazy_attributes
+
+
+__all__ = ["AuthenticatedFetchCase", "FetchCase", "HandlerTestCase"]
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "AuthenticatedFetchCase": "testnado.authenticated_fetch_case",
+    "FetchCase": "testnado.fetch_case",
+    "HandlerTestCase": "testnado.handler_test_case"
+})
@@ -0,0 +1,27 @@
+# Package attributes that are only imported the first time they're used, so
+# `import testnado.credentials` (say) doesn't drag in tornado.testing, the
+# HTTP client stack and everything else (PEP 562 module __getattr__).
+
+import importlib
+import sys
+
+
+def lazy_attributes(package, attributes):
+    # `attributes` maps each public name to the module it lives in. returns
+    # the package's __getattr__ and __dir__.
+    namespace = sys.modules[package].__dict__
+
+    def __getattr__(name):
+        module = attributes.get(name)
+        if module is None:
+            raise AttributeError(
+                "module '{}' has no attribute '{}'".format(package, name))
+        value = getattr(importlib.import_module(module), name)
+        # cached, so __getattr__ only ever runs once per name
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(attributes))
+
+    return __getattr__, __dir__
@@ -0,0 +1,104 @@
+# asyncio-native versions of MockClient and MockService, for code that's
+# written with async / await and asyncio.gather all the way down. Mocked
+# fetches are plain `async def` coroutines (no gen.coroutine wrapper), and
+# nothing needs an IOLoop passed in -- they use whatever loop is running,
+# uvloop included:
+#
+#   async def test_sync_users(self):
+#       async with AsyncMockService() as service:
+#           service.add_method("GET", "/users", list_users)
+#           mock_client = AsyncMockClient()
+#           mock_client.mock_url("http://api.test/groups")
+#           with mock_client.patch():
+#               await sync_users(service.url("/users"))
+#
+# This module is Python 3 only.
+
+import asyncio
+
+from tornado.httpclient import HTTPError
+from tornado.ioloop import IOLoop
+from tornado.platform.asyncio import AsyncIOLoop
+
+from testnado.mock_client import MockClient
+from testnado.mock_service import MockService
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def new_event_loop():
+    # a uvloop loop when uvloop is installed, and asyncio's otherwise
+    if uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def new_ioloop():
+    # an IOLoop running on new_event_loop()
+    return AsyncIOLoop(asyncio_loop=new_event_loop())
+
+
+class EventLoopCase(object):
+    # mix into an AsyncTestCase (or HandlerTestCase, etc.) to run each test
+    # on uvloop when it's installed:
+    #
+    #   class TestUsers(EventLoopCase, HandlerTestCase):
+    #
+    # this installs uvloop's event loop policy for the length of the test,
+    # so the loop AsyncTestCase creates is a uvloop one (overriding
+    # get_new_ioloop() is deprecated from Tornado 6.3).
+
+    def setUp(self):
+        if uvloop is not None:
+            self.addCleanup(
+                asyncio.set_event_loop_policy,
+                asyncio.get_event_loop_policy())
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        super().setUp()
+
+
+class AsyncMockClient(MockClient):
+
+    def __init__(self, cassette=None):
+        super().__init__(IOLoop.current(), cassette=cassette)
+
+    async def fetch(self, url, *args, **kwargs):
+        # the same matching as MockClient.fetch, but a native coroutine.
+        # mocked responses are returned without yielding to the loop.
+        response = self.resolve(kwargs.get("method", "GET"), url)
+
+        if response is None and self.cassette is not None:
+            return await self._cassette_fetch(url, *args, **kwargs)
+
+        if response is None:
+            return await self.original_fetch(url, *args, **kwargs)
+
+        if response.code > 399 and kwargs.get("raise_error", True):
+            raise HTTPError(
+                code=response.code, message="Mock error: ({}) {}".format(
+                    response.code, response.body), response=response)
+        return response
+
+
+class AsyncMockService(MockService):
+    # a MockService on the running event loop, which starts listening on
+    # `async with` (or await start()) and stops on the way out
+
+    def __init__(self, port=None, recording=None):
+        super().__init__(IOLoop.current(), port=port, recording=recording)
+
+    async def start(self):
+        self.listen()
+        return self
+
+    async def close(self):
+        self.stop()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -1,3 +1,8 @@
+import copy
+
+from tornado import gen
+from tornado.testing import get_async_test_timeout
+
 from testnado.credentials.helpers import build_fetch_arguments
 from testnado.fetch_case import FetchCase
 
@@ -7,8 +12,73 @@ class AuthenticatedFetchCase(FetchCase):
     def authenticated_fetch(
             self, path, method=None, headers=None, body=None,
             auth_username=None, auth_password=None, auth_mode=None, **kwargs):
+        credentials = self._get_credentials()
+        # anything else (follow_redirects, request_timeout...) goes
+        # straight through to fetch()
+        arguments = dict(
+            kwargs, path=path, method=method, headers=headers, body=body,
+            auth_username=auth_username, auth_password=auth_password,
+            auth_mode=auth_mode)
+
+        if hasattr(credentials, "prepare"):
+            # lazy credentials (like TokenCredentials) need the loop running
+            # to acquire a token, so this goes down the asynchronous path
+            with self._profiled_functions():
+                return self.io_loop.run_sync(
+                    lambda: self.authenticated_fetch_async(**arguments),
+                    timeout=get_async_test_timeout())
+
+        return self.fetch(
+            **self._authenticated_arguments(credentials, **arguments))
+
+    def authenticated_fetch_many(self, requests, concurrency=None):
+        # same request format as fetch_many(), but every request goes
+        # through get_credentials() just like authenticated_fetch().
+        return self._run_many(
+            self.authenticated_fetch_async, requests, concurrency)
+
+    @gen.coroutine
+    def authenticated_fetch_async(self, path, **kwargs):
+        # authenticated_fetch() for @gen_test / async tests -- the same
+        # credentials (and 401 retry), but returns a future, so lots of
+        # authenticated requests can be in flight at once.
+        credentials = self._get_credentials()
+        prepare = getattr(credentials, "prepare", None)
+        invalidate = getattr(credentials, "invalidate", None)
+
+        token = None
+        if prepare is not None:
+            token = yield prepare()
+        arguments = self._authenticated_arguments(
+            credentials, path=path, **kwargs)
+        response = yield self.fetch_async(**arguments)
+
+        if response.code == 401 and invalidate is not None:
+            # the token went stale (or belongs to another test's app), so
+            # get a fresh one and try again -- but only once
+            invalidate(token)
+            if prepare is not None:
+                yield prepare()
+            arguments = self._authenticated_arguments(
+                credentials, path=path, **kwargs)
+            response = yield self.fetch_async(**arguments)
+
+        raise gen.Return(response)
+
+    def _get_credentials(self):
+        if not hasattr(self, "get_credentials"):
+            raise NotImplementedError(
+                "Method 'get_credentials' must be implemented in order to "
+                "use 'authenticated_fetch'.")
+        return self.get_credentials()
+
+    def _authenticated_arguments(
+            self, update_credentials, path, method=None, headers=None,
+            body=None, auth_username=None, auth_password=None,
+            auth_mode=None, **kwargs):
 
-        headers = headers or {}
+        # copied, since a 401 retry runs the credentials again
+        headers = copy.copy(headers) if headers else {}
 
         # fetch arguments is the explicit list of overwritable arguments
         # for fetch() calls. For instance, 'method' isn't overwritable,
@@ -21,17 +91,10 @@ class AuthenticatedFetchCase(FetchCase):
             path=path, headers=headers, body=body, auth_mode=auth_mode,
             auth_username=auth_username, auth_password=auth_password)
 
-        if not hasattr(self, "get_credentials"):
-            raise NotImplementedError(
-                "Method 'get_credentials' must be implemented in order to "
-                "use 'authenticated_fetch'.")
-
-        update_credentials = self.get_credentials()
         update_credentials(fetch_arguments)
 
-        arguments = {
-            "path": fetch_arguments.path
-        }
+        arguments = dict(kwargs)
+        arguments["path"] = fetch_arguments.path
 
         if method:
             arguments["method"] = method
@@ -47,4 +110,4 @@ class AuthenticatedFetchCase(FetchCase):
         if fetch_arguments.auth_username:
             arguments["auth_username"] = fetch_arguments.auth_username
 
-        return self.fetch(**arguments)
+        return arguments
@@ -0,0 +1,221 @@
+# Record / replay storage for the responses MockClient passes through to
+# the network. A cassette is two files next to each other:
+#
+#   <path>.json    the index -- one entry per response, with the method,
+#                  URL, optional body hash, status, headers and where the
+#                  body sits in the bodies file
+#   <path>.bodies  every response body, back to back
+#
+# Replay only loads the index. Bodies are read out of a memory map of the
+# bodies file as they're needed, so a big cassette doesn't have to fit in
+# memory.
+
+import hashlib
+import json
+import mmap
+import os
+
+from io import BytesIO
+from tornado.escape import utf8
+from tornado.httpclient import HTTPResponse
+from tornado.httputil import HTTPHeaders
+
+try:
+    from urlparse import parse_qsl, urlsplit, urlunsplit
+    from urllib import urlencode
+except ImportError:
+    from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+CASSETTE_VERSION = 1
+MODES = ("auto", "record", "replay")
+# the body in the cassette is already decoded and unchunked, so these are
+# dropped (and Content-Length is put back to match on replay)
+_SKIPPED_HEADERS = ("Transfer-Encoding", "Content-Encoding", "Content-Length")
+
+
+class Cassette(object):
+
+    def __init__(self, path, mode="auto", match_body=False):
+        # `mode` is "replay" (only recorded responses, anything else is an
+        # error), "record" (start over and record everything) or "auto"
+        # (replay what's there, record what isn't). with `match_body`, the
+        # request body is part of the key, so a POST with a different body
+        # is a different response.
+        if mode not in MODES:
+            raise ValueError("Unknown cassette mode: {}".format(mode))
+        self.path = path
+        self.mode = mode
+        self.match_body = match_body
+        self.index_path = path + ".json"
+        self.bodies_path = path + ".bodies"
+        self.entries = []
+        # key -> entries for it, in the order they were recorded
+        self._index = {}
+        # key -> how many times it's been replayed
+        self._played = {}
+        self._bodies_size = 0
+        self._writer = None
+        self._map = None
+        self._map_file = None
+        self._dirty = False
+
+        if mode == "record":
+            self._truncate()
+        else:
+            self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def recording(self):
+        return self.mode != "replay"
+
+    def replay(self, request):
+        # the recorded HTTPResponse for `request`, or None. a request that
+        # was recorded more than once gets each response in turn, and the
+        # last one after that.
+        if self.mode == "record":
+            return None
+        key = self._key(request.method, request.url, request.body)
+        entries = self._index.get(key)
+        if not entries:
+            if self.mode == "replay":
+                raise CassetteMiss("No recorded response for: {} {}".format(
+                    request.method, request.url))
+            return None
+        played = self._played.get(key, 0)
+        self._played[key] = played + 1
+        entry = entries[min(played, len(entries) - 1)]
+        return self._response(request, entry)
+
+    def record(self, request, response):
+        if not self.recording:
+            return
+        body = response.body or b""
+        if self._writer is None:
+            _make_directory(self.path)
+            self._writer = open(self.bodies_path, "ab")
+        self._writer.write(body)
+        method, url, body_hash = self._key(
+            request.method, request.url, request.body)
+        entry = {
+            "method": method,
+            "url": url,
+            "body_hash": body_hash,
+            "code": response.code,
+            "reason": response.reason,
+            "headers": [
+                [name, value] for name, value in response.headers.get_all()
+                if name not in _SKIPPED_HEADERS],
+            "offset": self._bodies_size,
+            "length": len(body)
+        }
+        self._bodies_size += len(body)
+        self._add(entry)
+        self._dirty = True
+
+    def save(self):
+        if self._writer is not None:
+            self._writer.flush()
+        if not self._dirty:
+            return
+        with open(self.index_path, "w") as index_file:
+            json.dump({
+                "version": CASSETTE_VERSION,
+                "entries": self.entries
+            }, index_file, separators=(",", ":"))
+        self._dirty = False
+
+    def close(self):
+        self.save()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._unmap()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            if self.mode == "replay":
+                raise IOError("Missing cassette: {}".format(self.index_path))
+            # a bodies file without an index (from a run that never got to
+            # save()) has nothing pointing into it, so start it over
+            self._truncate()
+            return
+        with open(self.index_path) as index_file:
+            index = json.load(index_file)
+        if index.get("version") != CASSETTE_VERSION:
+            raise ValueError("Unsupported cassette version: {}".format(
+                index.get("version")))
+        for entry in index["entries"]:
+            self._add(entry)
+        if os.path.exists(self.bodies_path):
+            self._bodies_size = os.path.getsize(self.bodies_path)
+
+    def _truncate(self):
+        _make_directory(self.path)
+        open(self.bodies_path, "wb").close()
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+
+    def _add(self, entry):
+        self.entries.append(entry)
+        key = (entry["method"], entry["url"], entry["body_hash"])
+        self._index.setdefault(key, []).append(entry)
+
+    def _key(self, method, url, body):
+        body_hash = None
+        if self.match_body:
+            body_hash = hashlib.sha1(utf8(body or b"")).hexdigest()
+        return method.upper(), _canonical_url(url), body_hash
+
+    def _response(self, request, entry):
+        headers = HTTPHeaders()
+        for name, value in entry["headers"]:
+            headers.add(name, value)
+        headers["Content-Length"] = str(entry["length"])
+        return HTTPResponse(
+            request, entry["code"], reason=entry["reason"], headers=headers,
+            buffer=BytesIO(self._body(entry["offset"], entry["length"])),
+            effective_url=request.url, request_time=0)
+
+    def _body(self, offset, length):
+        if not length:
+            return b""
+        if self._map is None or offset + length > len(self._map):
+            # the file has grown since it was mapped (auto mode)
+            if self._writer is not None:
+                self._writer.flush()
+            self._unmap()
+            self._map_file = open(self.bodies_path, "rb")
+            self._map = mmap.mmap(
+                self._map_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[offset:offset + length]
+
+    def _unmap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map_file.close()
+            self._map = self._map_file = None
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+def _make_directory(path):
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+
+def _canonical_url(url):
+    # query arguments in a consistent order, and no fragment
+    parsed = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunsplit(
+        (parsed.scheme, parsed.netloc, parsed.path or "/", query, ""))
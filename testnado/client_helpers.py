@@ -0,0 +1,134 @@
+import base64
+import contextlib
+import copy
+import time
+
+from tornado.escape import utf8
+from tornado.httpclient import AsyncHTTPClient, HTTPResponse
+from tornado.ioloop import IOLoop
+from tornado.simple_httpclient import SimpleAsyncHTTPClient
+
+try:
+    import urlparse
+except ImportError:
+    import urllib.parse as urlparse
+
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_BODY_HEADERS = (
+    "Content-Length", "Content-Type", "Content-Encoding", "Transfer-Encoding")
+
+
+def current_client_configuration():
+    # the AsyncHTTPClient implementation (and its keyword arguments) that
+    # AsyncHTTPClient() would build right now
+    _, kwargs = AsyncHTTPClient._save_configuration()
+    return AsyncHTTPClient.configured_class(), dict(kwargs or {})
+
+
+@contextlib.contextmanager
+def configured_client(impl, **kwargs):
+    # installs `impl` as the AsyncHTTPClient implementation for the
+    # duration of the block. AsyncHTTPClient() caches one client per IOLoop,
+    # so the cached clients are set aside (and new ones closed afterward)
+    # to make sure every client created in the block is an `impl`.
+    saved = AsyncHTTPClient._save_configuration()
+    cache = AsyncHTTPClient._async_clients()
+    cached = dict(cache)
+    cache.clear()
+    AsyncHTTPClient.configure(impl, **kwargs)
+    try:
+        yield
+    finally:
+        for client in list(cache.values()):
+            client.close()
+        cache.clear()
+        cache.update(cached)
+        AsyncHTTPClient._restore_configuration(saved)
+
+
+class PassthroughHTTPClient(AsyncHTTPClient):
+    # base for the AsyncHTTPClient implementations that answer some requests
+    # themselves and hand the rest to a real client. `passthrough` is an
+    # (implementation, kwargs) pair, usually current_client_configuration().
+
+    def initialize(self, passthrough=None, defaults=None):
+        super(PassthroughHTTPClient, self).initialize(defaults=defaults)
+        self._passthrough_configuration = passthrough or (
+            SimpleAsyncHTTPClient, {})
+        self._passthrough = None
+
+    def close(self):
+        if self._passthrough is not None:
+            self._passthrough.close()
+        super(PassthroughHTTPClient, self).close()
+
+    def passthrough_fetch(self, request, callback):
+        started = time.time()
+        if self._passthrough is None:
+            impl, kwargs = self._passthrough_configuration
+            self._passthrough = impl(force_instance=True, **kwargs)
+
+        def handle_response(future):
+            try:
+                response = future.result()
+            except Exception as error:
+                response = error_response(request, error, started)
+            callback(response)
+
+        future = self._passthrough.fetch(request.request, raise_error=False)
+        IOLoop.current().add_future(future, handle_response)
+
+
+def error_response(request, error, started):
+    # a 599, like the real clients use for anything that isn't an HTTP
+    # status. AsyncHTTPClient.fetch raises these regardless of raise_error.
+    return HTTPResponse(
+        request, 599, error=error, request_time=time.time() - started)
+
+
+def request_headers(request, netloc):
+    # the headers a real client would add before sending `request`
+    headers = copy.copy(request.headers)
+    headers.setdefault("Host", netloc)
+    if request.auth_username is not None:
+        if request.auth_mode not in (None, "basic"):
+            raise ValueError("unsupported auth_mode %s" % request.auth_mode)
+        credentials = utf8(request.auth_username) + b":" + \
+            utf8(request.auth_password or "")
+        headers["Authorization"] = \
+            "Basic " + base64.b64encode(credentials).decode("ascii")
+    if request.user_agent:
+        headers.setdefault("User-Agent", request.user_agent)
+    body = utf8(request.body or b"")
+    if body or request.method in ("POST", "PUT", "PATCH"):
+        headers.setdefault("Content-Length", str(len(body)))
+    return headers
+
+
+def redirect_request(request, response):
+    # the request to make next when following `response`, or None. mirrors
+    # what SimpleAsyncHTTPClient does with follow_redirects=True.
+    if not request.follow_redirects or request.max_redirects <= 0:
+        return None
+    if response.code not in _REDIRECT_CODES:
+        return None
+    location = response.headers.get("Location")
+    if location is None:
+        return None
+
+    original = request.request if hasattr(request, "request") else request
+    new_request = copy.copy(original)
+    new_request.headers = copy.copy(original.headers)
+    new_request.url = urlparse.urljoin(request.url, location)
+    new_request.max_redirects = request.max_redirects - 1
+    if "Host" in new_request.headers:
+        del new_request.headers["Host"]
+    if (response.code in (301, 302) and request.method == "POST") or \
+            (response.code == 303 and request.method != "HEAD"):
+        new_request.method = "GET"
+        new_request.body = None
+        for header in _BODY_HEADERS:
+            if header in new_request.headers:
+                del new_request.headers[header]
+    return new_request
@@ -1,2 +1,13 @@
-from testnado.credentials.header_credentials import HeaderCredentials
-from testnado.credentials.cookie_credentials import CookieCredentials
+from testnado._lazy import lazy_attributes
+
+
+__all__ = [
+    "CookieCredentials", "HeaderCredentials", "TokenCache",
+    "TokenCredentials"]
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "CookieCredentials": "testnado.credentials.cookie_credentials",
+    "HeaderCredentials": "testnado.credentials.header_credentials",
+    "TokenCache": "testnado.credentials.token_credentials",
+    "TokenCredentials": "testnado.credentials.token_credentials"
+})
@@ -0,0 +1,105 @@
+import time
+
+from tornado import gen
+from tornado.concurrent import Future, is_future
+from tornado.ioloop import IOLoop
+
+
+class TokenCache(object):
+    # holds one token, and makes sure it's only acquired once at a time --
+    # everyone asking while a login is in flight waits on the same one.
+    # share an instance (module / class level) to reuse a token across
+    # tests; `ttl` is in seconds, and None means it never expires.
+
+    def __init__(self, ttl=None, clock=time.time):
+        self.ttl = ttl
+        self.acquisitions = 0
+        self._clock = clock
+        self._token = None
+        self._expires = None
+        self._pending = None
+        self._pending_loop = None
+
+    @property
+    def token(self):
+        # the current token, or None if there isn't a valid one
+        if self._expires is not None and self._clock() >= self._expires:
+            self.invalidate()
+        return self._token
+
+    def get(self, acquire):
+        # returns a Future for the token, calling `acquire` (which can
+        # return the token or a Future for it) only if there isn't one
+        token = self.token
+        if token is not None:
+            future = Future()
+            future.set_result(token)
+            return future
+
+        # a pending acquisition from another test's (closed) IOLoop is
+        # never going to finish, so it doesn't count
+        if self._pending is not None and not self._pending.done() and \
+                self._pending_loop is IOLoop.current():
+            return self._pending
+
+        self.acquisitions += 1
+        self._pending = self._acquire(acquire)
+        self._pending_loop = IOLoop.current()
+        return self._pending
+
+    def set(self, token):
+        self._token = token
+        self._expires = None
+        if self.ttl is not None:
+            self._expires = self._clock() + self.ttl
+
+    def invalidate(self, token=None):
+        # with a `token`, only drops the cached one if it's the same -- so a
+        # pile of requests that all got a 401 with the old token only
+        # trigger one refresh.
+        if token is None or token == self._token:
+            self._token = None
+            self._expires = None
+
+    @gen.coroutine
+    def _acquire(self, acquire):
+        token = acquire()
+        if is_future(token) or hasattr(token, "__await__"):
+            token = yield token
+        self.set(token)
+        raise gen.Return(token)
+
+
+class TokenCredentials(object):
+    # lazily acquired credentials, for tokens that come from a login step
+    # (a login handler on the app, a MockService, etc.). `acquire` is
+    # called with no arguments and returns the token (or a Future for it).
+    # AuthenticatedFetchCase calls prepare() before each request, and
+    # invalidate() and retries once if the response is a 401.
+
+    def __init__(
+            self, acquire, cache=None, ttl=None, header_name="Authorization",
+            header_format="Bearer {}"):
+        self._acquire = acquire
+        self._cache = cache if cache is not None else TokenCache(ttl=ttl)
+        self._header_name = header_name
+        self._header_format = header_format
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def prepare(self):
+        return self._cache.get(self._acquire)
+
+    def invalidate(self, token=None):
+        self._cache.invalidate(token)
+
+    def __call__(self, fetch_arguments):
+        token = self._cache.token
+        if token is None:
+            raise ValueError(
+                "No token available -- prepare() must finish before the "
+                "credentials are used.")
+        fetch_arguments.headers.setdefault(
+            self._header_name, self._header_format.format(token))
@@ -0,0 +1,141 @@
+# Latency and failure injection for MockService routes:
+#
+#   service.add_method("GET", "/flaky", handle_get, faults=FaultPolicy(
+#       latency=lognormal(0.05, sigma=0.8), error_rate=0.1, seed=1234))
+#
+# Delays are scheduled on the IOLoop (call_later), never slept, so a slow
+# route doesn't hold up any other request the service is handling. All of
+# the randomness comes from one random.Random per policy, so a seed makes a
+# run reproducible (as long as the requests arrive in the same order).
+
+import math
+import random
+
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+
+RESET = "reset"
+TRUNCATE = "truncate"
+ERROR = "error"
+
+
+def fixed(seconds):
+    return lambda rng: seconds
+
+
+def uniform(low, high):
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median, sigma=0.5):
+    # long-tailed, like real network latency. half the delays are under
+    # `median`, and a bigger `sigma` means a longer tail.
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+class FaultPolicy(object):
+
+    def __init__(
+            self, latency=None, reset_rate=0.0, truncate_rate=0.0,
+            error_rate=0.0, error_codes=(500, 502, 503), seed=None):
+        # `latency` is a number of seconds or one of fixed() / uniform() /
+        # lognormal(). the rates are the chances (0 to 1) that a request
+        # gets its connection reset before any response, has its body cut
+        # off halfway, or gets one of `error_codes` instead of the response.
+        if reset_rate + truncate_rate + error_rate > 1:
+            raise ValueError("Fault rates can't add up to more than 1.")
+        if isinstance(latency, (int, float)):
+            latency = fixed(latency)
+        self.latency = latency
+        self.reset_rate = reset_rate
+        self.truncate_rate = truncate_rate
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.random = random.Random(seed)
+        # action (or None) -> how many requests got it
+        self.counts = {}
+
+    def next_fault(self):
+        # the delay, action and error code for the next request. always
+        # draws the same amount of randomness, so one seed gives one plan.
+        delay = max(0.0, self.latency(self.random)) if self.latency else 0.0
+        roll = self.random.random()
+        code = self.random.choice(self.error_codes) \
+            if self.error_codes else 500
+
+        action = None
+        if roll < self.reset_rate:
+            action = RESET
+        elif roll < self.reset_rate + self.error_rate:
+            action = ERROR
+        elif roll < self.reset_rate + self.error_rate + self.truncate_rate:
+            action = TRUNCATE
+
+        self.counts[action] = self.counts.get(action, 0) + 1
+        return delay, action, code
+
+
+@gen.coroutine
+def apply_faults(policy, handler, method_handler, args, kwargs):
+    delay, action, code = policy.next_fault()
+    if delay:
+        yield _later(delay)
+
+    connection = handler.request.connection
+    if action == RESET:
+        # Tornado finishes the handler afterward, which is a no-op on a
+        # closed connection
+        connection.close()
+        return
+    if action == ERROR:
+        handler.send_error(code)
+        return
+    if action == TRUNCATE:
+        handler.request.connection = _TruncatingConnection(connection)
+
+    result = method_handler(handler, *args, **kwargs)
+    if result is not None:
+        yield result
+
+
+def _later(delay):
+    future = Future()
+    IOLoop.current().call_later(delay, lambda: future.set_result(None))
+    return future
+
+
+class _TruncatingConnection(object):
+    # stands in for the handler's connection, and sends the headers (with
+    # the full Content-Length) plus half of the first chunk of the body
+    # before closing the connection.
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._pending = None
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def write_headers(self, start_line, headers, chunk=None, *args):
+        chunk = chunk or b""
+        self._pending = self._connection.write_headers(
+            start_line, headers, chunk[:len(chunk) // 2])
+        return self._done()
+
+    def write(self, chunk, *args):
+        return self._done()
+
+    def finish(self):
+        if self._pending is None:
+            self._connection.close()
+            return
+        IOLoop.current().add_future(
+            self._pending, lambda future: self._connection.close())
+
+    def _done(self):
+        future = Future()
+        future.set_result(None)
+        return future
@@ -1,5 +1,61 @@
+import contextlib
+
+from tornado import gen
+from tornado.testing import get_async_test_timeout
+
+from testnado.client_helpers import current_client_configuration
+from testnado.keep_alive import KeepAliveHTTPClient, KeepAliveStats
+from testnado.profiling import client_timer, environment_profiling, \
+    get_profiler
+
+
+_SESSION_KEEP_ALIVE_STATS = KeepAliveStats()
+
+
 class FetchCase(object):
 
+    fetch_concurrency = 10
+
+    # set to "test", "class" or "session" to have self.http_client keep
+    # connections to the test server open between requests. connections
+    # can't outlive the test's IOLoop (or server), but the reuse stats in
+    # self.keep_alive_stats are shared across the whole scope.
+    keep_alive_scope = None
+
+    # set to True to time every fetch (and, with profile_functions, run it
+    # under cProfile) and get a report of the slowest endpoints when the
+    # process exits. TESTNADO_PROFILE=1 (or =functions) does the same for
+    # every case.
+    profile_fetches = False
+    profile_functions = False
+
+    def get_http_client(self):
+        if not self.keep_alive_scope:
+            return super(FetchCase, self).get_http_client()
+        return KeepAliveHTTPClient(
+            force_instance=True, stats=self.keep_alive_stats,
+            passthrough=current_client_configuration())
+
+    @property
+    def keep_alive_stats(self):
+        if self.keep_alive_scope == "session":
+            return _SESSION_KEEP_ALIVE_STATS
+        if self.keep_alive_scope == "class":
+            cls = type(self)
+            if "_keep_alive_stats" not in cls.__dict__:
+                cls._keep_alive_stats = KeepAliveStats()
+            return cls._keep_alive_stats
+        if self.keep_alive_scope == "test":
+            if not hasattr(self, "_test_keep_alive_stats"):
+                self._test_keep_alive_stats = KeepAliveStats()
+            return self._test_keep_alive_stats
+        raise ValueError(
+            "Unknown keep_alive_scope: {}".format(self.keep_alive_scope))
+
+    def setUp(self):
+        super(FetchCase, self).setUp()
+        self._start_profiling()
+
     def fetch(self, *args, **kwargs):
 
         # it's really annoying when Tornado automatically follows redirects.
@@ -7,4 +63,91 @@ class FetchCase(object):
         # Override by specifying follow_redirects=True
 
         kwargs.setdefault("follow_redirects", False)
-        return super(FetchCase, self).fetch(*args, **kwargs)
+        if not self._profiling()[0]:
+            return super(FetchCase, self).fetch(*args, **kwargs)
+
+        done = client_timer(
+            get_profiler(), kwargs.get("method") or "GET",
+            args[0] if args else kwargs.get("path", ""))
+        try:
+            with self._profiled_functions():
+                return super(FetchCase, self).fetch(*args, **kwargs)
+        finally:
+            done()
+
+    def fetch_many(self, requests, concurrency=None):
+        # each request is either a path or a dict of fetch() arguments
+        # (including "path"). they all run on the same loop turn, at most
+        # `concurrency` at a time, and responses come back in order.
+        return self._run_many(self.fetch_async, requests, concurrency)
+
+    def fetch_async(self, path, **kwargs):
+        # the asynchronous twin of fetch() -- same url handling and
+        # defaults, but it returns a future instead of starting / stopping
+        # the loop, so it can be yielded (or awaited) inside @gen_test and
+        # gathered with other requests.
+        kwargs.setdefault("follow_redirects", False)
+        kwargs.setdefault("raise_error", False)
+        if not path.lower().startswith(("http://", "https://")):
+            path = self.get_url(path)
+        future = self.http_client.fetch(path, **kwargs)
+        if self._profiling()[0]:
+            future.add_done_callback(client_timer(
+                get_profiler(), kwargs.get("method") or "GET", path))
+        return future
+
+    def _run_many(self, fetch, requests, concurrency):
+        concurrency = concurrency or self.fetch_concurrency
+        with self._profiled_functions():
+            return self.io_loop.run_sync(
+                lambda: _fetch_all(fetch, list(requests), concurrency),
+                timeout=get_async_test_timeout())
+
+    def _profiling(self):
+        # (profile_fetches, profile_functions), either from the case or
+        # from TESTNADO_PROFILE
+        fetches, functions = environment_profiling()
+        functions = functions or self.profile_functions
+        fetches = fetches or functions or self.profile_fetches
+        return fetches, functions
+
+    def _start_profiling(self):
+        # the report is scheduled (once per process) by the first profiled
+        # case to set up
+        if self._profiling()[0]:
+            get_profiler().report_at_exit()
+
+    @contextlib.contextmanager
+    def _profiled_functions(self):
+        if not self._profiling()[1]:
+            yield
+            return
+        profiler = get_profiler()
+        profiler.start_functions()
+        try:
+            yield
+        finally:
+            profiler.stop_functions()
+
+
+@gen.coroutine
+def _fetch_all(fetch, requests, concurrency):
+    responses = [None] * len(requests)
+    pending = iter(enumerate(requests))
+
+    @gen.coroutine
+    def worker():
+        # workers share the iterator, so each request is only sent once
+        for index, request in pending:
+            path, kwargs = _split_request(request)
+            responses[index] = yield fetch(path, **kwargs)
+
+    yield [worker() for _ in range(min(concurrency, len(requests)))]
+    raise gen.Return(responses)
+
+
+def _split_request(request):
+    if not isinstance(request, dict):
+        return request, {}
+    kwargs = dict(request)
+    return kwargs.pop("path"), kwargs
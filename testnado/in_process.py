@@ -0,0 +1,225 @@
+# Serves HTTP requests straight into a Tornado Application, without a
+# socket in between. Handlers still get normal HTTPServerRequest objects
+# (so MockService recording works the same), but there's no connect, no
+# HTTP serialization and no parsing on either side.
+
+import contextlib
+import datetime
+import time
+
+from io import BytesIO
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.escape import utf8
+from tornado.httpclient import HTTPResponse
+from tornado.httputil import HTTPConnection, RequestStartLine
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+from tornado.simple_httpclient import HTTPTimeoutError
+
+from testnado.client_helpers import (
+    PassthroughHTTPClient, configured_client, current_client_configuration,
+    error_response, redirect_request, request_headers)
+
+try:
+    import urlparse
+except ImportError:
+    import urllib.parse as urlparse
+
+
+class InProcessTransport(object):
+    # maps hosts ("localhost:8888") to the applications that serve them
+
+    def __init__(self):
+        self._applications = {}
+        self._services = {}
+
+    def add_application(self, host, application):
+        self._applications[host.lower()] = application
+
+    def add_service(self, service):
+        # resolved on every request, since a MockService only has an
+        # application once it's listening
+        for host in _service_hosts(service):
+            self._services[host] = service
+
+    def resolve(self, host):
+        host = host.lower()
+        if host in self._applications:
+            return self._applications[host]
+        service = self._services.get(host)
+        if service is not None and service.listening:
+            return service.application
+        return None
+
+    @contextlib.contextmanager
+    def install(self):
+        # every AsyncHTTPClient created inside the block sends requests for
+        # known hosts straight to their applications. anything else goes
+        # to the previously configured client implementation.
+        passthrough = current_client_configuration()
+        with configured_client(
+                InProcessHTTPClient, transport=self,
+                passthrough=passthrough):
+            yield
+
+
+class InProcessHTTPClient(PassthroughHTTPClient):
+
+    def initialize(self, transport, passthrough=None, defaults=None):
+        super(InProcessHTTPClient, self).initialize(
+            passthrough=passthrough, defaults=defaults)
+        self.transport = transport
+
+    def fetch_impl(self, request, callback):
+        netloc = urlparse.urlsplit(request.url).netloc
+        application = self.transport.resolve(netloc)
+        if application is None:
+            self.passthrough_fetch(request, callback)
+            return
+
+        started = time.time()
+
+        def handle_response(future):
+            try:
+                response = future.result()
+            except Exception as error:
+                response = error_response(request, error, started)
+            callback(response)
+
+        future = self._fetch(application, request, netloc)
+        IOLoop.current().add_future(future, handle_response)
+
+    @gen.coroutine
+    def _fetch(self, application, request, netloc):
+        response = dispatch(application, request, netloc)
+        if request.request_timeout:
+            # a handler that never finishes times out like it would over
+            # a socket, instead of hanging the fetch
+            try:
+                response = yield gen.with_timeout(
+                    datetime.timedelta(seconds=request.request_timeout),
+                    response, quiet_exceptions=(StreamClosedError,))
+            except gen.TimeoutError:
+                raise HTTPTimeoutError("Timeout during request")
+        else:
+            response = yield response
+        next_request = redirect_request(request, response)
+        if next_request is not None:
+            response = yield self.fetch(next_request, raise_error=False)
+        raise gen.Return(response)
+
+
+@gen.coroutine
+def dispatch(application, request, netloc=None):
+    # runs `request` (an HTTPRequest) through `application` and returns
+    # the HTTPResponse, all in memory.
+    started = time.time()
+    parsed = urlparse.urlsplit(request.url)
+    uri = (parsed.path or "/") + ("?" + parsed.query if parsed.query else "")
+    headers = request_headers(request, netloc or parsed.netloc)
+    body = utf8(request.body or b"")
+
+    connection = InProcessConnection(
+        protocol=parsed.scheme, streaming_callback=request.streaming_callback)
+    delegate = application.start_request(None, connection)
+    start_line = RequestStartLine(request.method, uri, "HTTP/1.1")
+    # these only return futures for stream_request_body handlers
+    waiting = delegate.headers_received(start_line, headers)
+    if waiting is not None:
+        yield waiting
+    if body:
+        waiting = delegate.data_received(body)
+        if waiting is not None:
+            yield waiting
+    delegate.finish()
+
+    response_line, response_headers, response_body = \
+        yield connection.response_future
+    if request.header_callback is not None:
+        request.header_callback(
+            "HTTP/1.1 %d %s\r\n" % (response_line.code, response_line.reason))
+        for name, value in response_headers.get_all():
+            request.header_callback("%s: %s\r\n" % (name, value))
+        request.header_callback("\r\n")
+
+    raise gen.Return(HTTPResponse(
+        request, response_line.code, reason=response_line.reason,
+        headers=response_headers, buffer=BytesIO(response_body),
+        effective_url=request.url, request_time=time.time() - started))
+
+
+class InProcessConnection(HTTPConnection):
+    # the server side of an in-memory "connection". collects whatever the
+    # handler writes and resolves `response_future` when it finishes.
+
+    def __init__(self, protocol="http", streaming_callback=None):
+        self.context = _InProcessContext(protocol)
+        self.response_future = Future()
+        self._streaming_callback = streaming_callback
+        self._close_callback = None
+        self._start_line = None
+        self._headers = None
+        self._chunks = []
+
+    def set_close_callback(self, callback):
+        self._close_callback = callback
+
+    def set_body_timeout(self, timeout):
+        pass
+
+    def set_max_body_size(self, max_body_size):
+        pass
+
+    def write_headers(self, start_line, headers, chunk=None, callback=None):
+        self._start_line = start_line
+        self._headers = headers
+        return self.write(chunk or b"", callback=callback)
+
+    def write(self, chunk, callback=None):
+        if self.response_future.done():
+            return _closed_future()
+        if chunk:
+            if self._streaming_callback is not None:
+                self._streaming_callback(chunk)
+            else:
+                self._chunks.append(chunk)
+        if callback is not None:
+            callback()
+        future = Future()
+        future.set_result(None)
+        return future
+
+    def finish(self):
+        if not self.response_future.done():
+            self.response_future.set_result(
+                (self._start_line, self._headers, b"".join(self._chunks)))
+
+    def close(self):
+        # what a dropped connection looks like to the client
+        if not self.response_future.done():
+            self.response_future.set_exception(StreamClosedError())
+        if self._close_callback is not None:
+            callback, self._close_callback = self._close_callback, None
+            callback()
+
+
+class _InProcessContext(object):
+
+    def __init__(self, protocol):
+        self.protocol = protocol or "http"
+        self.remote_ip = "127.0.0.1"
+        self.address = ("127.0.0.1", 0)
+
+
+def _service_hosts(service):
+    yield service.host.lower()
+    yield "127.0.0.1:{}".format(service.port)
+
+
+def _closed_future():
+    future = Future()
+    future.set_exception(StreamClosedError())
+    # nobody has to look at this, so don't log it as unretrieved
+    future.exception()
+    return future
@@ -0,0 +1,260 @@
+# An AsyncHTTPClient that keeps connections open between requests.
+# SimpleAsyncHTTPClient sends "Connection: close" and opens a new socket
+# for every fetch, which is most of the cost of a fast handler test (and
+# means handlers never see a reused connection). This one keeps idle
+# connections per host and port and hands them back out, and counts how
+# often that happens.
+#
+# Only plain http is pooled -- anything else (https, body_producer, proxies)
+# goes through the previously configured client.
+
+import datetime
+import time
+
+from io import BytesIO
+from tornado import gen
+from tornado.escape import utf8
+from tornado.http1connection import (
+    HTTP1Connection, HTTP1ConnectionParameters)
+from tornado.httpclient import HTTPResponse
+from tornado.httputil import (
+    HTTPMessageDelegate, RequestStartLine, split_host_and_port)
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+from tornado.tcpclient import TCPClient
+
+from testnado.client_helpers import (
+    PassthroughHTTPClient, error_response, redirect_request, request_headers)
+
+try:
+    import urlparse
+except ImportError:
+    import urllib.parse as urlparse
+
+
+class KeepAliveStats(object):
+    # connection reuse numbers, shared by every client it's handed to
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.connections_closed = 0
+
+    @property
+    def reuse_ratio(self):
+        # the share of requests that didn't need a new connection
+        if not self.requests:
+            return 0.0
+        return self.connections_reused / float(self.requests)
+
+    def reset(self):
+        self.__init__()
+
+    def __repr__(self):
+        return (
+            "<KeepAliveStats requests={} opened={} reused={} closed={} "
+            "reuse_ratio={:.2f}>".format(
+                self.requests, self.connections_opened,
+                self.connections_reused, self.connections_closed,
+                self.reuse_ratio))
+
+
+class KeepAliveHTTPClient(PassthroughHTTPClient):
+
+    def initialize(
+            self, stats=None, max_idle_connections=10, passthrough=None,
+            defaults=None):
+        super(KeepAliveHTTPClient, self).initialize(
+            passthrough=passthrough, defaults=defaults)
+        self.stats = stats or KeepAliveStats()
+        self.max_idle_connections = max_idle_connections
+        self._tcp_client = TCPClient()
+        # (host, port) -> idle IOStreams, most recently used last
+        self._idle = {}
+
+    def close(self):
+        for streams in self._idle.values():
+            for stream in streams:
+                self._close_stream(stream)
+        self._idle = {}
+        self._tcp_client.close()
+        super(KeepAliveHTTPClient, self).close()
+
+    @property
+    def idle_connections(self):
+        return sum(len(streams) for streams in self._idle.values())
+
+    def fetch_impl(self, request, callback):
+        parsed = urlparse.urlsplit(request.url)
+        if parsed.scheme != "http" or request.body_producer is not None or \
+                request.proxy_host:
+            self.passthrough_fetch(request, callback)
+            return
+
+        started = time.time()
+
+        def handle_response(future):
+            try:
+                response = future.result()
+            except Exception as error:
+                response = error_response(request, error, started)
+            callback(response)
+
+        future = self._fetch(request, parsed)
+        IOLoop.current().add_future(future, handle_response)
+
+    @gen.coroutine
+    def _fetch(self, request, parsed):
+        self.stats.requests += 1
+        started = time.time()
+        host, port = split_host_and_port(parsed.netloc.rpartition("@")[-1])
+        address = (host, port or 80)
+
+        stream = self._checkout(address)
+        if stream is not None:
+            self.stats.connections_reused += 1
+            try:
+                response = yield self._exchange(
+                    stream, address, request, parsed, started)
+            except StreamClosedError:
+                # the server dropped the idle connection before we got to
+                # it -- count it as a new connection instead
+                self.stats.connections_reused -= 1
+                self._close_stream(stream)
+                stream = None
+        if stream is None:
+            stream = yield self._connect(request, address, started)
+            response = yield self._exchange(
+                stream, address, request, parsed, started)
+
+        next_request = redirect_request(request, response)
+        if next_request is not None:
+            response = yield self.fetch(next_request, raise_error=False)
+        raise gen.Return(response)
+
+    @gen.coroutine
+    def _connect(self, request, address, started):
+        timeouts = [timeout for timeout in (
+            request.connect_timeout, request.request_timeout) if timeout]
+        future = self._tcp_client.connect(address[0], address[1])
+        if timeouts:
+            future = _with_timeout(min(timeouts), started, future)
+        stream = yield future
+        self.stats.connections_opened += 1
+        raise gen.Return(stream)
+
+    @gen.coroutine
+    def _exchange(self, stream, address, request, parsed, started):
+        connection = HTTP1Connection(stream, True, HTTP1ConnectionParameters(
+            no_keep_alive=False, decompress=request.decompress_response))
+        collector = _ResponseCollector(request)
+
+        headers = request_headers(request, parsed.netloc)
+        if request.decompress_response:
+            headers.setdefault("Accept-Encoding", "gzip")
+        path = (parsed.path or "/") + \
+            ("?" + parsed.query if parsed.query else "")
+
+        exchange = self._send(connection, request, path, headers, collector)
+        if request.request_timeout:
+            try:
+                exchange = yield _with_timeout(
+                    request.request_timeout, started, exchange)
+            except gen.TimeoutError:
+                self._close_stream(stream)
+                raise
+        else:
+            exchange = yield exchange
+
+        if exchange and collector.keep_alive and not stream.closed():
+            self._checkin(address, connection.detach())
+        else:
+            self._close_stream(stream)
+
+        raise gen.Return(collector.response(time.time() - started))
+
+    @gen.coroutine
+    def _send(self, connection, request, path, headers, collector):
+        body = utf8(request.body) if request.body is not None else None
+        yield connection.write_headers(
+            RequestStartLine(request.method, path, "HTTP/1.1"), headers)
+        if body:
+            yield connection.write(body)
+        connection.finish()
+        still_open = yield connection.read_response(collector)
+        if not collector.finished:
+            raise StreamClosedError()
+        raise gen.Return(still_open)
+
+    def _checkout(self, address):
+        streams = self._idle.get(address, [])
+        while streams:
+            stream = streams.pop()
+            if not stream.closed():
+                return stream
+            self.stats.connections_closed += 1
+        return None
+
+    def _checkin(self, address, stream):
+        streams = self._idle.setdefault(address, [])
+        streams.append(stream)
+        while len(streams) > self.max_idle_connections:
+            self._close_stream(streams.pop(0))
+
+    def _close_stream(self, stream):
+        if not stream.closed():
+            stream.close()
+        self.stats.connections_closed += 1
+
+
+def _with_timeout(timeout, started, future):
+    remaining = max(0, timeout - (time.time() - started))
+    return gen.with_timeout(
+        datetime.timedelta(seconds=remaining), future,
+        quiet_exceptions=(StreamClosedError,))
+
+
+class _ResponseCollector(HTTPMessageDelegate):
+
+    def __init__(self, request):
+        self.request = request
+        self.start_line = None
+        self.headers = None
+        self.chunks = []
+        self.finished = False
+
+    @property
+    def keep_alive(self):
+        connection = (self.headers.get("Connection") or "").lower()
+        if self.start_line.version == "HTTP/1.1":
+            return connection != "close"
+        return connection == "keep-alive"
+
+    def headers_received(self, start_line, headers):
+        self.start_line = start_line
+        self.headers = headers
+        if self.request.header_callback is not None:
+            self.request.header_callback("%s %d %s\r\n" % (
+                start_line.version, start_line.code, start_line.reason))
+            for name, value in headers.get_all():
+                self.request.header_callback("%s: %s\r\n" % (name, value))
+            self.request.header_callback("\r\n")
+
+    def data_received(self, chunk):
+        if self.request.streaming_callback is not None:
+            self.request.streaming_callback(chunk)
+        else:
+            self.chunks.append(chunk)
+
+    def finish(self):
+        self.finished = True
+
+    def on_connection_close(self):
+        pass
+
+    def response(self, request_time):
+        return HTTPResponse(
+            self.request, self.start_line.code, reason=self.start_line.reason,
+            headers=self.headers, buffer=BytesIO(b"".join(self.chunks)),
+            effective_url=self.request.url, request_time=request_time)
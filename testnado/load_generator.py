@@ -0,0 +1,97 @@
+import collections
+import math
+import time
+
+from tornado import gen
+
+
+_clock = getattr(time, "monotonic", time.time)
+
+
+class LoadTestResult(object):
+
+    def __init__(self, latencies, status_codes, errors, elapsed):
+        self.latencies = sorted(latencies)
+        self.status_codes = dict(status_codes)
+        self.errors = errors
+        self.elapsed = elapsed
+        self.requests = len(self.latencies)
+
+    @property
+    def throughput(self):
+        if not self.elapsed:
+            return 0.0
+        return self.requests / self.elapsed
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p95(self):
+        return self.percentile(95)
+
+    @property
+    def p99(self):
+        return self.percentile(99)
+
+    @property
+    def max(self):
+        return self.latencies[-1] if self.latencies else 0.0
+
+    def percentile(self, percent):
+        # nearest-rank, so the result is always a latency we actually saw
+        if not self.latencies:
+            return 0.0
+        rank = int(math.ceil(percent / 100.0 * len(self.latencies)))
+        return self.latencies[max(rank, 1) - 1]
+
+    def __repr__(self):
+        return (
+            "<LoadTestResult requests={} errors={} throughput={:.1f}/s "
+            "p50={:.4f}s p95={:.4f}s p99={:.4f}s max={:.4f}s>").format(
+                self.requests, self.errors, self.throughput, self.p50,
+                self.p95, self.p99, self.max)
+
+
+@gen.coroutine
+def generate_load(fetch, concurrency, duration=None, requests=None):
+    # `fetch` is called with no arguments and must return a future. load
+    # stops after `requests` total requests, or once `duration` seconds
+    # have passed (requests already in flight are allowed to finish).
+
+    if duration is None and requests is None:
+        raise ValueError("Either 'duration' or 'requests' is required.")
+
+    latencies = []
+    status_codes = collections.Counter()
+    counters = {"sent": 0, "errors": 0}
+    started = _clock()
+    deadline = None if duration is None else started + duration
+
+    def should_send():
+        if requests is not None and counters["sent"] >= requests:
+            return False
+        if deadline is not None and _clock() >= deadline:
+            return False
+        counters["sent"] += 1
+        return True
+
+    @gen.coroutine
+    def worker():
+        while should_send():
+            request_started = _clock()
+            try:
+                response = yield fetch()
+            except Exception:
+                counters["errors"] += 1
+            else:
+                status_codes[response.code] += 1
+                if response.code == 599:
+                    counters["errors"] += 1
+            latencies.append(_clock() - request_started)
+
+    yield [worker() for _ in range(concurrency)]
+
+    raise gen.Return(LoadTestResult(
+        latencies, status_codes, counters["errors"], _clock() - started))
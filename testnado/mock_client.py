@@ -3,70 +3,159 @@
 # complete, the network behavior different, etc. but sometimes you
 # just can't change internal fetching parameters for dependent libraries.
 
+import collections
 import contextlib
-try:
-    import unittest.mock as mock
-except ImportError:
-    import mock
+import time
 
+from io import BytesIO
 from tornado import gen
-from tornado.httpclient import AsyncHTTPClient, HTTPError
+from tornado.escape import utf8
+from tornado.httpclient import (
+    AsyncHTTPClient, HTTPError, HTTPRequest, HTTPResponse)
 from tornado.httputil import HTTPHeaders
+from tornado.ioloop import IOLoop
+
+from testnado.cassette import CassetteMiss
+from testnado.client_helpers import (
+    PassthroughHTTPClient, configured_client, current_client_configuration,
+    error_response)
+
+try:
+    from urlparse import parse_qsl
+except ImportError:
+    from urllib.parse import parse_qsl
 
 
 class MockClient(object):
 
-    def __init__(self, ioloop):
+    def __init__(self, ioloop, cassette=None):
         self.ioloop = ioloop
+        # an optional testnado.cassette.Cassette, which records (and / or
+        # replays) the requests for URLs that aren't mocked
+        self.cassette = cassette
+        # (method, base url, query) -> queue of responses, where query is
+        # None unless the mock was added with match_query=True
         self.mocked_urls = {}
-        self.ioloop.make_current()
+        # base url -> number of responses still queued for it (any method)
+        self._pending = {}
+        if IOLoop.current(instance=False) is not self.ioloop:
+            self.ioloop.make_current()
         self.client = AsyncHTTPClient()
         self.original_fetch = self.client.fetch
 
-    def mock_url(self, url, method="GET"):
+    def mock_url(self, url, method="GET", match_query=False):
+        # by default the query string is ignored when matching. with
+        # match_query=True, the response is only used for requests with
+        # the same query arguments (in any order), and it's picked ahead
+        # of any query-agnostic response for the same URL.
         mock_response = MockResponse(url)
-        base_url = url.split("?")[0]
-        self.mocked_urls.setdefault(base_url, []).append(
-            (method, mock_response))
+        base_url, query = _split_url(url)
+        key = (method, base_url, query if match_query else None)
+        self.mocked_urls.setdefault(key, collections.deque()).append(
+            mock_response)
+        self._pending[base_url] = self._pending.get(base_url, 0) + 1
         return mock_response
 
     @contextlib.contextmanager
     def patch(self):
         # this is perhaps a bit sketchy -- basing on the idea that
         # AsyncHTTPClient returns the singleton...
+        # (mock is imported here since it's slow to import, and install()
+        # doesn't need it)
+        try:
+            import unittest.mock as mock
+        except ImportError:
+            import mock
         with mock.patch.object(self.client, "fetch", self.fetch):
             yield
 
+    @contextlib.contextmanager
+    def install(self):
+        # installs MockHTTPClient as the AsyncHTTPClient implementation, so
+        # every client created inside the block (force_instance=True, other
+        # IOLoops, etc.) is intercepted, and the responses are real
+        # HTTPResponse objects. requests to URLs that aren't mocked go to
+        # whatever implementation was configured before.
+        passthrough = current_client_configuration()
+        with configured_client(
+                MockHTTPClient, mock_client=self, passthrough=passthrough):
+            yield
+
     @gen.coroutine
     def fetch(self, url, *args, **kwargs):
-        base_url = url.split("?")[0]
+        response = self.resolve(kwargs.get("method", "GET"), url)
+
+        if response is None and self.cassette is not None:
+            response = yield self._cassette_fetch(url, *args, **kwargs)
+            raise gen.Return(response)
 
-        if base_url not in self.mocked_urls:
+        if response is None:
             response = yield self.original_fetch(url, *args, **kwargs)
             raise gen.Return(response)
 
-        responses = self.mocked_urls[base_url]
+        if response.code > 399 and kwargs.get("raise_error", True):
+            raise HTTPError(
+                code=response.code, message="Mock error: ({}) {}".format(
+                    response.code, response.body), response=response)
+        raise gen.Return(response)
+
+    @gen.coroutine
+    def _cassette_fetch(self, url, *args, **kwargs):
+        raise_error = kwargs.pop("raise_error", True)
+        request = HTTPRequest(url, **kwargs)
+        response = self.cassette.replay(request)
+        if response is None:
+            response = yield self.original_fetch(
+                request, *args, raise_error=False)
+            if response.code != 599:
+                self.cassette.record(request, response)
+        if raise_error and response.error:
+            raise response.error
+        raise gen.Return(response)
+
+    def resolve(self, method, url):
+        # returns the next MockResponse for the request, or None when the
+        # URL isn't mocked at all (and so should be passed through)
+        base_url, query = _split_url(url)
 
-        if len(responses) == 0:
+        if base_url not in self._pending:
+            return None
+
+        response = self._dequeue(method, base_url, query)
+
+        if response is None and self._pending[base_url] == 0:
             raise MissingMockResponse(
                 "URL requested too many times: {}".format(base_url))
 
-        expected_method, response = responses.pop(0)
-        request_method = kwargs.get("method", "GET")
-
-        if expected_method != request_method:
-            responses.insert(0, (expected_method, response))
+        if response is None:
+            # only happens on a mismatch, so it's fine to look around
+            expected = sorted(set(
+                queued_method for (queued_method, queued_url, _), responses
+                in self.mocked_urls.items()
+                if queued_url == base_url and responses))
+            if method in expected:
+                raise MissingMockResponse(
+                    "No mocked response for query: {}".format(url))
             response = MockResponse(url)
             response.body = \
                 "Method mismatch ({}) for mocked URL: {} {}".format(
-                    request_method, expected_method, base_url)
+                    method, ", ".join(expected), base_url)
             response.code = 405
 
-        if response.code > 399 and kwargs.get("raise_error", True):
-            raise HTTPError(
-                code=response.code, message="Mock error: ({}) {}".format(
-                    response.code, response.body), response=response)
-        raise gen.Return(response)
+        return response
+
+    def _dequeue(self, method, base_url, query):
+        for key in ((method, base_url, query), (method, base_url, None)):
+            responses = self.mocked_urls.get(key)
+            if responses:
+                self._pending[base_url] -= 1
+                return responses.popleft()
+        return None
+
+
+def _split_url(url):
+    base_url, _, query = url.partition("?")
+    return base_url, tuple(sorted(parse_qsl(query, keep_blank_values=True)))
 
 
 class MockResponse(object):
@@ -90,6 +179,63 @@ class MockResponse(object):
         self._headers.setdefault("Content-Length", len(self._body))
         return self._headers
 
+    def http_response(self, request, request_time=None):
+        body = utf8(self._body)
+        headers = HTTPHeaders()
+        for name, value in self._headers.get_all():
+            headers.add(name, str(value))
+        headers.setdefault("Content-Length", str(len(body)))
+        return HTTPResponse(
+            request, self.code, headers=headers, buffer=BytesIO(body),
+            effective_url=request.url, request_time=request_time)
+
+
+class MockHTTPClient(PassthroughHTTPClient):
+    # an AsyncHTTPClient implementation that answers straight from a
+    # MockClient's queued responses -- see MockClient.install().
+
+    def initialize(self, mock_client, passthrough=None, defaults=None):
+        super(MockHTTPClient, self).initialize(
+            passthrough=passthrough, defaults=defaults)
+        self.mock_client = mock_client
+
+    def fetch_impl(self, request, callback):
+        started = time.time()
+        try:
+            response = self.mock_client.resolve(request.method, request.url)
+        except MissingMockResponse as error:
+            callback(error_response(request, error, started))
+            return
+
+        if response is None and self.mock_client.cassette is not None:
+            self._cassette_fetch(request, callback, started)
+            return
+
+        if response is None:
+            self.passthrough_fetch(request, callback)
+            return
+
+        callback(response.http_response(request, time.time() - started))
+
+    def _cassette_fetch(self, request, callback, started):
+        cassette = self.mock_client.cassette
+        try:
+            response = cassette.replay(request)
+        except CassetteMiss as error:
+            callback(error_response(request, error, started))
+            return
+
+        if response is not None:
+            callback(response)
+            return
+
+        def record(response):
+            if response.code != 599:
+                cassette.record(request, response)
+            callback(response)
+
+        self.passthrough_fetch(request, record)
+
 
 class MissingMockResponse(Exception):
     pass
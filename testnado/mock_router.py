@@ -0,0 +1,161 @@
+import re
+
+from tornado.escape import url_unescape
+from tornado.routing import Router
+
+
+# combined patterns are split up every so many groups, so a chunk that
+# won't compile only sends its own routes to be matched one at a time
+_MAX_GROUPS = 99
+_REGEX_CHARACTERS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+# global inline flags ("(?i)"), backreferences and group conditionals only
+# make sense in a pattern of their own
+_UNCOMBINABLE = re.compile(r"\(\?[aiLmsux]+\)|\\[1-9]|\(\?P=|\(\?\(")
+
+
+class MockRouter(Router):
+    # a single Tornado router for every MockService route. plain text
+    # routes are a dict lookup, and regex routes are compiled together into
+    # as few patterns as possible, so dispatch doesn't walk the routes one
+    # by one. routes can be added at any time, even after the Application
+    # is listening -- the table is recompiled lazily on the next request.
+    #
+    # matching follows Tornado's rules: routes are tried in the order they
+    # were added, and must match the whole path.
+
+    def __init__(self, application=None):
+        self.application = application
+        self.default_handler = None
+        self._routes = []
+        self._compiled = None
+
+    def add_route(self, route, handler):
+        # compiled up front, so a bad pattern fails here instead of on
+        # every request
+        pattern = _route_pattern(route)
+        self._routes.append((pattern, re.compile(pattern), handler))
+        self._compiled = None
+
+    def clear(self):
+        self.default_handler = None
+        self._routes = []
+        self._compiled = None
+
+    def match(self, path):
+        # returns (handler, path_args, path_kwargs), with a None handler
+        # when nothing matches
+        if self._compiled is None:
+            self._compiled = _CompiledRoutes(self._routes)
+        handler, args, kwargs = self._compiled.match(path)
+        if handler is None and self.default_handler is not None:
+            match = self.default_handler.route.match(path)
+            if match:
+                handler, args = self.default_handler, list(match.groups())
+        return handler, args, kwargs
+
+    def find_handler(self, request, **kwargs):
+        handler, path_args, path_kwargs = self.match(request.path)
+        if handler is None:
+            return None
+        return self.application.get_handler_delegate(
+            request, handler,
+            path_args=[_unquote(arg) for arg in path_args],
+            path_kwargs=dict(
+                (k, _unquote(v)) for k, v in path_kwargs.items()))
+
+
+class _CompiledRoutes(object):
+
+    def __init__(self, routes):
+        self._literals = {}
+        self._patterns = []
+        # routes matched one at a time, in order: named groups (which can
+        # clash across routes), and anything that can't be combined with
+        # other patterns. there aren't usually many.
+        self._single = []
+
+        chunk, group_count = [], 0
+        for position, (route, compiled, handler) in enumerate(routes):
+            if not _REGEX_CHARACTERS.search(route[:-1]):
+                self._literals.setdefault(route[:-1], (position, handler))
+                continue
+
+            if compiled.groupindex or _UNCOMBINABLE.search(route):
+                self._single.append((position, handler, compiled))
+                continue
+
+            if group_count + compiled.groups + 1 > _MAX_GROUPS and chunk:
+                self._add_chunk(chunk)
+                chunk, group_count = [], 0
+            group_count += compiled.groups + 1
+            chunk.append((position, route, compiled, handler))
+
+        if chunk:
+            self._add_chunk(chunk)
+        self._single.sort(key=lambda single: single[0])
+
+    def _add_chunk(self, chunk):
+        try:
+            self._patterns.append(_compile_chunk(chunk))
+        except re.error:
+            # something in here only works on its own
+            self._single.extend(
+                (position, handler, compiled)
+                for position, _, compiled, handler in chunk)
+
+    def match(self, path):
+        best = self._literals.get(path)
+        position = best[0] if best else None
+        handler = best[1] if best else None
+        args, kwargs = [], {}
+
+        for pattern, groups in self._patterns:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            index = match.lastindex
+            route_position, route_handler, count = groups[index]
+            if position is None or route_position < position:
+                position, handler = route_position, route_handler
+                args = list(match.groups()[index:index + count])
+            # later chunks only hold later routes
+            break
+
+        for route_position, route_handler, compiled in self._single:
+            if position is not None and route_position > position:
+                break
+            match = compiled.match(path)
+            if match:
+                # like Tornado, named groups are passed as keyword
+                # arguments instead of positional ones
+                handler = route_handler
+                if compiled.groupindex:
+                    args, kwargs = [], match.groupdict()
+                else:
+                    args, kwargs = list(match.groups()), {}
+                break
+
+        return handler, args, kwargs
+
+
+def _route_pattern(route):
+    pattern = getattr(route, "pattern", route)
+    if not pattern.endswith("$"):
+        pattern += "$"
+    return pattern
+
+
+def _compile_chunk(chunk):
+    pattern = "|".join("({})".format(route) for _, route, _, _ in chunk)
+    indexes = {}
+    index = 1
+    for position, _, compiled, handler in chunk:
+        indexes[index] = (position, handler, compiled.groups)
+        index += compiled.groups + 1
+    return re.compile(pattern), indexes
+
+
+def _unquote(value):
+    if value is None:
+        return value
+    return url_unescape(value, encoding=None, plus=False)
@@ -7,9 +7,17 @@ except ImportError:
     import urllib.parse as urlparse
 
 from tornado.httpserver import HTTPServer
+from tornado.iostream import IOStream
+from tornado.netutil import add_accept_handler
 from tornado.testing import bind_unused_port
+from tornado.routing import AnyMatches, Rule
 from tornado.web import Application, HTTPError, RequestHandler
 
+from testnado.faults import apply_faults
+from testnado.mock_router import MockRouter
+from testnado.request_log import RequestLog
+from testnado.route_stats import RouteStats
+
 
 try:
     basestring
@@ -19,8 +27,9 @@ except NameError:
 
 class MockService(object):
 
-    def __init__(self, ioloop, port=None):
+    def __init__(self, ioloop, port=None, recording=None):
         self.ioloop = ioloop
+        self.recording = recording
         if port is None:
             self.socket, self.port = bind_unused_port()
         elif isinstance(port, tuple):
@@ -31,56 +40,159 @@ class MockService(object):
         self.protocol = "http"
         self.base_url = "http://" + self.host
         self.routes = {}
+        self._router = MockRouter()
+        self.application = None
         self._listening = False
         self._service = None
+        self._remove_accept_handler = None
+
+    @property
+    def listening(self):
+        return self._listening
 
     def url(self, path):
         return urlparse.urljoin(self.base_url, path)
 
-    def listen(self):
+    def listen(self, accept=True):
         # this is a bit annoying for the end user, but it's better than
         # "magically" starting the service, potentially before the user
         # has finished populating routes (or alternatively never starting)
+        # with accept=False the service is started without taking any
+        # connections, for when only an in-process transport talks to it.
 
         if not self.routes.items():
-            # making a 'catchall', since without routes Tornado infinitely
-            # redirects. this is only really useful for mocking without
-            # testing responses (which is sketchy anyway...)
-            handler = self.add_method("GET", "/(.*)", _unimplemented)
-            handler.add_method("POST", _unimplemented)
-            handler.add_method("PUT", _unimplemented)
-            handler.add_method("OPTIONS", _unimplemented)
-            handler.add_method("INFO", _unimplemented)
-
-        application = Application(self.routes.items())
-        if self.socket is not None:
-            self._service = HTTPServer(application)
-            self._service.add_socket(self.socket)
-        else:
-            self._service = application.listen(self.port)
+            self._add_catchall()
+
+        if self.application is None:
+            # every route goes through the one router, which is what lets
+            # routes be added (or reset) without rebuilding the application
+            self.application = Application(
+                [Rule(AnyMatches(), self._router)])
+            self._router.application = self.application
+
+        if accept:
+            if self._service is None:
+                if self.socket is not None:
+                    self._service = HTTPServer(self.application)
+                else:
+                    self._service = self.application.listen(self.port)
+            if self.socket is not None:
+                self._accept()
         self._listening = True
 
+    def _add_catchall(self):
+        # making a 'catchall', since without routes Tornado infinitely
+        # redirects. this is only really useful for mocking without
+        # testing responses (which is sketchy anyway...). it's only
+        # used when nothing else matches, so routes can still be added
+        # after listen().
+        handler = build_handler("/(.*)", self.recording)
+        for method in ("GET", "POST", "PUT", "OPTIONS", "INFO"):
+            handler.add_method(method, _unimplemented)
+        self.routes["/(.*)"] = handler
+        self._router.default_handler = handler
+
+    def detach(self):
+        # stops accepting connections on the current IOLoop, but keeps the
+        # socket open so that listen() can pick it up again later (from
+        # another IOLoop, even).
+        if self._remove_accept_handler is not None:
+            self._remove_accept_handler()
+            self._remove_accept_handler = None
+        self._listening = False
+
+    def reset(self):
+        # forgets every route, method handler and recorded request, but
+        # keeps the socket and server around for the next listen().
+        self.routes = {}
+        self._router.clear()
+
     def stop(self):
+        self.detach()
+        if self.socket is not None:
+            self.socket.close()
         if self._service is not None:
             self._service.stop()
 
-    def add_method(self, method, route, method_handler):
+    def _accept(self):
+        # accepting connections ourselves (instead of HTTPServer.add_socket)
+        # lets detach() unregister the socket without closing it.
+        if self._remove_accept_handler is None:
+            self._remove_accept_handler = add_accept_handler(
+                self.socket, self._handle_connection)
+
+    def _handle_connection(self, connection, address):
+        stream = IOStream(
+            connection, max_buffer_size=self._service.max_buffer_size,
+            read_chunk_size=self._service.read_chunk_size)
+        self._service.handle_stream(stream, address)
+
+    def add_method(self, method, route, method_handler, faults=None):
         # this only works with text (not regex) routes, but it's a helper
         # anyway so deal with it. :)
-        handler = self.routes.setdefault(route, build_handler(route))
-        handler.add_method(method, method_handler)
+        # `faults` is an optional testnado.faults.FaultPolicy, for delaying
+        # or breaking the responses from this method.
+        if route not in self.routes:
+            self.routes[route] = build_handler(route, self.recording)
+            self._router.add_route(route, self.routes[route])
+        handler = self.routes[route]
+        handler.add_method(method, method_handler, faults=faults)
         return handler
 
     def assert_requested(self, method, path, headers=None):
-        headers = headers or {}
-        for handler in self.routes.values():
-            if handler.route.match(path):
-                try:
-                    return handler.assert_requested(method, path, headers)
-                except AssertionError:
-                    continue
+        # requests are recorded by the handler the router picked for their
+        # path, and each handler's log is indexed by (method, path).
+        handler = self._router.match(path)[0]
+        if handler is not None:
+            request = handler.request_log.find(method, path, headers)
+            if request is not None:
+                return request
         raise AssertionError("No request matched: {} {}".format(method, path))
 
+    def wait_for_request(
+            self, method, path, headers=None, count=1, timeout=None):
+        # a Future that resolves as soon as `count` matching requests have
+        # been made (including any already made), with the matching
+        # requests. with `timeout` (in seconds), it fails with an
+        # AssertionError if they haven't all arrived in time -- for
+        # background / fire-and-forget calls, instead of sleeping. only the
+        # requests the RecordingPolicy still holds come back, so with a
+        # `limit` (or `summary`) there can be fewer than `count` of them.
+        handler = self._router.match(path)[0]
+        if handler is None:
+            raise ValueError("No route matches: {}".format(path))
+        request_log = handler.request_log
+        future = request_log.wait(method, path, headers, count)
+        if timeout is None or future.done():
+            return future
+
+        def expire():
+            if future.done():
+                return
+            matched = request_log.cancel(future)
+            future.set_exception(AssertionError(
+                "Timed out after {}s waiting for {} request(s): {} {} "
+                "(got {})".format(timeout, count, method, path, matched)))
+
+        timer = self.ioloop.call_later(timeout, expire)
+        future.add_done_callback(
+            lambda future: self.ioloop.remove_timeout(timer))
+        return future
+
+    def request_count(self, method, path, headers=None):
+        handler = self._router.match(path)[0]
+        if handler is None:
+            return 0
+        return handler.request_log.count(method, path, headers)
+
+    def stats(self):
+        # {route: {method: RouteStats}} for every route that's been
+        # requested -- see RouteStats.as_dict() for a JSON-able version.
+        return dict(
+            (route, dict(handler.method_stats))
+            for route, handler in self.routes.items()
+            if handler.method_stats)
+
     def assert_not_requested(self, method, path, headers=None):
         try:
             self.assert_requested(method=method, path=path, headers=headers)
@@ -91,7 +203,10 @@ class MockService(object):
                 "Request was made to: {} {}".format(method, path))
 
 
-class MockServiceMethods():
+class MockServiceMethods(object):
+
+    _stats = None
+    _bytes_out = 0
 
     def get(self, *args, **kwargs):
         return self._handle_method("GET", args, kwargs)
@@ -118,14 +233,48 @@ class MockServiceMethods():
         return self._handle_method("INFO", args, kwargs)
 
     def _handle_method(self, method, args, kwargs):
-        self.requests.append(self.request)
+        self.request_log.record(self.request)
+        self._stats = self.route_stats(method)
+        self._stats.started(len(self.request.body or b""))
         if method not in self.method_handlers:
             raise HTTPError(405, "Method '{}' has no handler.".format(method))
+        faults = self.method_faults.get(method)
+        if faults is not None:
+            return apply_faults(
+                faults, self, self.method_handlers[method], args, kwargs)
         return self.method_handlers[method](self, *args, **kwargs)
 
+    def write(self, chunk):
+        buffered = len(self._write_buffer)
+        super(MockServiceMethods, self).write(chunk)
+        for written in self._write_buffer[buffered:]:
+            self._bytes_out += len(written)
+
+    def on_finish(self):
+        if self._stats is not None:
+            self._stats.finished(
+                self.get_status(), self.request.request_time(),
+                self._bytes_out)
+            self._stats = None
+
+    def on_connection_close(self):
+        super(MockServiceMethods, self).on_connection_close()
+        if self._stats is not None:
+            self._stats.closed(self.request.request_time(), self._bytes_out)
+            self._stats = None
+
     @classmethod
-    def add_method(cls, method, handler):
+    def route_stats(cls, method):
+        stats = cls.method_stats.get(method)
+        if stats is None:
+            stats = cls.method_stats[method] = RouteStats(
+                cls.route.pattern, method)
+        return stats
+
+    @classmethod
+    def add_method(cls, method, handler, faults=None):
         cls.method_handlers[method.upper()] = handler
+        cls.method_faults[method.upper()] = faults
         if method not in cls.SUPPORTED_METHODS:
             cls.SUPPORTED_METHODS = cls.SUPPORTED_METHODS + (method,)
 
@@ -136,29 +285,26 @@ class MockServiceMethods():
 
     @classmethod
     def assert_requested(cls, method, path, headers):
-        for request in cls.requests:
-            if not request.method == method:
-                continue
-            if not request.path == path:
-                continue
-            if not compare_dicts(
-                    headers, request.headers, case_insensitive=True):
-                continue
-
-            if request.method == method and request.path == path:
-                return request
-        raise AssertionError("No request matched: {}".format(method))
+        request = cls.request_log.find(method, path, headers)
+        if request is None:
+            raise AssertionError("No request matched: {}".format(method))
+        return request
 
 
-def build_handler(handler_route):
+def build_handler(handler_route, recording=None):
 
     if isinstance(handler_route, basestring):
         handler_route = re.compile(handler_route)
 
+    handler_log = RequestLog(recording)
+
     class Handler(MockServiceMethods, RequestHandler):
         route = handler_route
-        requests = []
+        request_log = handler_log
+        requests = handler_log.requests
         method_handlers = {}
+        method_faults = {}
+        method_stats = {}
 
     return Handler
 
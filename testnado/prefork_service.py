@@ -0,0 +1,222 @@
+# A MockService spread across several worker processes, for load testing
+# client code against a mock that won't be the bottleneck. Like Tornado's
+# fork_processes(), the listening socket is bound first and every forked
+# worker accepts on it, so the kernel spreads connections across them.
+#
+#   service = PreforkMockService(workers=8)
+#   service.add_method("GET", "/users", list_users)
+#   service.listen()
+#   ... hammer service.url("/users") ...
+#   service.assert_requested("GET", "/users")
+#   service.stop()
+#
+# Routes are copied into the workers when they fork, so they all have to be
+# added before listen(). Each worker records requests (as RecordedRequest
+# snapshots) under the service's RecordingPolicy, and sends what it holds,
+# its request counts and its stats back over a pipe whenever the parent
+# asks. assert_requested(), request_count() and stats() all ask.
+# Method handlers run in the workers, so they can't change anything in the
+# test process. This needs os.fork(), so it doesn't work on Windows.
+
+import copy
+import multiprocessing
+import os
+
+from tornado.ioloop import IOLoop
+from tornado.testing import bind_unused_port
+
+from testnado.mock_service import MockService
+from testnado.request_log import RecordedRequest, RecordingPolicy, \
+    RequestLog
+
+
+_SYNC = "sync"
+_STOP = "stop"
+
+
+class PreforkMockService(object):
+
+    # seconds to wait for a worker to answer
+    sync_timeout = 10
+
+    def __init__(self, workers=None, recording=None):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.recording = recording
+        self.socket, self.port = bind_unused_port()
+        # the parent's copy never listens. it holds the routes to fork, and
+        # the request logs the workers' requests end up in.
+        self._service = MockService(
+            None, port=(self.socket, self.port), recording=recording)
+        self.host = self._service.host
+        self.protocol = self._service.protocol
+        self.base_url = self._service.base_url
+        # (process, pipe) for each worker
+        self._workers = []
+        # worker pid -> {route: {method: RouteStats}}, as of the last sync
+        self._worker_stats = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def listening(self):
+        return bool(self._workers)
+
+    @property
+    def pids(self):
+        return [process.pid for process, _ in self._workers]
+
+    def url(self, path):
+        return self._service.url(path)
+
+    def add_method(self, method, route, method_handler, faults=None):
+        if self._workers:
+            raise RuntimeError(
+                "Routes have to be added before listen(), since they're "
+                "copied into the workers when they fork.")
+        return self._service.add_method(
+            method, route, method_handler, faults=faults)
+
+    def listen(self):
+        if self._workers:
+            return
+        if not hasattr(os, "fork"):
+            raise RuntimeError("PreforkMockService needs os.fork().")
+        if not self._service.routes:
+            self._service._add_catchall()
+        context = _fork_context()
+        for _ in range(self.workers):
+            parent_pipe, worker_pipe = context.Pipe()
+            process = context.Process(
+                target=_run_worker,
+                args=(self._service, worker_pipe))
+            process.daemon = True
+            process.start()
+            worker_pipe.close()
+            self._workers.append((process, parent_pipe))
+
+    def sync(self):
+        # pulls every request and the stats the workers have recorded since
+        # the last sync into this process
+        for process, pipe in self._workers:
+            try:
+                pipe.send(_SYNC)
+            except (IOError, OSError):
+                raise _worker_died(process)
+        for process, pipe in self._workers:
+            try:
+                answered = pipe.poll(self.sync_timeout)
+                if answered:
+                    logs, stats = pipe.recv()
+            except (IOError, OSError, EOFError):
+                raise _worker_died(process)
+            if not answered:
+                if not process.is_alive():
+                    raise _worker_died(process)
+                raise RuntimeError(
+                    "Mock service worker {} didn't answer within {}s.".format(
+                        process.pid, self.sync_timeout))
+            for route, held, counts in logs:
+                self._service.routes[route].request_log.merge(held, counts)
+            self._worker_stats[process.pid] = stats
+
+    def assert_requested(self, method, path, headers=None):
+        self.sync()
+        return self._service.assert_requested(method, path, headers)
+
+    def assert_not_requested(self, method, path, headers=None):
+        self.sync()
+        self._service.assert_not_requested(method, path, headers)
+
+    def request_count(self, method, path, headers=None):
+        self.sync()
+        return self._service.request_count(method, path, headers)
+
+    def stats(self):
+        # {route: {method: RouteStats}}, added up across the workers
+        self.sync()
+        merged = {}
+        for worker_stats in self._worker_stats.values():
+            for route, methods in worker_stats.items():
+                for method, stats in methods.items():
+                    route_stats = merged.setdefault(route, {})
+                    if method in route_stats:
+                        route_stats[method].merge(stats)
+                    else:
+                        route_stats[method] = copy.deepcopy(stats)
+        return merged
+
+    def stop(self):
+        for process, pipe in self._workers:
+            try:
+                pipe.send(_STOP)
+            except (IOError, OSError):
+                pass
+        for process, pipe in self._workers:
+            process.join(self.sync_timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            pipe.close()
+        self._workers = []
+        self.socket.close()
+
+
+def _worker_died(process):
+    # a worker that crashed (or was killed) can't send back what it recorded
+    process.join(1)
+    return RuntimeError(
+        "Mock service worker {} has died (exit code {}).".format(
+            process.pid, process.exitcode))
+
+
+def _fork_context():
+    # the workers are forked (never spawned), since they inherit the socket
+    # and the method handlers rather than having them pickled
+    if hasattr(multiprocessing, "get_context"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing
+
+
+def _run_worker(service, pipe):
+    io_loop = IOLoop()
+    policy = service.recording or RecordingPolicy()
+    # route -> what it's recorded since the last sync, under the same
+    # policy, so a worker holds no more than the parent would
+    outboxes = {}
+
+    for route, handler in service.routes.items():
+        outbox = outboxes[route] = RequestLog(policy)
+        # (snapshots, since they're pickled over to the parent)
+        handler.request_log.record = \
+            lambda request, outbox=outbox: outbox.record(
+                RecordedRequest(request, policy))
+
+    def handle_message(fd, events):
+        try:
+            message = pipe.recv()
+        except EOFError:
+            # the parent went away
+            message = _STOP
+        if message == _SYNC:
+            logs = []
+            for route, outbox in outboxes.items():
+                if outbox.total:
+                    logs.append((route,) + outbox.export())
+                    outbox.clear()
+            pipe.send((logs, service.stats()))
+        elif message == _STOP:
+            io_loop.remove_handler(pipe.fileno())
+            service.stop()
+            io_loop.stop()
+
+    def start():
+        service.ioloop = io_loop
+        service.listen()
+        io_loop.add_handler(pipe.fileno(), handle_message, IOLoop.READ)
+
+    io_loop.add_callback(start)
+    io_loop.start()
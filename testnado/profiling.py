@@ -0,0 +1,243 @@
+# Opt-in timing for the requests a test suite makes through FetchCase:
+#
+#   class TestUsers(HandlerTestCase):
+#       profile_fetches = True       # time every fetch
+#       profile_functions = True     # ...and run them under cProfile
+#
+# (or set TESTNADO_PROFILE=1 / TESTNADO_PROFILE=functions in the
+# environment to turn it on for every case without touching them.)
+#
+# Timings from every case go into one process-wide profiler, and a report
+# of the slowest endpoints and hottest functions is printed to stderr when
+# the process exits. The report is scheduled when a profiled case first
+# sets up. Worker processes (like testnado.runner's pool) exit without
+# running atexit, so the runner sends each worker's snapshot() back to
+# the parent to merge() and report -- anything else that forks has to
+# do the same, or run the suite in a single process.
+
+import atexit
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+try:
+    from urlparse import urlsplit
+except ImportError:
+    from urllib.parse import urlsplit
+
+
+PROFILE_ENVIRONMENT = "TESTNADO_PROFILE"
+
+
+def environment_profiling():
+    # (profile_fetches, profile_functions) from TESTNADO_PROFILE
+    value = os.environ.get(PROFILE_ENVIRONMENT, "").strip().lower()
+    if value in ("", "0", "false", "no"):
+        return False, False
+    return True, value in ("functions", "cprofile")
+
+
+class EndpointTimings(object):
+    # every duration (in seconds) recorded for one endpoint
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.durations = []
+
+    def add(self, seconds):
+        self.durations.append(seconds)
+
+    @property
+    def count(self):
+        return len(self.durations)
+
+    @property
+    def total(self):
+        return sum(self.durations)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.durations else 0.0
+
+    @property
+    def maximum(self):
+        return max(self.durations) if self.durations else 0.0
+
+    def percentile(self, percent):
+        if not self.durations:
+            return 0.0
+        durations = sorted(self.durations)
+        index = int(round(percent / 100.0 * (len(durations) - 1)))
+        return durations[index]
+
+    def __repr__(self):
+        return "<EndpointTimings {} count={} mean={:.4f}s max={:.4f}s>".format(
+            self.endpoint, self.count, self.mean, self.maximum)
+
+
+class FetchProfiler(object):
+
+    def __init__(self):
+        # "GET /path" -> EndpointTimings, as seen by the client (the whole
+        # round trip, including the client's own overhead)
+        self.client = {}
+        # "GET module.HandlerClass" -> EndpointTimings, from the handler's
+        # request_time() (from the request arriving to finish())
+        self.server = {}
+        self.functions = None
+        # pstats data merged in from other processes' snapshots
+        self.merged_functions = []
+        self._depth = 0
+        self._report_registered = False
+
+    def record_client(self, method, url, seconds):
+        path = urlsplit(url).path or "/"
+        self._timings(self.client, "{} {}".format(method.upper(), path)).add(
+            seconds)
+
+    def record_server(self, handler):
+        handler_class = type(handler)
+        endpoint = "{} {}.{}".format(
+            handler.request.method, handler_class.__module__,
+            handler_class.__name__)
+        self._timings(self.server, endpoint).add(
+            handler.request.request_time())
+
+    def start_functions(self):
+        # nested calls (fetch_many inside a profiled fetch, say) share the
+        # outermost enable / disable
+        if self.functions is None:
+            self.functions = cProfile.Profile()
+        if self._depth == 0:
+            self.functions.enable()
+        self._depth += 1
+
+    def stop_functions(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self.functions.disable()
+
+    def reset(self):
+        self.client = {}
+        self.server = {}
+        self.functions = None
+        self.merged_functions = []
+        self._depth = 0
+
+    def snapshot(self):
+        # everything recorded so far as plain, picklable data (or None if
+        # nothing was), for handing to merge() in another process
+        if not self.has_timings():
+            return None
+        functions = None
+        if self.functions is not None:
+            functions = pstats.Stats(self.functions).stats
+        return {
+            "client": _durations(self.client),
+            "server": _durations(self.server),
+            "functions": functions
+        }
+
+    def merge(self, snapshot):
+        for endpoint, durations in snapshot["client"].items():
+            self._timings(self.client, endpoint).durations.extend(durations)
+        for endpoint, durations in snapshot["server"].items():
+            self._timings(self.server, endpoint).durations.extend(durations)
+        if snapshot["functions"] is not None:
+            self.merged_functions.append(snapshot["functions"])
+
+    def has_timings(self):
+        return bool(
+            self.client or self.server or self.functions is not None or
+            self.merged_functions)
+
+    def report_at_exit(self):
+        if not self._report_registered:
+            self._report_registered = True
+            atexit.register(self._exit_report)
+
+    def report(self, stream=None, limit=10, sort="tottime"):
+        # `sort` is any pstats sort key. the default is time spent in the
+        # function itself, since cumulative time is mostly the IOLoop.
+        stream = stream or sys.stderr
+        stream.write("\ntestnado fetch profile\n")
+        self._report_endpoints(
+            stream, "Slowest endpoints (client)", self.client, limit)
+        self._report_endpoints(
+            stream, "Slowest handlers (server)", self.server, limit)
+        stats = self._function_stats(stream)
+        if stats is not None:
+            stream.write("\nHottest functions ({})\n".format(sort))
+            stats.sort_stats(sort).print_stats(limit)
+
+    def _function_stats(self, stream):
+        # this process's cProfile data, plus any merged in
+        profiles = list(self.merged_functions)
+        if self.functions is not None:
+            profiles.insert(0, pstats.Stats(self.functions).stats)
+        if not profiles:
+            return None
+        stats = pstats.Stats(stream=stream)
+        for data in profiles:
+            loaded = pstats.Stats(stream=stream)
+            loaded.stats = data
+            loaded.get_top_level_stats()
+            stats.add(loaded)
+        return stats
+
+    def _report_endpoints(self, stream, title, timings, limit):
+        if not timings:
+            return
+        stream.write("\n{}\n".format(title))
+        stream.write("{:>8} {:>10} {:>10} {:>10}  {}\n".format(
+            "count", "mean ms", "p95 ms", "max ms", "endpoint"))
+        slowest = sorted(
+            timings.values(), key=lambda timing: timing.mean, reverse=True)
+        for timing in slowest[:limit]:
+            stream.write("{:>8} {:>10.2f} {:>10.2f} {:>10.2f}  {}\n".format(
+                timing.count, timing.mean * 1000,
+                timing.percentile(95) * 1000, timing.maximum * 1000,
+                timing.endpoint))
+
+    def _exit_report(self):
+        if self.has_timings():
+            self.report()
+
+    def _timings(self, timings, endpoint):
+        if endpoint not in timings:
+            timings[endpoint] = EndpointTimings(endpoint)
+        return timings[endpoint]
+
+
+_PROFILER = FetchProfiler()
+
+
+def get_profiler():
+    return _PROFILER
+
+
+def _durations(timings):
+    return dict(
+        (endpoint, list(timing.durations))
+        for endpoint, timing in timings.items())
+
+
+def client_timer(profiler, method, url):
+    # returns a callback that records the time since now against the
+    # endpoint -- for add_future / add_done_callback on a fetch future
+    started = time.time()
+    return lambda *args: profiler.record_client(
+        method, url, time.time() - started)
+
+
+def install_server_timing(profiler, application):
+    # every request the application logs is also timed by handler class
+    log_request = application.log_request
+
+    def timed_log_request(handler):
+        profiler.record_server(handler)
+        log_request(handler)
+
+    application.log_request = timed_log_request
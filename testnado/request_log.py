@@ -0,0 +1,283 @@
+import collections
+import hashlib
+
+from tornado.concurrent import Future
+from tornado.escape import parse_qs_bytes
+from tornado.httputil import HTTPHeaders
+
+
+class RecordingPolicy(object):
+    # controls how much of each request a RequestLog holds on to. the
+    # default keeps every request object, which is what you want for
+    # short tests. for long running / soak tests, `limit` keeps only the
+    # last N requests and `summary` keeps only counts and the most recent
+    # request for each (method, path). `capture_headers`, `capture_body`
+    # and `max_body_size` trim what's stored per request -- bodies that
+    # aren't kept are replaced with a sha1 digest.
+
+    def __init__(
+            self, limit=None, summary=False, capture_headers=True,
+            capture_body=True, max_body_size=None):
+        self.limit = limit
+        self.summary = summary
+        self.capture_headers = capture_headers
+        self.capture_body = capture_body
+        self.max_body_size = max_body_size
+
+    @property
+    def retains_requests(self):
+        # storing the original request is cheapest when nothing is trimmed
+        return (
+            not self.summary and self.capture_headers and
+            self.capture_body and self.max_body_size is None)
+
+    def capture(self, request):
+        # requests that were already trimmed (by a worker process, say)
+        # are kept as they are
+        if self.retains_requests or isinstance(request, RecordedRequest):
+            return request
+        return RecordedRequest(request, self)
+
+    def keeps_body(self, body):
+        if self.summary or not self.capture_body:
+            return False
+        return self.max_body_size is None or len(body) <= self.max_body_size
+
+
+class RecordedRequest(object):
+    # a trimmed copy of a request, so the connection, the full body, etc.
+    # can be garbage collected.
+
+    __slots__ = (
+        "method", "uri", "path", "query", "headers", "body", "body_size",
+        "body_digest")
+
+    def __init__(self, request, policy):
+        self.method = request.method
+        self.uri = request.uri
+        self.path = request.path
+        self.query = request.query
+        self.headers = HTTPHeaders()
+        if policy.capture_headers:
+            self.headers.update(request.headers)
+
+        body = request.body or b""
+        self.body_size = len(body)
+        self.body_digest = None
+        self.body = None
+        if policy.keeps_body(body):
+            self.body = body
+        elif body:
+            self.body_digest = hashlib.sha1(body).hexdigest()
+
+    @property
+    def arguments(self):
+        return parse_qs_bytes(self.query, keep_blank_values=True)
+
+
+class RequestLog(object):
+    # recorded requests, plus an index keyed by (method, path) so that
+    # assertions don't have to walk the whole log. headers are lowercased
+    # once when the request is recorded instead of on every comparison.
+
+    def __init__(self, policy=None):
+        self.policy = policy or RecordingPolicy()
+        if self.policy.limit:
+            self.requests = collections.deque(maxlen=self.policy.limit)
+        else:
+            self.requests = []
+        self._index = {}
+        # (method, path) -> {(header, value): entries}, so a lookup with
+        # headers only walks the requests that have the rarest of them
+        self._header_index = {}
+        self._counts = collections.Counter()
+        # (method, path) -> [_Waiter] for wait()
+        self._waiters = {}
+
+    def __len__(self):
+        return len(self.requests)
+
+    @property
+    def total(self):
+        return sum(self._counts.values())
+
+    def record(self, request):
+        key = (request.method, request.path)
+        self._counts[key] += 1
+        self._hold(request)
+        if key in self._waiters:
+            self._notify(key, [request], 1)
+
+    def export(self):
+        # (held requests, {(method, path): count}) -- everything merge()
+        # needs to add this log to another one (in another process, say)
+        if self.policy.summary:
+            held = [entries[-1][0] for entries in self._index.values()]
+        else:
+            held = list(self.requests)
+        return held, dict(self._counts)
+
+    def merge(self, requests, counts):
+        # adds what another log exported: the requests it held, and how
+        # many it saw in total for each (method, path)
+        for request in requests:
+            self._hold(request)
+        for key, count in counts.items():
+            self._counts[key] += count
+            if key in self._waiters:
+                self._notify(
+                    key, [request for request in requests
+                          if (request.method, request.path) == key], count)
+
+    def _hold(self, request):
+        key = (request.method, request.path)
+        recorded = self.policy.capture(request)
+        entry = (recorded, normalize_headers(recorded.headers))
+
+        if self.policy.summary:
+            self._index[key] = collections.deque([entry])
+            self._header_index[key] = dict(
+                (pair, collections.deque([entry]))
+                for pair in entry[1].items())
+        else:
+            if self.policy.limit and \
+                    len(self.requests) == self.policy.limit:
+                self._evict(self.requests[0])
+            self.requests.append(recorded)
+            self._index.setdefault(key, collections.deque()).append(entry)
+            header_index = self._header_index.setdefault(key, {})
+            for pair in entry[1].items():
+                header_index.setdefault(
+                    pair, collections.deque()).append(entry)
+
+    def wait(self, method, path, headers=None, count=1):
+        # a Future that resolves (with the matching requests still held)
+        # as soon as `count` matching requests have been recorded --
+        # counting the ones that are already here. new requests are counted
+        # as they arrive, so this resolves even if the policy's `limit` (or
+        # `summary`) has dropped some of them, but then the list can be
+        # shorter than `count`.
+        key = (method, path)
+        waiter = _Waiter(headers, count, self.count(method, path, headers))
+        if not self._resolve(key, waiter):
+            self._waiters.setdefault(key, []).append(waiter)
+        return waiter.future
+
+    def cancel(self, future):
+        # stops waiting on a Future from wait(), e.g. after a timeout.
+        # returns how many matching requests it had seen (or None).
+        matched = None
+        for key, waiters in list(self._waiters.items()):
+            for waiter in waiters:
+                if waiter.future is future:
+                    matched = waiter.matched
+            waiters[:] = [
+                waiter for waiter in waiters if waiter.future is not future]
+            if not waiters:
+                del self._waiters[key]
+        return matched
+
+    def find(self, method, path, headers=None):
+        for request in self._matching(method, path, headers):
+            return request
+        return None
+
+    def count(self, method, path, headers=None):
+        # without headers this is every request ever recorded, whatever
+        # the policy. with headers, only requests still held are checked.
+        if not headers:
+            return self._counts[(method, path)]
+        return sum(1 for _ in self._matching(method, path, headers))
+
+    def clear(self):
+        if isinstance(self.requests, list):
+            del self.requests[:]
+        else:
+            self.requests.clear()
+        self._index.clear()
+        self._header_index.clear()
+        self._counts.clear()
+
+    def _notify(self, key, requests, count):
+        # `count` new requests for `key`, of which `requests` are the ones
+        # we've seen. these are the original requests, since the recorded
+        # copies may not have kept their headers.
+        headers = [normalize_headers(request.headers) for request in requests]
+        for waiter in self._waiters[key]:
+            if waiter.headers:
+                waiter.matched += sum(
+                    1 for request_headers in headers
+                    if waiter.matches(request_headers))
+            else:
+                waiter.matched += count
+        waiters = [
+            waiter for waiter in self._waiters[key]
+            if not self._resolve(key, waiter)]
+        if waiters:
+            self._waiters[key] = waiters
+        else:
+            del self._waiters[key]
+
+    def _resolve(self, key, waiter):
+        if waiter.future.done():
+            # cancelled, or otherwise given up on
+            return True
+        if waiter.matched < waiter.count:
+            return False
+        waiter.future.set_result(
+            list(self._matching(key[0], key[1], waiter.headers)))
+        return True
+
+    def _evict(self, request):
+        key = (request.method, request.path)
+        # the oldest request in the log is always the oldest in its bucket
+        bucket = self._index[key]
+        _, headers = bucket.popleft()
+        if not bucket:
+            del self._index[key]
+        header_index = self._header_index[key]
+        for pair in headers.items():
+            header_bucket = header_index[pair]
+            header_bucket.popleft()
+            if not header_bucket:
+                del header_index[pair]
+        if not header_index:
+            del self._header_index[key]
+
+    def _matching(self, method, path, headers):
+        entries = self._index.get((method, path), ())
+        expected = normalize_headers(headers or {}).items()
+        if expected and entries:
+            entries = self._narrowest(method, path, expected)
+        for request, request_headers in entries:
+            if all(request_headers.get(k) == v for k, v in expected):
+                yield request
+
+
+    def _narrowest(self, method, path, expected):
+        # the smallest bucket of requests that have one of the expected
+        # headers. buckets keep recording order, like the main index.
+        header_index = self._header_index.get((method, path), {})
+        try:
+            return min(
+                (header_index.get(pair, ()) for pair in expected), key=len)
+        except TypeError:
+            # an unhashable header value can't be looked up
+            return self._index.get((method, path), ())
+
+
+class _Waiter(object):
+    # one wait() call, and how many matching requests it has seen so far
+
+    def __init__(self, headers, count, matched):
+        self.headers = normalize_headers(headers or {})
+        self.count = count
+        self.matched = matched
+        self.future = Future()
+
+    def matches(self, headers):
+        return all(headers.get(k) == v for k, v in self.headers.items())
+
+
+def normalize_headers(headers):
+    return dict((key.lower(), value) for key, value in headers.items())
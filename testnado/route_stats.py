@@ -0,0 +1,108 @@
+import bisect
+import collections
+
+
+# upper bounds (in seconds) for the latency histogram buckets. anything
+# slower lands in a final, unbounded bucket.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RouteStats(object):
+    # traffic numbers for one method on one MockService route. updating is
+    # a handful of integer operations per request, so it's always on.
+
+    def __init__(self, route, method):
+        self.route = route
+        self.method = method
+        self.requests = 0
+        self.completed = 0
+        # requests where the client went away before a response was sent
+        self.aborted = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.status_codes = collections.Counter()
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def started(self, bytes_in):
+        self.requests += 1
+        self.bytes_in += bytes_in
+        self.in_flight += 1
+        if self.in_flight > self.peak_in_flight:
+            self.peak_in_flight = self.in_flight
+
+    def finished(self, status_code, latency, bytes_out):
+        self.in_flight -= 1
+        self.completed += 1
+        self.bytes_out += bytes_out
+        self.status_codes[status_code] += 1
+        self._add_latency(latency)
+
+    def closed(self, latency, bytes_out):
+        self.in_flight -= 1
+        self.aborted += 1
+        self.bytes_out += bytes_out
+        self._add_latency(latency)
+
+    def merge(self, other):
+        # adds in the numbers from another RouteStats for the same route,
+        # e.g. from another worker process. peak_in_flight is the highest
+        # of the two, since the peaks didn't necessarily overlap.
+        self.requests += other.requests
+        self.completed += other.completed
+        self.aborted += other.aborted
+        self.in_flight += other.in_flight
+        self.peak_in_flight = max(self.peak_in_flight, other.peak_in_flight)
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.status_codes.update(other.status_codes)
+        self.latency_histogram = [
+            count + other_count for count, other_count in zip(
+                self.latency_histogram, other.latency_histogram)]
+        self.total_latency += other.total_latency
+        self.max_latency = max(self.max_latency, other.max_latency)
+        return self
+
+    @property
+    def mean_latency(self):
+        measured = self.completed + self.aborted
+        return self.total_latency / measured if measured else 0.0
+
+    def as_dict(self):
+        # plain data, for dumping to JSON
+        buckets = [str(bound) for bound in LATENCY_BUCKETS] + ["+inf"]
+        return {
+            "route": self.route,
+            "method": self.method,
+            "requests": self.requests,
+            "completed": self.completed,
+            "aborted": self.aborted,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "status_codes": dict(
+                (str(code), count)
+                for code, count in self.status_codes.items()),
+            "latency_histogram": dict(zip(buckets, self.latency_histogram)),
+            "mean_latency": self.mean_latency,
+            "max_latency": self.max_latency
+        }
+
+    def _add_latency(self, latency):
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+        self.latency_histogram[
+            bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def __repr__(self):
+        return (
+            "<RouteStats {} {} requests={} peak_in_flight={} bytes_in={} "
+            "bytes_out={} mean_latency={:.4f}s>".format(
+                self.method, self.route, self.requests, self.peak_in_flight,
+                self.bytes_in, self.bytes_out, self.mean_latency))
@@ -0,0 +1,416 @@
+# Runs unittest-style suites across several processes. Every test case
+# owns an IOLoop (and usually a socket or two), and class-level state like
+# MockService handler logs doesn't like being shared, so this splits the
+# suite by test class and gives each worker process whole classes. Each
+# worker gets its own interpreter state, IOLoops and mock services.
+# Workers aren't daemonic (so tests can start processes of their own), and
+# one that dies mid-shard is reported as an error on the test it was running
+# instead of hanging the run.
+#
+# Classes are balanced across workers using the timings from earlier runs
+# (kept in a JSON file), longest first, onto whichever worker has the least
+# work so far. Classes without a timing get the average.
+#
+# Tests that can't be loaded again from their id -- the placeholders for
+# modules that failed to import, and anything a module's load_tests()
+# built itself -- aren't sent to the workers. They run in the parent
+# once the workers are done, exactly as they were loaded.
+#
+#   testnado -j 32 tests
+#   python -m testnado.runner tests.test_users tests.test_accounts
+
+import argparse
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+import unittest
+
+from testnado.profiling import get_profiler
+
+
+DEFAULT_TIMINGS_PATH = ".testnado-timings.json"
+
+_STARTED = "started"
+_FINISHED = "finished"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="testnado",
+        description="Run test classes in parallel across processes.")
+    parser.add_argument(
+        "names", nargs="*", default=["."],
+        help="test directories, modules, classes or methods (default: .)")
+    parser.add_argument(
+        "-j", "--processes", type=int, default=multiprocessing.cpu_count(),
+        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument(
+        "-p", "--pattern", default="test*.py",
+        help="file pattern for directory discovery (default: test*.py)")
+    parser.add_argument(
+        "--timings", default=DEFAULT_TIMINGS_PATH,
+        help="where class timings are read from and saved to")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    options = parser.parse_args(argv)
+
+    suite = load_tests(options.names, options.pattern)
+    timings = load_timings(options.timings)
+    result = run(suite, options.processes, timings)
+    save_timings(options.timings, timings, result.timings)
+    result.report(sys.stderr, verbose=options.verbose)
+    return 0 if result.was_successful() else 1
+
+
+def load_tests(names, pattern="test*.py"):
+    loader = unittest.defaultTestLoader
+    suite = unittest.TestSuite()
+    for name in names:
+        if os.path.isdir(name):
+            suite.addTest(loader.discover(name, pattern=pattern))
+        else:
+            suite.addTest(loader.loadTestsFromName(name))
+    return suite
+
+
+def run(suite, processes, timings=None):
+    # runs `suite` across `processes` workers and returns the merged
+    # ShardResult. the loaded suite is only used to find test ids -- each
+    # worker loads its own copies of the tests by name.
+    tests = list(_iter_tests(suite))
+    local = unittest.TestSuite(
+        [test for test in tests if not reloadable(test)])
+    groups = group_by_class(unittest.TestSuite(
+        [test for test in tests if reloadable(test)]))
+    shards = [shard for shard in partition(groups, processes, timings)
+              if shard]
+    started = time.time()
+    if len(shards) <= 1:
+        results = [run_shard(shard) for shard in shards]
+    else:
+        results = _run_workers(shards)
+        _merge_profiles(results)
+    if local.countTestCases():
+        results.append(_run_suite(local))
+    merged = ShardResult.merge(results)
+    merged.elapsed = time.time() - started
+    return merged
+
+
+def group_by_class(suite):
+    # {"module.Class": [test ids]}, keeping the suite's order
+    groups = {}
+    order = []
+    for test in _iter_tests(suite):
+        key = class_key(test)
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(test.id())
+    return [(key, groups[key]) for key in order]
+
+
+def partition(groups, processes, timings=None):
+    # longest processing time first -- biggest classes go out first, each
+    # to the shard with the least estimated work. returns a list of test id
+    # lists, one per shard.
+    timings = timings or {}
+    known = [timings[key] for key, _ in groups if key in timings]
+    default = sum(known) / len(known) if known else 1.0
+    estimates = [(timings.get(key, default), index, ids)
+                 for index, (key, ids) in enumerate(groups)]
+    estimates.sort(key=lambda estimate: (-estimate[0], estimate[1]))
+
+    processes = max(1, processes)
+    shards = [[] for _ in range(processes)]
+    loads = [0.0] * processes
+    for estimate, index, ids in estimates:
+        lightest = loads.index(min(loads))
+        shards[lightest].append((index, ids))
+        loads[lightest] += estimate
+
+    # run classes in their original order inside each shard
+    return [[test_id for _, ids in sorted(shard) for test_id in ids]
+            for shard in shards]
+
+
+def run_shard(test_ids, result=None):
+    loader = unittest.defaultTestLoader
+    suite = unittest.TestSuite()
+    for test_id in test_ids:
+        suite.addTest(loader.loadTestsFromName(test_id))
+    return _run_suite(suite, result)
+
+
+def reloadable(test):
+    # whether loadTestsFromName(test.id()) gives back the same test: a
+    # plain test method on a class its module exposes, in a module that
+    # doesn't build its own suite with load_tests()
+    cls = type(test)
+    if cls.__module__.startswith("unittest"):
+        # _FailedTest and friends, standing in for a failed import
+        return False
+    module = sys.modules.get(cls.__module__)
+    if module is None or getattr(module, cls.__name__, None) is not cls:
+        return False
+    if callable(getattr(module, "load_tests", None)):
+        return False
+    method_name = getattr(test, "_testMethodName", None)
+    return test.id() == "{}.{}.{}".format(
+        cls.__module__, cls.__name__, method_name)
+
+
+def _run_suite(suite, result=None):
+    result = result or ShardResult()
+    suite.run(result)
+    return result.summary()
+
+
+def _run_workers(shards):
+    # one process per shard, each sending its results back over a pipe.
+    # returns the summaries in shard order.
+    workers = [_Worker(shard) for shard in shards]
+    pending = list(workers)
+    while pending:
+        multiprocessing.connection.wait(
+            [worker.pipe for worker in pending] +
+            [worker.process.sentinel for worker in pending])
+        for worker in list(pending):
+            if worker.poll():
+                pending.remove(worker)
+    return [worker.summary for worker in workers]
+
+
+def _run_worker_shard(test_ids, pipe):
+    # worker processes exit without running atexit, so any profile timings
+    # go back to the parent with the results instead of being reported here
+    profiler = get_profiler()
+    profiler.reset()
+    summary = run_shard(test_ids, _ReportingResult(pipe))
+    summary["profile"] = profiler.snapshot()
+    pipe.send((_FINISHED, summary))
+    pipe.close()
+
+
+class _Worker(object):
+    # the parent's end of one shard's worker process
+
+    def __init__(self, test_ids):
+        self.test_ids = test_ids
+        self.summary = None
+        self.running = None
+        self.pipe, worker_pipe = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(
+            target=_run_worker_shard, args=(test_ids, worker_pipe))
+        self.process.start()
+        worker_pipe.close()
+
+    def poll(self):
+        # reads whatever the worker has sent, and returns True once it has
+        # finished (or died)
+        try:
+            while self.summary is None and self.pipe.poll():
+                message, value = self.pipe.recv()
+                if message == _STARTED:
+                    self.running = value
+                else:
+                    self.summary = value
+        except EOFError:
+            # the worker's end closed without a summary
+            self.process.join()
+        if self.summary is None and self.process.is_alive():
+            return False
+        self.process.join()
+        self.pipe.close()
+        if self.summary is None:
+            self.summary = self._died()
+        return True
+
+    def _died(self):
+        test_id = self.running or self.test_ids[0]
+        lost = len(self.test_ids) - 1
+        text = (
+            "Worker process {} died (exit code {}) while running {}. The "
+            "results for the other {} test(s) in its shard are lost.".format(
+                self.process.pid, self.process.exitcode, test_id, lost))
+        return {
+            "tests_run": 1,
+            "errors": [(test_id, text)],
+            "failures": [],
+            "skipped": [],
+            "expected_failures": 0,
+            "unexpected_successes": [],
+            "outcomes": [(test_id, "ERROR")],
+            "timings": {}
+        }
+
+
+def _merge_profiles(summaries):
+    profiler = get_profiler()
+    for summary in summaries:
+        profile = summary.pop("profile", None)
+        if profile is not None:
+            profiler.merge(profile)
+            profiler.report_at_exit()
+
+
+def class_key(test):
+    return "{}.{}".format(type(test).__module__, type(test).__name__)
+
+
+def load_timings(path):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as timings_file:
+            return json.load(timings_file)
+    except ValueError:
+        # a corrupt timings file just means an unbalanced run
+        return {}
+
+
+def save_timings(path, timings, new_timings):
+    if not path:
+        return
+    timings = dict(timings)
+    timings.update(new_timings)
+    with open(path, "w") as timings_file:
+        json.dump(timings, timings_file, indent=2, sort_keys=True)
+
+
+class ShardResult(unittest.TestResult):
+    # a TestResult that can cross process boundaries -- summary() turns it
+    # into plain data (test ids and formatted tracebacks), and merge()
+    # combines those back into a single result in the parent.
+
+    def __init__(self, *args, **kwargs):
+        super(ShardResult, self).__init__(*args, **kwargs)
+        self.timings = {}
+        self.outcomes = []
+        self.elapsed = 0.0
+        self._started = None
+
+    def startTest(self, test):
+        super(ShardResult, self).startTest(test)
+        self._started = time.time()
+
+    def stopTest(self, test):
+        super(ShardResult, self).stopTest(test)
+        key = class_key(test)
+        self.timings[key] = self.timings.get(key, 0.0) + \
+            time.time() - self._started
+
+    def addSuccess(self, test):
+        super(ShardResult, self).addSuccess(test)
+        self.outcomes.append((test.id(), "ok"))
+
+    def addError(self, test, err):
+        super(ShardResult, self).addError(test, err)
+        self.outcomes.append((test.id(), "ERROR"))
+
+    def addFailure(self, test, err):
+        super(ShardResult, self).addFailure(test, err)
+        self.outcomes.append((test.id(), "FAIL"))
+
+    def addSkip(self, test, reason):
+        super(ShardResult, self).addSkip(test, reason)
+        self.outcomes.append((test.id(), "skipped {!r}".format(reason)))
+
+    def addExpectedFailure(self, test, err):
+        super(ShardResult, self).addExpectedFailure(test, err)
+        self.outcomes.append((test.id(), "expected failure"))
+
+    def addUnexpectedSuccess(self, test):
+        super(ShardResult, self).addUnexpectedSuccess(test)
+        self.outcomes.append((test.id(), "unexpected success"))
+
+    def summary(self):
+        return {
+            "tests_run": self.testsRun,
+            "errors": [(test.id(), text) for test, text in self.errors],
+            "failures": [
+                (test.id(), text) for test, text in self.failures],
+            "skipped": [
+                (test.id(), reason) for test, reason in self.skipped],
+            "expected_failures": len(self.expectedFailures),
+            "unexpected_successes": [
+                test.id() for test in self.unexpectedSuccesses],
+            "outcomes": self.outcomes,
+            "timings": self.timings
+        }
+
+    @classmethod
+    def merge(cls, summaries):
+        result = cls()
+        for summary in summaries:
+            result.testsRun += summary["tests_run"]
+            result.errors.extend(summary["errors"])
+            result.failures.extend(summary["failures"])
+            result.skipped.extend(summary["skipped"])
+            result.expectedFailures.extend(
+                [None] * summary["expected_failures"])
+            result.unexpectedSuccesses.extend(
+                summary["unexpected_successes"])
+            result.outcomes.extend(summary["outcomes"])
+            result.timings.update(summary["timings"])
+        return result
+
+    def was_successful(self):
+        # wasSuccessful() also fails on unexpected successes in python 3
+        return not (self.errors or self.failures or self.unexpectedSuccesses)
+
+    def report(self, stream, verbose=False):
+        if verbose:
+            for test_id, outcome in self.outcomes:
+                stream.write("{} ... {}\n".format(test_id, outcome))
+        for label, problems in (
+                ("ERROR", self.errors), ("FAIL", self.failures)):
+            for test_id, text in problems:
+                stream.write("=" * 70 + "\n")
+                stream.write("{}: {}\n".format(label, test_id))
+                stream.write("-" * 70 + "\n")
+                stream.write(text + "\n")
+        stream.write("-" * 70 + "\n")
+        stream.write("Ran {} test{} in {:.3f}s\n\n".format(
+            self.testsRun, "" if self.testsRun == 1 else "s", self.elapsed))
+
+        details = []
+        for label, count in (
+                ("failures", len(self.failures)),
+                ("errors", len(self.errors)),
+                ("skipped", len(self.skipped)),
+                ("expected failures", len(self.expectedFailures)),
+                ("unexpected successes", len(self.unexpectedSuccesses))):
+            if count:
+                details.append("{}={}".format(label, count))
+        status = "OK" if self.was_successful() else "FAILED"
+        if details:
+            status += " ({})".format(", ".join(details))
+        stream.write(status + "\n")
+
+
+class _ReportingResult(ShardResult):
+    # tells the parent which test is running, so a crash can be pinned on it
+
+    def __init__(self, pipe, *args, **kwargs):
+        super(_ReportingResult, self).__init__(*args, **kwargs)
+        self._pipe = pipe
+
+    def startTest(self, test):
+        self._pipe.send((_STARTED, test.id()))
+        super(_ReportingResult, self).startTest(test)
+
+
+def _iter_tests(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            for child in _iter_tests(test):
+                yield child
+        else:
+            yield test
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,108 @@
 from tornado.testing import bind_unused_port
+from testnado.in_process import InProcessTransport
 from testnado.mock_service import MockService
 
 
+_SESSION_SERVICES = []
+
+
 class ServiceCaseHelpers(object):
     # this mixin must be used with an AsyncHTTPTestCase or AsyncTestCase
 
+    # set to "class" or "session" to reuse the same services (and their
+    # sockets and servers) across tests instead of binding new ones for
+    # every test. pooled services are reset() before each test hands them
+    # out and detach()ed afterwards, so this mixin has to come before the
+    # test case class in the bases for tearDown() to run first.
+    service_pool_scope = None
+
+    # set to True to have AsyncHTTPClient requests to the services go
+    # straight into their applications (no sockets) between
+    # start_services() and stop_services() / the end of the test.
+    in_process_services = False
+
     @property
     def mock_services(self):
         if not hasattr(self, "_mock_services"):
             self._mock_services = []
         return self._mock_services
 
+    @property
+    def pooled_services(self):
+        if not hasattr(self, "_pooled_services"):
+            self._pooled_services = []
+        return self._pooled_services
+
     def add_service(self, service=None):
         if not service:
-            service = MockService(self.io_loop)
+            if self.service_pool_scope:
+                service = self._acquire_pooled_service()
+            else:
+                service = MockService(self.io_loop)
         self.mock_services.append(service)
         return service
 
     def start_services(self):
         for service in self.mock_services:
             service.listen()
+        if self.in_process_services:
+            self._install_transport()
 
     def stop_services(self):
+        self._uninstall_transport()
+        for service in self.mock_services:
+            if service in self.pooled_services:
+                service.detach()
+            else:
+                service.stop()
+
+    def tearDown(self):
+        self._uninstall_transport()
+        for service in self.pooled_services:
+            service.detach()
+        super(ServiceCaseHelpers, self).tearDown()
+
+    def _install_transport(self):
+        if getattr(self, "_transport", None) is None:
+            self._transport = InProcessTransport()
+            self._transport_context = self._transport.install()
+            self._transport_context.__enter__()
         for service in self.mock_services:
+            self._transport.add_service(service)
+
+    def _uninstall_transport(self):
+        if getattr(self, "_transport", None) is not None:
+            self._transport_context.__exit__(None, None, None)
+            self._transport = self._transport_context = None
+
+    @classmethod
+    def tearDownClass(cls):
+        for service in cls.__dict__.get("_class_services", []):
             service.stop()
+        super(ServiceCaseHelpers, cls).tearDownClass()
+
+    def _acquire_pooled_service(self):
+        pool = self._service_pool()
+        index = len(self.pooled_services)
+        if index < len(pool) and pool[index].socket.fileno() == -1:
+            # the socket was closed out from under us (usually because the
+            # IOLoop closed it), so replace it with a fresh service.
+            pool.pop(index)
+        if index >= len(pool):
+            pool.insert(index, MockService(self.io_loop))
+        service = pool[index]
+        service.ioloop = self.io_loop
+        service.reset()
+        self.pooled_services.append(service)
+        return service
+
+    def _service_pool(self):
+        if self.service_pool_scope == "session":
+            return _SESSION_SERVICES
+        if self.service_pool_scope == "class":
+            cls = type(self)
+            if "_class_services" not in cls.__dict__:
+                cls._class_services = []
+            return cls._class_services
+        raise ValueError(
+            "Unknown service_pool_scope: {}".format(self.service_pool_scope))
@@ -0,0 +1,136 @@
+# Method handlers for MockService (or any RequestHandler) that stream
+# their response out a chunk at a time, flushing in between, so a mocked
+# multi-GB download never has to sit in memory. Without a Content-Length
+# the response goes out with chunked transfer encoding.
+#
+#   service.add_method("GET", "/export", streaming_responder(rows))
+#   service.add_method("GET", "/image.iso", file_responder(path))
+#   service.add_method("GET", "/slow", streaming_responder(
+#       payload_chunks(10 * 1024 * 1024), bandwidth=256 * 1024))
+
+import mimetypes
+import mmap
+import os
+
+from tornado import gen
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def streaming_responder(
+        chunks, content_type=None, content_length=None, bandwidth=None):
+    # `chunks` is an iterable of bytes / strings, or a callable that's
+    # called with the handler (and any path arguments) and returns one --
+    # use a callable if the route is going to be requested more than once,
+    # since a generator can only be used up once.
+    # `bandwidth` is in bytes per second.
+
+    def respond(handler, *args, **kwargs):
+        source = chunks(handler, *args, **kwargs) if callable(chunks) \
+            else chunks
+        return stream_response(
+            handler, source, content_type=content_type,
+            content_length=content_length, bandwidth=bandwidth)
+
+    return respond
+
+
+def file_responder(
+        path, content_type=None, chunk_size=DEFAULT_CHUNK_SIZE,
+        bandwidth=None, use_mmap=True):
+    # serves the file at `path` (read per request, so it can change
+    # between requests) with a Content-Length, `chunk_size` bytes at a time
+
+    def respond(handler, *args, **kwargs):
+        return stream_response(
+            handler, file_chunks(path, chunk_size, use_mmap),
+            content_type=content_type or mimetypes.guess_type(path)[0],
+            content_length=os.path.getsize(path), bandwidth=bandwidth)
+
+    return respond
+
+
+@gen.coroutine
+def stream_response(
+        handler, chunks, content_type=None, content_length=None,
+        bandwidth=None):
+    if content_type is not None:
+        handler.set_header("Content-Type", content_type)
+    if content_length is not None:
+        handler.set_header("Content-Length", str(content_length))
+
+    throttle = _Throttle(bandwidth)
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            handler.write(chunk)
+            # waits for the chunk to be written to the socket, which keeps
+            # only about one chunk in memory at a time
+            yield handler.flush()
+            yield throttle.sent(len(chunk))
+    except StreamClosedError:
+        # the client went away mid-download, which is fine
+        return
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+    handler.finish()
+
+
+def file_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=True):
+    # yields the contents of `path` in `chunk_size` pieces. with mmap, the
+    # file's pages come straight from the OS page cache.
+    with open(path, "rb") as file_object:
+        size = os.fstat(file_object.fileno()).st_size
+        if not use_mmap or size == 0:
+            while True:
+                chunk = file_object.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+        mapped = mmap.mmap(
+            file_object.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for offset in range(0, size, chunk_size):
+                yield mapped[offset:offset + chunk_size]
+        finally:
+            mapped.close()
+
+
+def payload_chunks(size, chunk_size=DEFAULT_CHUNK_SIZE, fill=b"\0"):
+    # `size` bytes of filler, for large payloads that don't need to mean
+    # anything. only one chunk is ever allocated.
+    chunk = (fill * (chunk_size // len(fill) + 1))[:chunk_size]
+    remaining = size
+    while remaining > 0:
+        if remaining < chunk_size:
+            chunk = chunk[:remaining]
+        yield chunk
+        remaining -= len(chunk)
+
+
+class _Throttle(object):
+    # sleeps just enough to keep the average rate at `bandwidth` bytes per
+    # second since the first chunk
+
+    def __init__(self, bandwidth):
+        self.bandwidth = bandwidth
+        self._started = None
+        self._sent = 0
+
+    def sent(self, count):
+        if not self.bandwidth:
+            return gen.moment
+        now = IOLoop.current().time()
+        if self._started is None:
+            self._started = now
+        self._sent += count
+        delay = self._sent / float(self.bandwidth) - (now - self._started)
+        if delay <= 0:
+            return gen.moment
+        return gen.sleep(delay)
@@ -0,0 +1,143 @@
+# A MockService that runs on its own thread, with its own IOLoop, for code
+# under test that makes blocking HTTP calls (requests, urllib, a thread
+# pool...) from the test thread. A normal MockService can't answer those,
+# since the IOLoop it needs is stuck waiting on the blocking call.
+#
+#   with ThreadedMockService() as service:
+#       service.add_method("GET", "/users", list_users)
+#       service.listen()
+#       response = requests.get(service.url("/users"))
+#       service.assert_requested("GET", "/users")
+#
+# Everything that touches the service (adding routes, assertions, stats) is
+# handed over to the service thread and waited on, so it's safe to call from
+# any thread. Method handlers run on the service thread.
+
+import copy
+import threading
+
+from tornado.ioloop import IOLoop
+
+from testnado.mock_service import MockService
+
+
+class ThreadedMockService(object):
+
+    # seconds to wait for the service thread to answer a call
+    call_timeout = 10
+
+    def __init__(self, port=None, recording=None):
+        self.io_loop = None
+        self._service = None
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, args=(port, recording),
+            name="ThreadedMockService")
+        self._thread.daemon = True
+        self._thread.start()
+        if not self._ready.wait(self.call_timeout):
+            raise RuntimeError("Mock service thread didn't start.")
+        if self._error is not None:
+            raise self._error
+        self.port = self._service.port
+        self.host = self._service.host
+        self.protocol = self._service.protocol
+        self.base_url = self._service.base_url
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def listening(self):
+        return self._service.listening
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def url(self, path):
+        return self._service.url(path)
+
+    def listen(self):
+        self.call(self._service.listen)
+
+    def reset(self):
+        self.call(self._service.reset)
+
+    def add_method(self, method, route, method_handler, faults=None):
+        return self.call(
+            self._service.add_method, method, route, method_handler,
+            faults=faults)
+
+    def assert_requested(self, method, path, headers=None):
+        return self.call(
+            self._service.assert_requested, method, path, headers)
+
+    def assert_not_requested(self, method, path, headers=None):
+        self.call(self._service.assert_not_requested, method, path, headers)
+
+    def request_count(self, method, path, headers=None):
+        return self.call(self._service.request_count, method, path, headers)
+
+    def stats(self):
+        # a copy, since the originals keep changing on the service thread
+        return self.call(lambda: copy.deepcopy(self._service.stats()))
+
+    def stop(self):
+        if not self.running:
+            return
+        self.call(self._service.stop)
+        self.io_loop.add_callback(self.io_loop.stop)
+        self._thread.join(self.call_timeout)
+
+    def call(self, function, *args, **kwargs):
+        # runs `function` on the service thread and returns its result (or
+        # raises its exception) in this one
+        if threading.current_thread() is self._thread:
+            return function(*args, **kwargs)
+        if not self.running:
+            raise RuntimeError("Mock service thread has stopped.")
+
+        done = threading.Event()
+        outcome = {}
+
+        def run():
+            try:
+                outcome["result"] = function(*args, **kwargs)
+            except Exception as error:
+                outcome["error"] = error
+            finally:
+                done.set()
+
+        self.io_loop.add_callback(run)
+        if not done.wait(self.call_timeout):
+            raise RuntimeError(
+                "Mock service thread didn't answer within {}s.".format(
+                    self.call_timeout))
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def _run(self, port, recording):
+        try:
+            self.io_loop = IOLoop()
+            self.io_loop.add_callback(self._setup, port, recording)
+        except Exception as error:
+            self._error = error
+            self._ready.set()
+            return
+        self.io_loop.start()
+        self.io_loop.close(all_fds=True)
+
+    def _setup(self, port, recording):
+        try:
+            self._service = MockService(
+                self.io_loop, port=port, recording=recording)
+        except Exception as error:
+            self._error = error
+            self.io_loop.stop()
+        self._ready.set()
@@ -0,0 +1,110 @@
+from tornado import gen
+from tornado.testing import AsyncTestCase, gen_test
+
+from testnado.credentials.helpers import build_fetch_arguments
+from testnado.credentials.token_credentials import (
+    TokenCache, TokenCredentials)
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenCredentials(AsyncTestCase):
+
+    @gen_test
+    def test_token_credentials_acquire_lazily_and_set_header(self):
+        calls = []
+
+        def acquire():
+            calls.append(1)
+            return "token"
+
+        credentials = TokenCredentials(acquire)
+        self.assertEqual([], calls)
+
+        token = yield credentials.prepare()
+        fetch_arguments = build_fetch_arguments("/foo")
+        credentials(fetch_arguments)
+
+        self.assertEqual("token", token)
+        self.assertEqual(
+            "Bearer token", fetch_arguments.headers["Authorization"])
+        yield credentials.prepare()
+        self.assertEqual([1], calls)
+
+    @gen_test
+    def test_token_credentials_custom_header(self):
+        credentials = TokenCredentials(
+            lambda: "token", header_name="X-Token", header_format="{}")
+        yield credentials.prepare()
+        fetch_arguments = build_fetch_arguments("/foo")
+        credentials(fetch_arguments)
+        self.assertEqual("token", fetch_arguments.headers["X-Token"])
+
+    def test_token_credentials_require_prepare(self):
+        credentials = TokenCredentials(lambda: "token")
+        with self.assertRaises(ValueError):
+            credentials(build_fetch_arguments("/foo"))
+
+    @gen_test
+    def test_token_cache_single_flight(self):
+        waiting = []
+
+        @gen.coroutine
+        def acquire():
+            waiting.append(1)
+            yield gen.moment
+            raise gen.Return("token-{}".format(len(waiting)))
+
+        cache = TokenCache()
+        tokens = yield [cache.get(acquire) for _ in range(10)]
+
+        self.assertEqual(["token-1"] * 10, tokens)
+        self.assertEqual(1, cache.acquisitions)
+
+    @gen_test
+    def test_token_cache_ttl_and_invalidate(self):
+        clock = FakeClock()
+        tokens = iter(["first", "second", "third"])
+        cache = TokenCache(ttl=60, clock=clock)
+
+        token = yield cache.get(lambda: next(tokens))
+        self.assertEqual("first", token)
+
+        clock.now += 59
+        self.assertEqual("first", cache.token)
+        clock.now += 1
+        self.assertEqual(None, cache.token)
+
+        token = yield cache.get(lambda: next(tokens))
+        self.assertEqual("second", token)
+
+        # stale tokens don't throw out the new one
+        cache.invalidate("first")
+        self.assertEqual("second", cache.token)
+        cache.invalidate("second")
+        token = yield cache.get(lambda: next(tokens))
+        self.assertEqual("third", token)
+        self.assertEqual(3, cache.acquisitions)
+
+    @gen_test
+    def test_token_cache_failed_acquisition_is_retried(self):
+        attempts = []
+
+        def acquire():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("login failed")
+            return "token"
+
+        cache = TokenCache()
+        with self.assertRaises(ValueError):
+            yield cache.get(acquire)
+        token = yield cache.get(acquire)
+        self.assertEqual("token", token)
@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+
+from tornado.httpclient import AsyncHTTPClient, HTTPError
+from tornado.testing import AsyncTestCase, gen_test
+
+from testnado import aio
+from testnado.aio import AsyncMockClient, AsyncMockService, EventLoopCase
+
+
+class TestAsyncMockClient(AsyncTestCase):
+
+    @gen_test
+    async def test_fetch_mocked_urls(self):
+        mock_client = AsyncMockClient()
+        mock_client.mock_url("http://api.test/users").body = "users"
+        missing = mock_client.mock_url("http://api.test/missing")
+        missing.code = 404
+
+        with mock_client.patch():
+            client = AsyncHTTPClient()
+            response = await client.fetch("http://api.test/users")
+            self.assertEqual("users", response.body)
+            with self.assertRaises(HTTPError):
+                await client.fetch("http://api.test/missing")
+
+    @gen_test
+    async def test_fetch_with_gather(self):
+        mock_client = AsyncMockClient()
+        for index in range(20):
+            mock_client.mock_url(
+                "http://api.test/items?id={}".format(index),
+                match_query=True).body = str(index)
+
+        with mock_client.patch():
+            client = AsyncHTTPClient()
+            responses = await asyncio.gather(*[
+                client.fetch("http://api.test/items?id={}".format(index))
+                for index in range(20)])
+
+        self.assertEqual(
+            [str(index) for index in range(20)],
+            [response.body for response in responses])
+
+    @gen_test
+    async def test_fetch_passes_through_to_mock_service(self):
+        async with AsyncMockService() as service:
+            service.add_method(
+                "GET", "/real", lambda handler: handler.finish("real"))
+            mock_client = AsyncMockClient()
+            mock_client.mock_url("http://api.test/fake")
+
+            with mock_client.patch():
+                response = await AsyncHTTPClient().fetch(
+                    service.url("/real"))
+
+            self.assertEqual(b"real", response.body)
+            service.assert_requested("GET", "/real")
+        self.assertFalse(service.listening)
+
+
+class TestAsyncMockService(AsyncTestCase):
+
+    @gen_test
+    async def test_start_and_close(self):
+        service = await AsyncMockService().start()
+        service.add_method(
+            "POST", "/items", lambda handler: handler.set_status(201))
+        response = await AsyncHTTPClient().fetch(
+            service.url("/items"), method="POST", body="{}")
+        self.assertEqual(201, response.code)
+        self.assertEqual(1, service.stats()["/items"]["POST"].completed)
+        await service.close()
+
+
+class TestEventLoop(EventLoopCase, AsyncTestCase):
+
+    def test_new_event_loop(self):
+        loop = aio.new_event_loop()
+        try:
+            self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+            if aio.uvloop is None:
+                self.assertNotIn("uvloop", type(loop).__module__)
+        finally:
+            loop.close()
+
+    @unittest.skipIf(aio.uvloop is None, "uvloop is not installed")
+    def test_event_loop_case_uses_uvloop(self):
+        self.assertIn("uvloop", type(self.io_loop.asyncio_loop).__module__)
+
+    @gen_test
+    async def test_event_loop_case_runs_tests(self):
+        async with AsyncMockService() as service:
+            service.add_method(
+                "GET", "/", lambda handler: handler.finish("OK"))
+            response = await AsyncHTTPClient().fetch(service.url("/"))
+        self.assertEqual(b"OK", response.body)
+
+
+class TestEventLoopCasePolicy(unittest.TestCase):
+
+    def test_event_loop_case_restores_the_policy(self):
+        policy = asyncio.get_event_loop_policy()
+        result = unittest.TestResult()
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestEventLoop).run(
+            result)
+        self.assertEqual([], result.errors + result.failures)
+        self.assertIs(policy, asyncio.get_event_loop_policy())
@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+
+from tornado.httpclient import AsyncHTTPClient, HTTPError, HTTPRequest
+from tornado.httpserver import HTTPServer
+from tornado.httputil import HTTPHeaders
+from tornado.testing import AsyncTestCase, bind_unused_port, gen_test
+from tornado.web import Application, RequestHandler
+
+from testnado.cassette import Cassette, CassetteMiss
+from testnado.mock_client import MockClient
+
+
+class Handler(RequestHandler):
+
+    calls = []
+
+    def get(self):
+        self.calls.append(self.request.uri)
+        self.set_header("X-Call", str(len(self.calls)))
+        if self.get_argument("missing", None):
+            self.set_status(404)
+        self.finish("CALL {} {}".format(len(self.calls), self.request.uri))
+
+    def post(self):
+        self.calls.append(self.request.uri)
+        self.finish(b"POSTED " + self.request.body)
+
+
+class TestCassette(AsyncTestCase):
+
+    def setUp(self):
+        super(TestCassette, self).setUp()
+        Handler.calls = []
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cassettes", "api")
+        socket, self.port = bind_unused_port()
+        self.server = HTTPServer(Application([("/.*", Handler)]))
+        self.server.add_sockets([socket])
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+        super(TestCassette, self).tearDown()
+
+    def url(self, path):
+        return "http://localhost:{}{}".format(self.port, path)
+
+    @gen_test
+    def test_cassette_records_then_replays_without_network(self):
+        with Cassette(self.path, mode="record") as cassette:
+            mock_client = MockClient(self.io_loop, cassette=cassette)
+            with mock_client.install():
+                client = AsyncHTTPClient()
+                yield client.fetch(self.url("/items?b=2&a=1"))
+                yield client.fetch(self.url("/items?b=2&a=1"))
+                with self.assertRaises(HTTPError):
+                    yield client.fetch(self.url("/items?missing=1"))
+
+        self.assertTrue(os.path.exists(self.path + ".json"))
+        self.assertTrue(os.path.exists(self.path + ".bodies"))
+        self.server.stop()
+
+        with Cassette(self.path, mode="replay") as cassette:
+            mock_client = MockClient(self.io_loop, cassette=cassette)
+            with mock_client.install():
+                client = AsyncHTTPClient()
+                # query order doesn't matter
+                first = yield client.fetch(self.url("/items?a=1&b=2"))
+                second = yield client.fetch(self.url("/items?b=2&a=1"))
+                third = yield client.fetch(self.url("/items?b=2&a=1"))
+                missing = yield client.fetch(
+                    self.url("/items?missing=1"), raise_error=False)
+                with self.assertRaises(CassetteMiss):
+                    yield client.fetch(self.url("/other"))
+
+        self.assertEqual(b"CALL 1 /items?b=2&a=1", first.body)
+        self.assertEqual("1", first.headers["X-Call"])
+        self.assertEqual(b"CALL 2 /items?b=2&a=1", second.body)
+        # the last response repeats once they've all been played
+        self.assertEqual(b"CALL 2 /items?b=2&a=1", third.body)
+        self.assertEqual(404, missing.code)
+        self.assertEqual(3, len(Handler.calls))
+
+    @gen_test
+    def test_cassette_auto_mode_with_patch_and_body_matching(self):
+        mock_client = MockClient(self.io_loop, cassette=Cassette(
+            self.path, match_body=True))
+        mock_client.mock_url("http://mocked.com/")
+
+        with mock_client.patch():
+            client = AsyncHTTPClient()
+            mocked = yield client.fetch("http://mocked.com/")
+            for _ in range(2):
+                one = yield client.fetch(
+                    self.url("/"), method="POST", body="one")
+                two = yield client.fetch(
+                    self.url("/"), method="POST", body="two")
+        mock_client.cassette.close()
+
+        self.assertEqual(200, mocked.code)
+        self.assertEqual(b"POSTED one", one.body)
+        self.assertEqual(b"POSTED two", two.body)
+        # recorded once, then replayed
+        self.assertEqual(2, len(Handler.calls))
+        self.assertEqual(2, len(Cassette(self.path, mode="replay").entries))
+
+    @gen_test
+    def test_cassette_replays_large_bodies(self):
+        body = os.urandom(1024 * 1024)
+
+        class LargeResponse(object):
+            code = 200
+            reason = "OK"
+
+        response = LargeResponse()
+        response.body = body
+        response.headers = HTTPHeaders()
+        request = HTTPRequest("http://large.com/file")
+
+        with Cassette(self.path, mode="record") as cassette:
+            cassette.record(request, response)
+
+        with Cassette(self.path, mode="replay") as cassette:
+            replayed = cassette.replay(request)
+            self.assertEqual(body, replayed.body)
+
+    def test_cassette_auto_mode_ignores_stale_bodies(self):
+        class Response(object):
+            code = 200
+            reason = "OK"
+
+        def response_for(body):
+            response = Response()
+            response.body = body
+            response.headers = HTTPHeaders()
+            return response
+
+        # recorded, but never saved -- like a run that crashed
+        cassette = Cassette(self.path)
+        cassette.record(
+            HTTPRequest("http://api.com/stale"), response_for(b"STALE-BYTES"))
+        cassette._writer.close()
+        self.assertFalse(os.path.exists(cassette.index_path))
+        self.assertTrue(os.path.getsize(cassette.bodies_path) > 0)
+
+        request = HTTPRequest("http://api.com/fresh")
+        with Cassette(self.path) as cassette:
+            cassette.record(request, response_for(b"fresh"))
+
+        with Cassette(self.path, mode="replay") as cassette:
+            self.assertEqual(b"fresh", cassette.replay(request).body)
+
+    def test_cassette_mode_validation(self):
+        with self.assertRaises(ValueError):
+            Cassette(self.path, mode="rewind")
+        with self.assertRaises(IOError):
+            Cassette(self.path, mode="replay")
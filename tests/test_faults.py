@@ -0,0 +1,116 @@
+import time
+import unittest
+
+from tornado import gen
+from tornado.httpclient import AsyncHTTPClient, HTTPError
+from tornado.testing import AsyncTestCase, ExpectLog, gen_test
+
+from testnado.faults import FaultPolicy, fixed, lognormal, uniform
+from testnado.mock_service import MockService
+
+
+class TestFaultPolicy(unittest.TestCase):
+
+    def test_fault_policy_is_reproducible_with_seed(self):
+        def plan(seed):
+            policy = FaultPolicy(
+                latency=lognormal(0.05, sigma=1.0), reset_rate=0.2,
+                truncate_rate=0.2, error_rate=0.2, seed=seed)
+            return [policy.next_fault() for _ in range(100)]
+
+        self.assertEqual(plan(1234), plan(1234))
+        self.assertNotEqual(plan(1234), plan(4321))
+
+    def test_fault_policy_rates(self):
+        policy = FaultPolicy(
+            reset_rate=0.1, truncate_rate=0.2, error_rate=0.3,
+            error_codes=(503,), seed=1)
+        faults = [policy.next_fault() for _ in range(10000)]
+
+        self.assertTrue(
+            900 < policy.counts["reset"] < 1100, policy.counts)
+        self.assertTrue(
+            1800 < policy.counts["truncate"] < 2200, policy.counts)
+        self.assertTrue(2700 < policy.counts["error"] < 3300, policy.counts)
+        self.assertEqual(set([503]), set(code for _, _, code in faults))
+        self.assertEqual(set([0.0]), set(delay for delay, _, _ in faults))
+
+    def test_fault_policy_latency_distributions(self):
+        policy = FaultPolicy(latency=0.25)
+        self.assertEqual(0.25, policy.next_fault()[0])
+
+        rng = FaultPolicy(seed=1).random
+        self.assertEqual(1.5, fixed(1.5)(rng))
+        for _ in range(100):
+            self.assertTrue(0.1 <= uniform(0.1, 0.2)(rng) <= 0.2)
+            self.assertTrue(lognormal(0.05)(rng) > 0)
+
+    def test_fault_policy_rejects_impossible_rates(self):
+        with self.assertRaises(ValueError):
+            FaultPolicy(reset_rate=0.5, error_rate=0.6)
+
+
+class TestMockServiceFaults(AsyncTestCase):
+
+    def setUp(self):
+        super(TestMockServiceFaults, self).setUp()
+        self.service = MockService(self.io_loop)
+
+    def tearDown(self):
+        self.service.stop()
+        super(TestMockServiceFaults, self).tearDown()
+
+    @gen_test
+    def test_slow_route_does_not_block_other_routes(self):
+        finished = []
+
+        @gen.coroutine
+        def fetch(path):
+            yield AsyncHTTPClient().fetch(self.service.url(path))
+            finished.append(path)
+
+        self.service.add_method(
+            "GET", "/slow", lambda h: h.finish("SLOW"),
+            faults=FaultPolicy(latency=0.3))
+        self.service.add_method("GET", "/fast", lambda h: h.finish("FAST"))
+        self.service.listen()
+
+        started = time.time()
+        yield [fetch("/slow"), fetch("/fast")]
+
+        self.assertEqual(["/fast", "/slow"], finished)
+        self.assertTrue(time.time() - started >= 0.3)
+        self.service.assert_requested("GET", "/slow")
+
+    @gen_test
+    def test_error_rate_returns_error_codes(self):
+        self.service.add_method(
+            "GET", "/", lambda h: h.finish("OK"),
+            faults=FaultPolicy(error_rate=1, error_codes=(502,)))
+        self.service.listen()
+
+        with ExpectLog("tornado.access", ".*502", required=False):
+            response = yield AsyncHTTPClient().fetch(
+                self.service.url("/"), raise_error=False)
+        self.assertEqual(502, response.code)
+
+    @gen_test
+    def test_reset_and_truncate_break_the_connection(self):
+        self.service.add_method(
+            "GET", "/reset", lambda h: h.finish("OK"),
+            faults=FaultPolicy(reset_rate=1))
+        self.service.add_method(
+            "GET", "/truncate", lambda h: h.finish("X" * 1000),
+            faults=FaultPolicy(truncate_rate=1))
+        self.service.add_method(
+            "GET", "/fine", lambda h: h.finish("OK"),
+            faults=FaultPolicy(seed=1))
+        self.service.listen()
+
+        for path in ("/reset", "/truncate"):
+            with self.assertRaises(HTTPError) as context:
+                yield AsyncHTTPClient().fetch(self.service.url(path))
+            self.assertEqual(599, context.exception.code)
+
+        response = yield AsyncHTTPClient().fetch(self.service.url("/fine"))
+        self.assertEqual(b"OK", response.body)
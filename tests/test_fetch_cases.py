@@ -1,9 +1,17 @@
 # These tests are fairly obscure. Any help making them more clear
 # would be appreciated.
 
+import json
+import unittest
+
 from tests.helpers import TestCaseTestCase
 from testnado import FetchCase, AuthenticatedFetchCase
-from tornado.testing import AsyncHTTPTestCase
+from testnado.credentials import HeaderCredentials
+from testnado.credentials.token_credentials import (
+    TokenCache, TokenCredentials)
+from tornado import gen
+from tornado.httpclient import HTTPClientError
+from tornado.testing import AsyncHTTPTestCase, gen_test
 import tornado.web
 
 
@@ -53,3 +61,182 @@ class TestFetchCases(TestCaseTestCase):
             response = self.authenticated_fetch("/foo")
             self.assertEqual(302, response.code)
             self.assertEqual("/authed", response.headers["Location"])
+
+    def test_fetch_many_returns_responses_in_order(self):
+        @self.build_case(FetchCase, BasicAppTestCase)
+        def test_fetch_many(self):
+            responses = self.fetch_many(
+                ["/foo", {"path": "/missing"}, "/foo"], concurrency=2)
+            self.assertEqual([302, 404, 302], [r.code for r in responses])
+            self.assertEqual("/public", responses[0].headers["Location"])
+
+    def test_fetch_many_accepts_fetch_arguments(self):
+        @self.build_case(FetchCase, BasicAppTestCase)
+        def test_fetch_many(self):
+            responses = self.fetch_many([
+                {"path": "/foo", "headers": {"foobar": "authed"}},
+                {"path": "/foo", "follow_redirects": True}
+            ])
+            self.assertEqual("/authed", responses[0].headers["Location"])
+            # followed to the missing /public path
+            self.assertEqual(404, responses[1].code)
+
+    def test_authenticated_fetch_many_get_credentials(self):
+
+        class DummyCredentials(object):
+
+            def get_credentials(self):
+                def update_credentials(fetch_arguments):
+                    fetch_arguments.headers["foobar"] = "authed"
+                return update_credentials
+
+        @self.build_case(
+            DummyCredentials, AuthenticatedFetchCase,
+            BasicAppTestCase)
+        def test_method(self):
+            responses = self.authenticated_fetch_many(
+                ["/foo"] * 20, concurrency=5)
+            self.assertEqual(20, len(responses))
+            for response in responses:
+                self.assertEqual(302, response.code)
+                self.assertEqual("/authed", response.headers["Location"])
+
+    def test_authenticated_fetch_passes_fetch_arguments_through(self):
+
+        class DummyCredentials(object):
+
+            def get_credentials(self):
+                def update_credentials(fetch_arguments):
+                    fetch_arguments.headers["foobar"] = "authed"
+                return update_credentials
+
+        @self.build_case(
+            DummyCredentials, AuthenticatedFetchCase,
+            BasicAppTestCase)
+        def test_method(self):
+            responses = self.authenticated_fetch_many([
+                {"path": "/foo"},
+                {"path": "/foo", "follow_redirects": True}
+            ])
+            self.assertEqual(302, responses[0].code)
+            # followed to the missing /authed path, like fetch_many()
+            self.assertEqual(404, responses[1].code)
+            self.assertTrue(responses[1].effective_url.endswith("/authed"))
+
+            response = self.authenticated_fetch("/foo", follow_redirects=True)
+            self.assertEqual(404, response.code)
+
+    def test_keep_alive_scope_reuses_connections(self):
+        stats = []
+
+        class KeepAliveCase(FetchCase, BasicAppTestCase):
+
+            keep_alive_scope = "class"
+
+            def test_first(self):
+                self._check()
+
+            def test_second(self):
+                self._check()
+
+            def _check(self):
+                for _ in range(3):
+                    self.assertEqual(302, self.fetch("/foo").code)
+                stats.append(self.keep_alive_stats)
+
+        result = unittest.TestResult()
+        unittest.defaultTestLoader.loadTestsFromTestCase(KeepAliveCase).run(
+            result)
+
+        self.assertEqual([], result.errors + result.failures)
+        self.assertTrue(stats[0] is stats[1])
+        # one new connection per test (each test has its own server)
+        self.assertEqual(6, stats[0].requests)
+        self.assertEqual(2, stats[0].connections_opened)
+        self.assertEqual(4, stats[0].connections_reused)
+
+    def test_authenticated_fetch_token_credentials_refresh_on_401(self):
+        cache = TokenCache()
+        logins = []
+
+        class LoginHandler(tornado.web.RequestHandler):
+
+            def post(self):
+                logins.append(1)
+                self.finish({"token": "token-{}".format(len(logins))})
+
+        class SecretHandler(tornado.web.RequestHandler):
+
+            def get(self):
+                # only the token from this test's login is valid
+                expected = "Bearer token-{}".format(len(logins))
+                if self.request.headers.get("Authorization") != expected:
+                    raise tornado.web.HTTPError(401)
+                self.finish("secret")
+
+        class TokenCase(AuthenticatedFetchCase, AsyncHTTPTestCase):
+
+            def get_app(self):
+                return tornado.web.Application([
+                    ("/login", LoginHandler), ("/secret", SecretHandler)])
+
+            def get_credentials(self):
+                return TokenCredentials(self._login, cache=cache)
+
+            @gen.coroutine
+            def _login(self):
+                response = yield self.fetch_async(
+                    "/login", method="POST", body="")
+                body = json.loads(response.body.decode("utf-8"))
+                raise gen.Return(body["token"])
+
+            def test_secret(self):
+                responses = self.authenticated_fetch_many(
+                    ["/secret"] * 5, concurrency=5)
+                self.assertEqual([200] * 5, [r.code for r in responses])
+                self.assertEqual(
+                    200, self.authenticated_fetch("/secret").code)
+
+        self.execute_case(TokenCase)
+        self.assertEqual(1, len(logins))
+
+        # a stale token gets a 401, and is refreshed once
+        cache.invalidate()
+        cache.set("stale")
+        self.execute_case(TokenCase)
+        self.assertEqual(2, len(logins))
+
+    def test_authenticated_fetch_async_in_gen_test(self):
+
+        class EchoHandler(tornado.web.RequestHandler):
+
+            def get(self):
+                self.finish(self.request.headers.get("foobar", "anonymous"))
+
+        class AsyncCase(AuthenticatedFetchCase, AsyncHTTPTestCase):
+
+            def get_app(self):
+                return tornado.web.Application([("/echo", EchoHandler)])
+
+            def get_credentials(self):
+                return HeaderCredentials({"foobar": "authed"})
+
+            @gen_test
+            def test_gather(self):
+                responses = yield [
+                    self.authenticated_fetch_async("/echo")
+                    for _ in range(5)]
+                self.assertEqual(
+                    [b"authed"] * 5, [response.body for response in responses])
+                response = yield self.fetch_async("/echo")
+                self.assertEqual(b"anonymous", response.body)
+                # the same defaults as fetch()
+                response = yield self.fetch_async("/missing")
+                self.assertEqual(404, response.code)
+                # ...and the same extra arguments
+                with self.assertRaises(HTTPClientError) as context:
+                    yield self.authenticated_fetch_async(
+                        "/missing", raise_error=True)
+                self.assertEqual(404, context.exception.code)
+
+        self.execute_case(AsyncCase)
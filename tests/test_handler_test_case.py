@@ -1,6 +1,15 @@
+import json
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
 from testnado import HandlerTestCase
+from testnado.credentials import HeaderCredentials
 from tests.helpers import TestCaseTestCase
-from tornado.web import Application, RequestHandler
+from tornado import gen
+from tornado.util import TimeoutError
+from tornado.web import Application, HTTPError, RequestHandler
 
 
 class TestHandlerTestCase(TestCaseTestCase):
@@ -63,3 +72,151 @@ class TestHandlerTestCase(TestCaseTestCase):
 
         with self.assertRaises(AssertionError):
             self.execute_case(TestHandlerAssertRedirect)
+
+    def test_handler_load_test_counts_requests(self):
+
+        class Handler(RequestHandler):
+            def get(self):
+                if self.get_argument("fail", None):
+                    raise HTTPError(500)
+                self.finish("OK")
+
+        class TestHandlerLoad(HandlerTestCase):
+
+            def get_app(self):
+                return Application([("/load", Handler)])
+
+            def test_load(self):
+                result = self.load_test("/load", concurrency=5, requests=40)
+                self.assertEqual(40, result.requests)
+                self.assertEqual({200: 40}, result.status_codes)
+                self.assertEqual(0, result.errors)
+                self.assertTrue(result.throughput > 0)
+                self.assertTrue(result.p50 <= result.p99 <= result.max)
+
+                result = self.load_test("/load?fail=1", requests=3)
+                self.assertEqual({500: 3}, result.status_codes)
+
+        self.execute_case(TestHandlerLoad)
+
+    def test_handler_load_test_times_out_with_requests(self):
+
+        class StuckHandler(RequestHandler):
+            @gen.coroutine
+            def get(self):
+                # never finishes
+                yield gen.sleep(60)
+
+        class TestHandlerLoad(HandlerTestCase):
+
+            def get_app(self):
+                return Application([("/stuck", StuckHandler)])
+
+            def test_load(self):
+                with mock.patch(
+                        "testnado.handler_test_case.get_async_test_timeout",
+                        return_value=0.1):
+                    with self.assertRaises(TimeoutError):
+                        self.load_test("/stuck", requests=1)
+
+        self.execute_case(TestHandlerLoad)
+
+    def test_handler_load_test_duration_uses_credentials(self):
+
+        class Handler(RequestHandler):
+            def post(self):
+                if self.request.headers.get("X-Token") != "secret":
+                    raise HTTPError(401)
+                self.finish("OK")
+
+        class TestHandlerLoad(HandlerTestCase):
+
+            def get_app(self):
+                return Application([("/load", Handler)])
+
+            def get_credentials(self):
+                return HeaderCredentials({"X-Token": "secret"})
+
+            def test_load(self):
+                result = self.load_test(
+                    "/load", method="POST", body="{}", duration=0.05,
+                    authenticated=True)
+                self.assertTrue(result.requests > 0)
+                self.assertEqual([200], list(result.status_codes))
+
+        self.execute_case(TestHandlerLoad)
+
+    def test_handler_load_test_passes_fetch_arguments_when_authenticated(self):
+
+        class Handler(RequestHandler):
+            def get(self, name):
+                if self.request.headers.get("X-Token") != "secret":
+                    raise HTTPError(401)
+                if name == "start":
+                    return self.redirect("/end")
+                self.finish("OK")
+
+        class TestHandlerLoad(HandlerTestCase):
+
+            def get_app(self):
+                return Application([("/(start|end)", Handler)])
+
+            def get_credentials(self):
+                return HeaderCredentials({"X-Token": "secret"})
+
+            def test_load(self):
+                result = self.load_test(
+                    "/start", requests=5, authenticated=True,
+                    follow_redirects=True)
+                self.assertEqual({200: 5}, result.status_codes)
+
+        self.execute_case(TestHandlerLoad)
+
+    def test_handler_in_process_skips_the_server(self):
+
+        class Handler(RequestHandler):
+            def get(self):
+                self.set_cookie("session", "foobar")
+                self.finish({
+                    "auth": self.request.headers.get("Authorization"),
+                    "redirected": self.get_argument("redirected", None)
+                })
+
+            def post(self):
+                self.redirect("/resource?redirected=yes")
+
+        class TestHandlerInProcess(HandlerTestCase):
+
+            in_process = True
+
+            def get_app(self):
+                return Application([("/resource", Handler)])
+
+            def get_credentials(self):
+                return HeaderCredentials({"Authorization": "token"})
+
+            def test_in_process(self):
+                self.assertFalse(hasattr(self, "http_server"))
+
+                response = self.fetch("/resource", method="POST", body="")
+                self.assertEqual(302, response.code)
+                self.assert_redirected_path_equals("/resource", response)
+
+                response = self.authenticated_fetch(
+                    "/resource?redirected=yes")
+                self.assertEqual(200, response.code)
+                self.assertTrue(
+                    "session=foobar" in response.headers["Set-Cookie"])
+                body = json.loads(response.body.decode("utf-8"))
+                self.assertEqual(
+                    {"auth": "token", "redirected": "yes"}, body)
+
+                response = self.fetch(
+                    "/resource", method="POST", body="",
+                    follow_redirects=True)
+                self.assertEqual(200, response.code)
+                self.assertEqual(
+                    self.get_url("/resource?redirected=yes"),
+                    response.effective_url)
+
+        self.execute_case(TestHandlerInProcess)
@@ -0,0 +1,72 @@
+# Every short-lived test worker pays for importing testnado, so these check
+# (in a fresh interpreter) that the light parts stay light.
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+import testnado
+import testnado.credentials
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(code):
+    # the modules loaded after running `code` in a new interpreter
+    script = "{}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    output = subprocess.check_output(
+        [sys.executable, "-c", script.format(code)], cwd=PROJECT_ROOT)
+    return set(json.loads(output.decode("utf-8")))
+
+
+class TestImportBudget(unittest.TestCase):
+
+    def test_import_testnado_is_lazy(self):
+        modules = imported_modules("import testnado")
+        self.assertNotIn("tornado.testing", modules)
+        self.assertNotIn("testnado.handler_test_case", modules)
+        self.assertNotIn("testnado.fetch_case", modules)
+
+    def test_import_credentials_is_lazy(self):
+        modules = imported_modules(
+            "from testnado.credentials import HeaderCredentials")
+        self.assertIn("testnado.credentials.header_credentials", modules)
+        self.assertNotIn("tornado.testing", modules)
+        self.assertNotIn("tornado.web", modules)
+        self.assertNotIn("testnado.credentials.token_credentials", modules)
+
+    def test_import_mock_client_skips_mock(self):
+        modules = imported_modules("import testnado.mock_client")
+        self.assertNotIn("unittest.mock", modules)
+        self.assertNotIn("tornado.testing", modules)
+
+    def test_attribute_access_imports(self):
+        modules = imported_modules(
+            "import testnado\ntestnado.HandlerTestCase")
+        self.assertIn("testnado.handler_test_case", modules)
+        self.assertIn("tornado.testing", modules)
+
+
+class TestPublicAPI(unittest.TestCase):
+
+    def test_public_names(self):
+        from testnado.authenticated_fetch_case import AuthenticatedFetchCase
+        from testnado.credentials.token_credentials import TokenCache
+        from testnado.handler_test_case import HandlerTestCase
+
+        self.assertIs(HandlerTestCase, testnado.HandlerTestCase)
+        self.assertIs(AuthenticatedFetchCase, testnado.AuthenticatedFetchCase)
+        self.assertIs(TokenCache, testnado.credentials.TokenCache)
+        for name in testnado.__all__:
+            self.assertIn(name, dir(testnado))
+        for name in testnado.credentials.__all__:
+            self.assertIn(name, dir(testnado.credentials))
+
+    def test_missing_attribute(self):
+        with self.assertRaises(AttributeError):
+            testnado.NotAThing
+        with self.assertRaises(ImportError):
+            from testnado import NotAThing  # noqa: F401
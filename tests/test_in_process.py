@@ -0,0 +1,134 @@
+import json
+
+from tornado import gen
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest
+from tornado.testing import AsyncTestCase, gen_test
+from tornado.web import Application, RequestHandler
+
+from testnado.in_process import InProcessHTTPClient, InProcessTransport
+from testnado.mock_service import MockService
+
+
+class Handler(RequestHandler):
+
+    def get(self):
+        self.set_header("X-Remote", self.request.remote_ip)
+        self.finish({
+            "host": self.request.host,
+            "query": self.get_argument("q", None),
+            "auth": self.request.headers.get("Authorization")
+        })
+
+    def post(self):
+        self.set_cookie("session", "foobar")
+        self.finish(self.request.body)
+
+
+class RedirectHandler(RequestHandler):
+
+    def post(self):
+        self.redirect("/?q=redirected", status=303)
+
+
+class StreamingHandler(RequestHandler):
+
+    @gen.coroutine
+    def get(self):
+        for chunk in ("one", "two", "three"):
+            self.write(chunk)
+            yield self.flush()
+
+
+class StuckHandler(RequestHandler):
+
+    @gen.coroutine
+    def get(self):
+        # never finishes
+        yield gen.sleep(60)
+
+
+class TestInProcess(AsyncTestCase):
+
+    def setUp(self):
+        super(TestInProcess, self).setUp()
+        self.transport = InProcessTransport()
+        self.transport.add_application("app.test", Application([
+            ("/", Handler), ("/redirect", RedirectHandler),
+            ("/stream", StreamingHandler), ("/stuck", StuckHandler)]))
+        self.client = InProcessHTTPClient(
+            force_instance=True, transport=self.transport)
+
+    def tearDown(self):
+        self.client.close()
+        super(TestInProcess, self).tearDown()
+
+    @gen_test
+    def test_in_process_client_dispatches_to_application(self):
+        response = yield self.client.fetch(
+            "http://app.test/?q=foo", auth_username="user",
+            auth_password="pass")
+
+        self.assertEqual(200, response.code)
+        self.assertEqual("127.0.0.1", response.headers["X-Remote"])
+        body = json.loads(response.body.decode("utf-8"))
+        self.assertEqual("app.test", body["host"])
+        self.assertEqual("foo", body["query"])
+        self.assertEqual("Basic dXNlcjpwYXNz", body["auth"])
+        self.assertTrue(response.request_time >= 0)
+
+    @gen_test
+    def test_in_process_client_sends_bodies_and_returns_cookies(self):
+        response = yield self.client.fetch(
+            "http://app.test/", method="POST", body="FOOBAR")
+
+        self.assertEqual(b"FOOBAR", response.body)
+        self.assertTrue("session=foobar" in response.headers["Set-Cookie"])
+
+    @gen_test
+    def test_in_process_client_redirects(self):
+        response = yield self.client.fetch(
+            "http://app.test/redirect", method="POST", body="",
+            follow_redirects=False, raise_error=False)
+        self.assertEqual(303, response.code)
+
+        response = yield self.client.fetch(
+            "http://app.test/redirect", method="POST", body="")
+        self.assertEqual(200, response.code)
+        self.assertEqual("http://app.test/?q=redirected", response.effective_url)
+        body = json.loads(response.body.decode("utf-8"))
+        self.assertEqual("redirected", body["query"])
+
+    @gen_test
+    def test_in_process_client_streams_chunks(self):
+        chunks = []
+        response = yield self.client.fetch(HTTPRequest(
+            "http://app.test/stream", streaming_callback=chunks.append))
+        self.assertEqual([b"one", b"two", b"three"], chunks)
+        self.assertEqual(b"", response.body)
+
+        response = yield self.client.fetch("http://app.test/stream")
+        self.assertEqual(b"onetwothree", response.body)
+
+    @gen_test
+    def test_in_process_client_request_timeout(self):
+        with self.assertRaises(HTTPClientError) as context:
+            yield self.client.fetch(
+                "http://app.test/stuck", request_timeout=0.05)
+        self.assertEqual(599, context.exception.code)
+
+    @gen_test
+    def test_in_process_transport_serves_mock_services(self):
+        service = MockService(self.io_loop)
+        service.add_method("GET", "/", lambda x: x.finish("MOCKED"))
+        self.transport.add_service(service)
+        # started, but not accepting on the socket, so only the transport
+        # can answer
+        service.listen(accept=False)
+        self.assertTrue(service.listening)
+
+        with self.transport.install():
+            response = yield AsyncHTTPClient().fetch(service.url("/"))
+
+        self.assertEqual(b"MOCKED", response.body)
+        service.assert_requested("GET", "/")
+        service.stop()
@@ -0,0 +1,97 @@
+import json
+
+from tornado.httpclient import HTTPRequest
+from tornado.testing import AsyncHTTPTestCase, gen_test
+from tornado.web import Application, RequestHandler
+
+from testnado.keep_alive import KeepAliveHTTPClient, KeepAliveStats
+
+
+class Handler(RequestHandler):
+
+    def get(self):
+        if self.get_argument("close", None):
+            self.set_header("Connection", "close")
+        if self.get_argument("redirect", None):
+            return self.redirect("/")
+        self.finish({
+            "auth": self.request.headers.get("Authorization"),
+            "connection": id(self.request.connection.stream)
+        })
+
+    def post(self):
+        self.finish(self.request.body)
+
+
+class ChunkedHandler(RequestHandler):
+
+    def get(self):
+        for chunk in ("one", "two", "three"):
+            self.write(chunk)
+            self.flush()
+        self.finish()
+
+
+class TestKeepAliveHTTPClient(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return Application([("/", Handler), ("/chunked", ChunkedHandler)])
+
+    def get_http_client(self):
+        self.stats = KeepAliveStats()
+        return KeepAliveHTTPClient(force_instance=True, stats=self.stats)
+
+    def _connection(self, response):
+        return json.loads(response.body.decode("utf-8"))["connection"]
+
+    @gen_test
+    def test_keep_alive_client_reuses_connections(self):
+        first = yield self.http_client.fetch(self.get_url("/"))
+        second = yield self.http_client.fetch(
+            self.get_url("/"), method="POST", body="FOOBAR")
+        third = yield self.http_client.fetch(
+            self.get_url("/"), auth_username="user", auth_password="pass")
+
+        self.assertEqual(b"FOOBAR", second.body)
+        self.assertEqual(self._connection(first), self._connection(third))
+        self.assertEqual(
+            "Basic dXNlcjpwYXNz",
+            json.loads(third.body.decode("utf-8"))["auth"])
+        self.assertEqual(3, self.stats.requests)
+        self.assertEqual(1, self.stats.connections_opened)
+        self.assertEqual(2, self.stats.connections_reused)
+        self.assertEqual(1, self.http_client.idle_connections)
+
+    @gen_test
+    def test_keep_alive_client_respects_connection_close(self):
+        yield self.http_client.fetch(self.get_url("/?close=1"))
+        yield self.http_client.fetch(self.get_url("/"))
+
+        # (not comparing stream ids -- the closed stream's id can be reused)
+        self.assertEqual(2, self.stats.connections_opened)
+        self.assertEqual(1, self.stats.connections_closed)
+
+    @gen_test
+    def test_keep_alive_client_reconnects_when_server_drops_connection(self):
+        yield self.http_client.fetch(self.get_url("/"))
+        yield self.http_server.close_all_connections()
+
+        response = yield self.http_client.fetch(self.get_url("/"))
+
+        self.assertEqual(200, response.code)
+        self.assertEqual(2, self.stats.connections_opened)
+        self.assertEqual(0, self.stats.connections_reused)
+
+    @gen_test
+    def test_keep_alive_client_reads_chunked_responses_and_redirects(self):
+        chunks = []
+        response = yield self.http_client.fetch(HTTPRequest(
+            self.get_url("/chunked"), streaming_callback=chunks.append))
+        self.assertEqual(b"onetwothree", b"".join(chunks))
+
+        response = yield self.http_client.fetch(
+            self.get_url("/?redirect=1"))
+        self.assertEqual(self.get_url("/"), response.effective_url)
+        self.assertEqual(200, response.code)
+        self.assertEqual(1, self.stats.connections_opened)
+        self.assertEqual(2, self.stats.connections_reused)
@@ -0,0 +1,23 @@
+import unittest
+
+from testnado.load_generator import LoadTestResult
+
+
+class TestLoadTestResult(unittest.TestCase):
+
+    def test_load_test_result_percentiles(self):
+        latencies = [i / 100.0 for i in range(100, 0, -1)]
+        result = LoadTestResult(latencies, {200: 100}, 0, elapsed=2.0)
+        self.assertEqual(100, result.requests)
+        self.assertEqual(50.0, result.throughput)
+        self.assertEqual(0.5, result.p50)
+        self.assertEqual(0.95, result.p95)
+        self.assertEqual(0.99, result.p99)
+        self.assertEqual(1.0, result.max)
+
+    def test_load_test_result_empty(self):
+        result = LoadTestResult([], {}, 0, elapsed=0)
+        self.assertEqual(0, result.requests)
+        self.assertEqual(0.0, result.throughput)
+        self.assertEqual(0.0, result.p99)
+        self.assertEqual(0.0, result.max)
@@ -1,9 +1,10 @@
 from tornado.testing import AsyncTestCase, gen_test, bind_unused_port
-from tornado.httpclient import AsyncHTTPClient, HTTPError
+from tornado.httpclient import AsyncHTTPClient, HTTPError, HTTPResponse
 from tornado.httpserver import HTTPServer
 from tornado.web import RequestHandler, Application
 
-from testnado.mock_client import MockClient, MissingMockResponse
+from testnado.mock_client import (
+    MockClient, MockHTTPClient, MissingMockResponse)
 
 
 class TestMockClient(AsyncTestCase):
@@ -123,3 +124,129 @@ class TestMockClient(AsyncTestCase):
 
             yield client.fetch("http://foo.com/two")
             yield client.fetch("http://foo.com/two")
+
+    @gen_test
+    def test_patch_keeps_separate_queues_per_method(self):
+        post = self.mock_client.mock_url("http://foo.com/bar", method="POST")
+        get = self.mock_client.mock_url("http://foo.com/bar")
+
+        with self.mock_client.patch():
+            client = AsyncHTTPClient()
+            get_response = yield client.fetch("http://foo.com/bar")
+            post_response = yield client.fetch(
+                "http://foo.com/bar", method="POST", body="")
+            with self.assertRaises(MissingMockResponse):
+                yield client.fetch("http://foo.com/bar")
+
+        self.assertEqual(get, get_response)
+        self.assertEqual(post, post_response)
+
+    @gen_test
+    def test_patch_serves_large_sequences_in_order(self):
+        for page in range(10000):
+            response = self.mock_client.mock_url("http://foo.com/pages")
+            response.body = str(page)
+
+        with self.mock_client.patch():
+            client = AsyncHTTPClient()
+            for page in range(10000):
+                response = yield client.fetch("http://foo.com/pages")
+                self.assertEqual(str(page), response.body)
+
+    @gen_test
+    def test_patch_matches_query_when_requested(self):
+        second = self.mock_client.mock_url(
+            "http://foo.com/list?page=2&size=10", match_query=True)
+        anything = self.mock_client.mock_url("http://foo.com/list")
+
+        with self.mock_client.patch():
+            client = AsyncHTTPClient()
+            fetched_second = yield client.fetch(
+                "http://foo.com/list?size=10&page=2")
+            fetched_anything = yield client.fetch(
+                "http://foo.com/list?page=1")
+
+        self.assertEqual(second, fetched_second)
+        self.assertEqual(anything, fetched_anything)
+
+    @gen_test
+    def test_patch_query_mismatch_raises(self):
+        self.mock_client.mock_url(
+            "http://foo.com/list?page=2", match_query=True)
+
+        with self.mock_client.patch():
+            client = AsyncHTTPClient()
+            with self.assertRaises(MissingMockResponse):
+                yield client.fetch("http://foo.com/list?page=3")
+
+    @gen_test
+    def test_install_returns_real_responses(self):
+        response = self.mock_client.mock_url("http://foo.com/bar")
+        response.code = 201
+        response.body = "BODY"
+        response.headers["X-Test"] = "foobar"
+
+        with self.mock_client.install():
+            client = AsyncHTTPClient()
+            self.assertTrue(isinstance(client, MockHTTPClient))
+            fetched = yield client.fetch("http://foo.com/bar?q=1")
+
+        self.assertTrue(isinstance(fetched, HTTPResponse))
+        self.assertEqual(201, fetched.code)
+        self.assertEqual(b"BODY", fetched.body)
+        self.assertEqual("foobar", fetched.headers["X-Test"])
+        self.assertEqual("4", fetched.headers["Content-Length"])
+        self.assertEqual("http://foo.com/bar?q=1", fetched.effective_url)
+        self.assertTrue(fetched.request_time >= 0)
+        self.assertFalse(isinstance(AsyncHTTPClient(), MockHTTPClient))
+
+    @gen_test
+    def test_install_intercepts_every_client_instance(self):
+        self.mock_client.mock_url("http://foo.com/bar")
+        self.mock_client.mock_url("http://foo.com/bar", method="POST")
+
+        with self.mock_client.install():
+            client = AsyncHTTPClient(force_instance=True)
+            get_response = yield client.fetch("http://foo.com/bar")
+            post_response = yield client.fetch(
+                "http://foo.com/bar", method="POST", body="")
+            client.close()
+
+        self.assertEqual(200, get_response.code)
+        self.assertEqual(200, post_response.code)
+
+    @gen_test
+    def test_install_raises_errors_and_missing_responses(self):
+        self.mock_client.mock_url("http://foo.com/bar").code = 500
+        self.mock_client.mock_url("http://foo.com/other", method="POST")
+
+        with self.mock_client.install():
+            client = AsyncHTTPClient()
+            with self.assertRaises(HTTPError) as exc_context:
+                yield client.fetch("http://foo.com/bar")
+            self.assertEqual(500, exc_context.exception.code)
+
+            with self.assertRaises(MissingMockResponse):
+                yield client.fetch("http://foo.com/bar", raise_error=False)
+
+            response = yield client.fetch(
+                "http://foo.com/other", raise_error=False)
+            self.assertEqual(405, response.code)
+
+    @gen_test
+    def test_install_passes_through_unknown_requests(self):
+
+        class Handler(RequestHandler):
+            def get(self):
+                self.finish("REAL RESPONSE")
+
+        socket, port = bind_unused_port()
+        server = HTTPServer(Application([("/", Handler)]))
+        server.add_sockets([socket])
+        with self.mock_client.install():
+            client = AsyncHTTPClient()
+            response = yield client.fetch("http://localhost:{}/".format(port))
+
+        self.assertEqual(200, response.code)
+        self.assertEqual(b"REAL RESPONSE", response.body)
+        server.stop()
@@ -0,0 +1,104 @@
+import re
+import unittest
+
+from unittest import mock
+
+from testnado import mock_router
+from testnado.mock_router import MockRouter
+
+
+class TestMockRouter(unittest.TestCase):
+
+    def setUp(self):
+        super(TestMockRouter, self).setUp()
+        self.router = MockRouter()
+
+    def test_mock_router_matches_literal_and_regex_routes(self):
+        self.router.add_route("/users", "users")
+        self.router.add_route("/users/([^/]+)", "user")
+        self.router.add_route("/users/([^/]+)/posts/(\\d+)", "post")
+
+        self.assertEqual(("users", [], {}), self.router.match("/users"))
+        self.assertEqual(("user", ["joe"], {}), self.router.match("/users/joe"))
+        self.assertEqual(
+            ("post", ["joe", "5"], {}),
+            self.router.match("/users/joe/posts/5"))
+        self.assertEqual(None, self.router.match("/users/joe/posts/x")[0])
+        self.assertEqual(None, self.router.match("/user")[0])
+
+    def test_mock_router_respects_route_order(self):
+        self.router.add_route("/(.*)", "catchall")
+        self.router.add_route("/foo", "foo")
+        self.router.add_route("/bar/(.*)", "bar")
+
+        self.assertEqual("catchall", self.router.match("/foo")[0])
+        self.assertEqual("catchall", self.router.match("/bar/baz")[0])
+
+    def test_mock_router_named_groups_are_keyword_arguments(self):
+        self.router.add_route("/a/(?P<name>[^/]+)", "named")
+        self.router.add_route("/b/(?P<name>[^/]+)", "other")
+
+        self.assertEqual(
+            ("other", [], {"name": "x"}), self.router.match("/b/x"))
+
+    def test_mock_router_inline_flags_and_backreferences(self):
+        self.router.add_route("/users/([^/]+)", "user")
+        self.router.add_route("(?i)/foo", "foo")
+        self.router.add_route(r"/(\w)\1", "double")
+        self.router.add_route(r"/items/(\d+)", "item")
+        self.router.add_route("/plain", "plain")
+
+        self.assertEqual(("foo", [], {}), self.router.match("/FOO"))
+        self.assertEqual(("double", ["a"], {}), self.router.match("/aa"))
+        self.assertEqual(None, self.router.match("/ab")[0])
+        self.assertEqual(("user", ["x"], {}), self.router.match("/users/x"))
+        self.assertEqual(("item", ["5"], {}), self.router.match("/items/5"))
+        self.assertEqual("plain", self.router.match("/plain")[0])
+
+    def test_mock_router_falls_back_when_chunk_does_not_compile(self):
+        never = re.compile("(?!)")
+        with mock.patch.object(mock_router, "_UNCOMBINABLE", never):
+            self.router.add_route("/users/([^/]+)", "user")
+            self.router.add_route("(?i)/foo", "foo")
+            self.router.add_route(r"/items/(\d+)", "item")
+
+            self.assertEqual("foo", self.router.match("/Foo")[0])
+            self.assertEqual(
+                ("item", ["5"], {}), self.router.match("/items/5"))
+            self.assertEqual(
+                ("user", ["x"], {}), self.router.match("/users/x"))
+
+    def test_mock_router_rejects_bad_patterns_when_added(self):
+        with self.assertRaises(re.error):
+            self.router.add_route("/broken/(", "broken")
+        self.router.add_route("/ok", "ok")
+        self.assertEqual("ok", self.router.match("/ok")[0])
+
+    def test_mock_router_default_handler_is_used_last(self):
+
+        class Default(object):
+            route = re.compile("/(.*)")
+
+        self.router.default_handler = Default
+        self.router.add_route("/foo", "foo")
+
+        self.assertEqual("foo", self.router.match("/foo")[0])
+        self.assertEqual(
+            (Default, ["other"], {}), self.router.match("/other"))
+
+    def test_mock_router_handles_many_routes(self):
+        for index in range(1000):
+            self.router.add_route(
+                "/v1/resource{}/([^/]+)".format(index), index)
+
+        self.assertEqual(
+            (0, ["a"], {}), self.router.match("/v1/resource0/a"))
+        self.assertEqual(
+            (999, ["b"], {}), self.router.match("/v1/resource999/b"))
+
+    def test_mock_router_recompiles_after_adding_routes(self):
+        self.assertEqual(None, self.router.match("/foo")[0])
+        self.router.add_route("/foo", "foo")
+        self.assertEqual("foo", self.router.match("/foo")[0])
+        self.router.clear()
+        self.assertEqual(None, self.router.match("/foo")[0])
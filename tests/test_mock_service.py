@@ -1,11 +1,14 @@
 import json
 
 from tornado import gen
-from tornado.httpclient import AsyncHTTPClient
+from tornado.httpclient import AsyncHTTPClient, HTTPError as HTTPClientError
 from tornado.testing import AsyncTestCase, gen_test, bind_unused_port
+from tornado.web import HTTPError
 
 from tests.helpers import ServiceTestHelpers
+from testnado.faults import FaultPolicy
 from testnado.mock_service import MockService
+from testnado.request_log import RecordingPolicy
 
 
 class TestMockService(AsyncTestCase, ServiceTestHelpers):
@@ -96,6 +99,167 @@ class TestMockService(AsyncTestCase, ServiceTestHelpers):
         self.service.assert_requested(
             "GET", "/foobar", headers={"X-Thing": "foobar"})
 
+    @gen_test
+    def test_mock_service_add_method_after_listen(self):
+        self.service.add_method("GET", "/", lambda x: x.finish("ROOT"))
+        self.service.listen()
+        self.service.add_method(
+            "GET", "/users/([^/]+)", lambda x, name: x.finish(name))
+
+        response = yield self.fetch(self.service.url("/users/joe%20user"))
+        self.assertEqual(200, response.code)
+        self.assertEqual("joe user", response.body.decode("utf-8"))
+        self.service.assert_requested("GET", "/users/joe%20user")
+
+        response = yield self.fetch(self.service.url("/missing"))
+        self.assertEqual(404, response.code)
+
+    @gen_test
+    def test_mock_service_request_count(self):
+        self.service.add_method("GET", "/", lambda x: x.finish("OK"))
+        self.service.listen()
+        self.assertEqual(0, self.service.request_count("GET", "/"))
+
+        yield self.fetch(self.service.url("/"))
+        yield self.fetch(self.service.url("/"), headers={"X-Thing": "foo"})
+
+        self.assertEqual(2, self.service.request_count("GET", "/"))
+        self.assertEqual(1, self.service.request_count(
+            "GET", "/", headers={"x-thing": "foo"}))
+        self.assertEqual(0, self.service.request_count("POST", "/"))
+
+    @gen_test
+    def test_mock_service_wait_for_request(self):
+        self.service.add_method(
+            "POST", "/events", lambda handler: handler.set_status(202))
+        self.service.listen()
+        client = AsyncHTTPClient()
+
+        # fire and forget, like a background call from the code under test
+        for index in range(3):
+            client.fetch(
+                self.service.url("/events"), method="POST",
+                body=str(index), headers={"X-Index": str(index)})
+
+        requests = yield self.service.wait_for_request(
+            "POST", "/events", count=3, timeout=5)
+        self.assertEqual(
+            [b"0", b"1", b"2"], sorted(request.body for request in requests))
+
+        # already satisfied, so this resolves straight away
+        future = self.service.wait_for_request(
+            "POST", "/events", headers={"x-index": "1"})
+        self.assertTrue(future.done())
+        self.assertEqual(b"1", future.result()[0].body)
+
+    @gen_test
+    def test_mock_service_wait_for_request_with_summary_policy(self):
+        service = MockService(
+            self.io_loop, recording=RecordingPolicy(summary=True))
+        service.add_method(
+            "POST", "/events", lambda handler: handler.set_status(202))
+        service.listen()
+        self.addCleanup(service.stop)
+        future = service.wait_for_request(
+            "POST", "/events", headers={"X-Kind": "a"}, count=2, timeout=5)
+
+        for _ in range(3):
+            yield self.fetch(
+                service.url("/events"), method="POST", body="",
+                headers={"X-Kind": "a"})
+
+        requests = yield future
+        self.assertEqual(1, len(requests))
+
+    @gen_test
+    def test_mock_service_wait_for_request_timeout(self):
+        self.service.add_method("GET", "/", lambda handler: handler.finish())
+        self.service.listen()
+
+        with self.assertRaises(AssertionError) as context:
+            yield self.service.wait_for_request(
+                "GET", "/", count=2, timeout=0.05)
+        self.assertIn("got 0", str(context.exception))
+
+        # timed out waiters are dropped, and later ones still work
+        future = self.service.wait_for_request("GET", "/", timeout=5)
+        yield self.fetch(self.service.url("/"))
+        self.assertEqual(1, len((yield future)))
+
+        with self.assertRaises(ValueError):
+            self.service.wait_for_request("GET", "/missing")
+
+    @gen_test
+    def test_mock_service_stats(self):
+        def handle_post(handler):
+            if handler.request.body == b"bad":
+                raise HTTPError(400)
+            handler.finish("CREATED")
+
+        self.service.add_method(
+            "GET", "/slow", lambda x: x.finish("SLOW"),
+            faults=FaultPolicy(latency=0.05))
+        self.service.add_method("POST", "/items", handle_post)
+        self.service.listen()
+
+        yield [self.fetch(self.service.url("/slow")) for _ in range(5)]
+        for body in ("one", "two", "bad"):
+            yield self.fetch(
+                self.service.url("/items"), method="POST", body=body)
+
+        stats = self.service.stats()
+        self.assertEqual(set(["/slow", "/items"]), set(stats))
+
+        slow = stats["/slow"]["GET"]
+        self.assertEqual(5, slow.requests)
+        self.assertEqual(5, slow.peak_in_flight)
+        self.assertEqual(0, slow.in_flight)
+        self.assertEqual(20, slow.bytes_out)
+        self.assertTrue(slow.mean_latency >= 0.05)
+        self.assertEqual(5, sum(slow.latency_histogram))
+
+        items = stats["/items"]["POST"].as_dict()
+        self.assertEqual(3, items["requests"])
+        self.assertEqual(1, items["peak_in_flight"])
+        self.assertEqual(9, items["bytes_in"])
+        self.assertEqual({"200": 2, "400": 1}, items["status_codes"])
+        self.assertEqual(3, sum(items["latency_histogram"].values()))
+        json.dumps(items)
+
+        self.service.reset()
+        self.assertEqual({}, self.service.stats())
+
+    @gen_test
+    def test_mock_service_stats_count_aborted_requests(self):
+        self.service.add_method(
+            "GET", "/", lambda x: x.finish("OK"),
+            faults=FaultPolicy(latency=0.5))
+        self.service.listen()
+
+        with self.assertRaises(HTTPClientError):
+            yield self.fetch(self.service.url("/"), request_timeout=0.05)
+        yield gen.sleep(0.05)
+
+        stats = self.service.stats()["/"]["GET"]
+        self.assertEqual(1, stats.aborted)
+        self.assertEqual(0, stats.in_flight)
+
+    @gen_test
+    def test_mock_service_recording_policy(self):
+        recording = RecordingPolicy(limit=2, capture_body=False)
+        service = MockService(self.io_loop, recording=recording)
+        handler = service.add_method("POST", "/", lambda x: x.finish("OK"))
+        service.listen()
+
+        for _ in range(5):
+            yield self.fetch(service.url("/"), method="POST", body="FOOBAR")
+
+        self.assertEqual(2, len(handler.requests))
+        self.assertEqual(5, service.request_count("POST", "/"))
+        request = service.assert_requested("POST", "/")
+        self.assertEqual(None, request.body)
+        self.assertEqual(6, request.body_size)
+
     @gen_test
     def test_mock_service_assert_requested_supports_delete(self):
         self.service.add_method("DELETE", "/", lambda x: x.finish({"x": True}))
@@ -0,0 +1,144 @@
+import os
+import signal
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from testnado.prefork_service import PreforkMockService
+from testnado.request_log import RecordingPolicy
+from testnado.route_stats import RouteStats
+
+try:
+    from urllib2 import urlopen
+except ImportError:
+    from urllib.request import urlopen
+
+
+def get_pid(handler):
+    handler.finish(str(os.getpid()))
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "needs os.fork()")
+class TestPreforkMockService(unittest.TestCase):
+
+    def setUp(self):
+        self.service = PreforkMockService(workers=2)
+
+    def tearDown(self):
+        self.service.stop()
+
+    def test_workers_serve_and_parent_collects(self):
+        self.service.add_method("GET", "/pid", get_pid)
+        self.service.add_method(
+            "POST", "/events", lambda handler: handler.set_status(202))
+        self.service.listen()
+        self.assertEqual(2, len(self.service.pids))
+
+        def fetch(index):
+            if index % 2:
+                return urlopen(
+                    self.service.url("/events"), data=b"event").getcode()
+            return int(urlopen(self.service.url("/pid")).read())
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(fetch, range(40)))
+
+        pids = set(results[::2])
+        self.assertEqual([202] * 20, results[1::2])
+        self.assertTrue(pids.issubset(self.service.pids), pids)
+        self.assertNotIn(os.getpid(), pids)
+
+        self.assertEqual(20, self.service.request_count("GET", "/pid"))
+        self.assertEqual(20, self.service.request_count("POST", "/events"))
+        request = self.service.assert_requested("POST", "/events")
+        self.assertEqual(b"event", request.body)
+        self.service.assert_not_requested("GET", "/events")
+
+        stats = self.service.stats()
+        self.assertEqual(20, stats["/pid"]["GET"].completed)
+        self.assertEqual(20, stats["/events"]["POST"].completed)
+        self.assertEqual(20 * len(b"event"), stats["/events"]["POST"].bytes_in)
+        # stats are cumulative, not reset by asking
+        self.assertEqual(20, self.service.stats()["/pid"]["GET"].completed)
+
+    def test_routes_are_fixed_after_listen(self):
+        self.service.add_method("GET", "/pid", get_pid)
+        self.service.listen()
+        with self.assertRaises(RuntimeError):
+            self.service.add_method("GET", "/other", get_pid)
+
+    def test_catchall_and_recording_policy(self):
+        self.service.stop()
+        self.service = PreforkMockService(
+            workers=2, recording=RecordingPolicy(capture_body=False))
+        self.service.listen()
+        with self.assertRaises(Exception):
+            urlopen(self.service.url("/anything"), data=b"secret")
+        request = self.service.assert_requested("POST", "/anything")
+        self.assertEqual(None, request.body)
+        self.assertEqual(len(b"secret"), request.body_size)
+
+    def test_workers_record_under_the_recording_policy(self):
+        policies = (RecordingPolicy(limit=3), RecordingPolicy(summary=True))
+        for policy in policies:
+            self.service.stop()
+            self.service = PreforkMockService(workers=2, recording=policy)
+            self.service.add_method(
+                "POST", "/events", lambda handler: handler.set_status(202))
+            self.service.listen()
+
+            for _ in range(10):
+                urlopen(self.service.url("/events"), data=b"event")
+            self.assertEqual(
+                10, self.service.request_count("POST", "/events"))
+            self.assertEqual(
+                b"event" if policy.limit else None,
+                self.service.assert_requested("POST", "/events").body)
+            # workers hand over what they've recorded, and start again
+            self.assertEqual(
+                10, self.service.request_count("POST", "/events"))
+
+    def test_sync_reports_dead_workers(self):
+        self.service.add_method("GET", "/pid", get_pid)
+        self.service.listen()
+        process = self.service._workers[0][0]
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+
+        with self.assertRaises(RuntimeError) as context:
+            self.service.request_count("GET", "/pid")
+        message = str(context.exception)
+        self.assertIn(str(process.pid), message)
+        self.assertIn("exit code -9", message)
+
+    def test_context_manager_stops_workers(self):
+        with PreforkMockService(workers=2) as service:
+            service.add_method("GET", "/pid", get_pid)
+            service.listen()
+            urlopen(service.url("/pid")).read()
+            processes = [process for process, _ in service._workers]
+        self.assertFalse(service.listening)
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+
+class TestRouteStatsMerge(unittest.TestCase):
+
+    def test_merge(self):
+        first, second = RouteStats("/a", "GET"), RouteStats("/a", "GET")
+        first.started(10)
+        first.finished(200, 0.002, 5)
+        second.started(20)
+        second.started(20)
+        second.finished(503, 0.3, 7)
+
+        first.merge(second)
+        self.assertEqual(3, first.requests)
+        self.assertEqual(2, first.completed)
+        self.assertEqual(1, first.in_flight)
+        self.assertEqual(2, first.peak_in_flight)
+        self.assertEqual(50, first.bytes_in)
+        self.assertEqual(12, first.bytes_out)
+        self.assertEqual({200: 1, 503: 1}, dict(first.status_codes))
+        self.assertEqual(2, sum(first.latency_histogram))
+        self.assertEqual(0.3, first.max_latency)
+        self.assertAlmostEqual(0.151, first.mean_latency)
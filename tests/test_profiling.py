@@ -0,0 +1,145 @@
+import os
+import unittest
+
+from io import StringIO
+from tornado.web import Application, RequestHandler
+
+from testnado import HandlerTestCase
+from testnado.credentials import HeaderCredentials
+from testnado.profiling import EndpointTimings, PROFILE_ENVIRONMENT, \
+    environment_profiling, get_profiler
+from tests.helpers import TestCaseTestCase
+
+
+class ItemHandler(RequestHandler):
+
+    def get(self, item_id):
+        self.finish(busy_work(item_id))
+
+    def post(self, item_id):
+        self.set_status(201)
+        self.finish()
+
+
+# whatever this module was imported as ("tests.test_profiling" under
+# pytest, "test_profiling" when the runner discovers the directory)
+ITEM_HANDLER = "{}.ItemHandler".format(ItemHandler.__module__)
+
+
+def busy_work(item_id):
+    return "".join(str(index) for index in range(1000))[:int(item_id)]
+
+
+class ProfiledCase(HandlerTestCase):
+
+    def get_app(self):
+        return Application([("/items/(\\d+)", ItemHandler)])
+
+    def get_credentials(self):
+        return HeaderCredentials({"Authorization": "token"})
+
+
+class TestEndpointTimings(unittest.TestCase):
+
+    def test_endpoint_timings_summary(self):
+        timings = EndpointTimings("GET /items")
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            timings.add(seconds)
+        self.assertEqual(4, timings.count)
+        self.assertAlmostEqual(0.25, timings.mean)
+        self.assertEqual(0.4, timings.maximum)
+        self.assertEqual(0.4, timings.percentile(95))
+        self.assertEqual(0.1, timings.percentile(0))
+        self.assertEqual(0.0, EndpointTimings("GET /").mean)
+
+
+class TestProfiling(TestCaseTestCase):
+
+    def setUp(self):
+        self.profiler = get_profiler()
+        self.profiler.reset()
+        self.environment = os.environ.pop(PROFILE_ENVIRONMENT, None)
+
+    def tearDown(self):
+        # nothing left over for the report at exit
+        self.profiler.reset()
+        os.environ.pop(PROFILE_ENVIRONMENT, None)
+        if self.environment is not None:
+            os.environ[PROFILE_ENVIRONMENT] = self.environment
+
+    def test_profiling_is_off_by_default(self):
+
+        @self.build_case(ProfiledCase)
+        def test_fetch(case):
+            case.fetch("/items/5")
+
+        self.assertEqual({}, self.profiler.client)
+        self.assertEqual({}, self.profiler.server)
+        self.assertEqual(None, self.profiler.functions)
+
+    def test_profile_fetches_times_client_and_server(self):
+
+        @self.build_case(type("Case", (ProfiledCase,), {
+            "profile_fetches": True}))
+        def test_fetch(case):
+            case.fetch("/items/5?page=1")
+            case.fetch("/items/5", method="POST", body="")
+            case.authenticated_fetch("/items/5")
+            case.fetch_many(["/items/5", "/items/5"])
+
+        self.assertEqual(
+            ["GET /items/5", "POST /items/5"],
+            sorted(self.profiler.client))
+        self.assertEqual(4, self.profiler.client["GET /items/5"].count)
+        self.assertEqual(1, self.profiler.client["POST /items/5"].count)
+        self.assertEqual(
+            ["GET " + ITEM_HANDLER, "POST " + ITEM_HANDLER],
+            sorted(self.profiler.server))
+        self.assertEqual(
+            4, self.profiler.server["GET " + ITEM_HANDLER].count)
+        self.assertEqual(None, self.profiler.functions)
+
+    def test_profile_fetches_in_process(self):
+
+        @self.build_case(type("Case", (ProfiledCase,), {
+            "profile_fetches": True, "in_process": True}))
+        def test_fetch(case):
+            case.fetch("/items/5")
+
+        self.assertEqual(1, self.profiler.client["GET /items/5"].count)
+        self.assertEqual(
+            1, self.profiler.server["GET " + ITEM_HANDLER].count)
+
+    def test_profile_functions_reports_hottest_functions(self):
+
+        @self.build_case(type("Case", (ProfiledCase,), {
+            "profile_functions": True}))
+        def test_fetch(case):
+            case.fetch("/items/5")
+            case.fetch_many(["/items/5"])
+
+        self.assertEqual(2, self.profiler.client["GET /items/5"].count)
+        stream = StringIO()
+        self.profiler.report(stream, limit=1000)
+        report = stream.getvalue()
+        self.assertIn("Slowest endpoints (client)", report)
+        self.assertIn("GET /items/5", report)
+        self.assertIn("Slowest handlers (server)", report)
+        self.assertIn("Hottest functions", report)
+        self.assertIn("busy_work", report)
+
+    def test_profile_from_environment(self):
+        os.environ[PROFILE_ENVIRONMENT] = "1"
+        self.assertEqual((True, False), environment_profiling())
+
+        @self.build_case(ProfiledCase)
+        def test_fetch(case):
+            case.fetch("/items/5")
+
+        self.assertEqual(1, self.profiler.client["GET /items/5"].count)
+        self.assertEqual(None, self.profiler.functions)
+
+        os.environ[PROFILE_ENVIRONMENT] = "functions"
+        self.assertEqual((True, True), environment_profiling())
+        os.environ[PROFILE_ENVIRONMENT] = "0"
+        self.assertEqual((False, False), environment_profiling())
@@ -0,0 +1,248 @@
+import unittest
+
+from tornado.httputil import HTTPHeaders, HTTPServerRequest
+from tornado.testing import AsyncTestCase
+
+from testnado.request_log import RecordingPolicy, RequestLog
+
+
+class TestRequestLog(unittest.TestCase):
+
+    def setUp(self):
+        super(TestRequestLog, self).setUp()
+        self.log = RequestLog()
+
+    def record(self, method, path, body=None, **headers):
+        request = HTTPServerRequest(
+            method=method, uri=path, headers=HTTPHeaders(headers), body=body)
+        self.log.record(request)
+        return request
+
+    def test_request_log_find_by_method_and_path(self):
+        first = self.record("GET", "/foo")
+        self.record("GET", "/foo")
+        self.record("POST", "/foo")
+
+        self.assertEqual(first, self.log.find("GET", "/foo"))
+        self.assertEqual(None, self.log.find("GET", "/bar"))
+        self.assertEqual(None, self.log.find("PUT", "/foo"))
+        self.assertEqual(3, len(self.log))
+
+    def test_request_log_matches_headers_case_insensitively(self):
+        self.record("GET", "/foo", X_Token="nope")
+        expected = self.record("GET", "/foo", X_Token="foobar")
+
+        self.assertEqual(
+            expected, self.log.find("GET", "/foo", {"x_token": "foobar"}))
+        self.assertEqual(
+            None, self.log.find("GET", "/foo", {"X_Token": "other"}))
+
+    def test_request_log_count(self):
+        for _ in range(5):
+            self.record("GET", "/foo", X_Token="foobar")
+        self.record("GET", "/foo")
+
+        self.assertEqual(6, self.log.count("GET", "/foo"))
+        self.assertEqual(
+            5, self.log.count("GET", "/foo", {"x_token": "foobar"}))
+        self.assertEqual(0, self.log.count("DELETE", "/foo"))
+
+    def test_request_log_header_lookups_use_the_rarest_header(self):
+        for index in range(100):
+            self.record(
+                "GET", "/foo", X_Token="foobar", X_Index=str(index % 10))
+
+        first = self.log.find(
+            "GET", "/foo", {"X_Token": "foobar", "X_Index": "3"})
+        self.assertEqual("3", first.headers["X_Index"])
+        self.assertEqual(first, self.log.requests[3])
+        self.assertEqual(
+            10, self.log.count(
+                "GET", "/foo", {"X_Token": "foobar", "X_Index": "3"}))
+        self.assertEqual(
+            0, self.log.count(
+                "GET", "/foo", {"X_Token": "other", "X_Index": "3"}))
+        # values that can't be looked up are still compared
+        self.assertEqual(0, self.log.count("GET", "/foo", {"X_Index": [3]}))
+
+    def test_request_log_clear(self):
+        self.record("GET", "/foo")
+        self.log.clear()
+
+        self.assertEqual(0, len(self.log))
+        self.assertEqual(None, self.log.find("GET", "/foo"))
+
+    def test_request_log_limit_keeps_last_requests(self):
+        self.log = RequestLog(RecordingPolicy(limit=3))
+        for index in range(10):
+            self.record("GET", "/{}".format(index % 4))
+
+        self.assertEqual(3, len(self.log))
+        self.assertEqual(
+            ["/3", "/0", "/1"], [r.path for r in self.log.requests])
+        self.assertEqual(None, self.log.find("GET", "/2"))
+        self.assertEqual("/1", self.log.find("GET", "/1").path)
+        # counts include requests that have been dropped
+        self.assertEqual(3, self.log.count("GET", "/0"))
+
+    def test_request_log_limit_evicts_from_header_lookups(self):
+        self.log = RequestLog(RecordingPolicy(limit=3))
+        for index in range(10):
+            self.record("GET", "/foo", X_Index=str(index % 4))
+
+        self.assertEqual(None, self.log.find("GET", "/foo", {"X_Index": "2"}))
+        self.assertEqual(
+            1, self.log.count("GET", "/foo", {"X_Index": "0"}))
+        self.log.clear()
+        self.assertEqual({}, self.log._header_index)
+
+    def test_request_log_summary_keeps_counts_and_last_request(self):
+        self.log = RequestLog(RecordingPolicy(summary=True))
+        for index in range(100):
+            self.record("POST", "/foo", body=b"body", X_Index=str(index))
+
+        self.assertEqual(0, len(self.log))
+        self.assertEqual(100, self.log.count("POST", "/foo"))
+        request = self.log.find("POST", "/foo")
+        self.assertEqual("99", request.headers["X_Index"])
+        self.assertEqual(
+            None, self.log.find("POST", "/foo", {"X_Index": "98"}))
+        self.assertEqual(
+            request, self.log.find("POST", "/foo", {"X_Index": "99"}))
+        self.assertEqual(None, request.body)
+        self.assertEqual(4, request.body_size)
+        self.assertEqual(40, len(request.body_digest))
+
+    def test_request_log_export_and_merge(self):
+        worker = RequestLog(RecordingPolicy(limit=2))
+        for index in range(5):
+            worker.record(HTTPServerRequest(
+                method="GET", uri="/foo",
+                headers=HTTPHeaders({"X_Index": str(index)})))
+        held, counts = worker.export()
+        self.assertEqual(2, len(held))
+        self.assertEqual({("GET", "/foo"): 5}, counts)
+
+        self.record("GET", "/foo")
+        self.log.merge(held, counts)
+        self.assertEqual(6, self.log.count("GET", "/foo"))
+        self.assertEqual(3, len(self.log))
+        self.assertEqual(
+            "4", self.log.find("GET", "/foo", {"X_Index": "4"}).headers[
+                "X_Index"])
+
+        summary = RequestLog(RecordingPolicy(summary=True))
+        summary.record(HTTPServerRequest(method="GET", uri="/foo"))
+        summary.record(HTTPServerRequest(method="GET", uri="/foo"))
+        summary.record(HTTPServerRequest(method="POST", uri="/bar"))
+        held, counts = summary.export()
+        self.assertEqual(["/foo", "/bar"], [r.path for r in held])
+        self.assertEqual(
+            {("GET", "/foo"): 2, ("POST", "/bar"): 1}, counts)
+
+    def test_request_log_hashes_bodies_over_max_body_size(self):
+        self.log = RequestLog(RecordingPolicy(max_body_size=4))
+        self.record("POST", "/small?q=1", body=b"tiny")
+        self.record("POST", "/large", body=b"large body")
+
+        small = self.log.find("POST", "/small")
+        self.assertEqual(b"tiny", small.body)
+        self.assertEqual(None, small.body_digest)
+        self.assertEqual({"q": [b"1"]}, small.arguments)
+
+        large = self.log.find("POST", "/large")
+        self.assertEqual(None, large.body)
+        self.assertEqual(10, large.body_size)
+        self.assertEqual(40, len(large.body_digest))
+
+    def test_request_log_skips_headers_when_not_captured(self):
+        self.log = RequestLog(RecordingPolicy(capture_headers=False))
+        self.record("GET", "/foo", X_Token="foobar")
+
+        self.assertEqual(0, len(self.log.find("GET", "/foo").headers))
+        self.assertEqual(
+            None, self.log.find("GET", "/foo", {"X_Token": "foobar"}))
+
+
+class TestRequestLogWait(AsyncTestCase):
+    # wait() hands back Futures, which need an IOLoop around
+
+    def setUp(self):
+        super(TestRequestLogWait, self).setUp()
+        self.log = RequestLog()
+
+    def record(self, method, path, **headers):
+        self.log.record(HTTPServerRequest(
+            method=method, uri=path, headers=HTTPHeaders(headers)))
+
+    def test_request_log_wait_resolves_when_requests_are_recorded(self):
+        future = self.log.wait("GET", "/items", count=2)
+        headers_future = self.log.wait(
+            "GET", "/items", headers={"X_Id": "1"})
+
+        self.record("GET", "/items", X_Id="2")
+        self.assertFalse(future.done())
+        self.assertFalse(headers_future.done())
+        self.record("GET", "/other", X_Id="1")
+        self.record("GET", "/items", X_Id="1")
+
+        self.assertEqual(2, len(future.result()))
+        self.assertEqual("1", headers_future.result()[0].headers["X_Id"])
+        self.assertEqual({}, self.log._waiters)
+
+    def test_request_log_wait_counts_summary_requests(self):
+        self.log = RequestLog(RecordingPolicy(summary=True))
+        self.record("POST", "/items")
+        future = self.log.wait("POST", "/items", count=3)
+        self.record("POST", "/items")
+        self.assertFalse(future.done())
+        self.record("POST", "/items")
+        self.assertEqual(1, len(future.result()))
+
+    def test_request_log_wait_only_returns_requests_still_held(self):
+        self.log = RequestLog(RecordingPolicy(limit=2))
+        future = self.log.wait("POST", "/items", count=3)
+        for _ in range(3):
+            self.record("POST", "/items")
+        self.assertEqual(2, len(future.result()))
+        self.assertEqual(3, self.log.count("POST", "/items"))
+
+    def test_request_log_wait_counts_dropped_header_matches(self):
+        self.log = RequestLog(RecordingPolicy(summary=True))
+        future = self.log.wait(
+            "POST", "/items", headers={"X_Id": "1"}, count=2)
+        self.record("POST", "/items", X_Id="1")
+        self.record("POST", "/items", X_Id="2")
+        self.assertFalse(future.done())
+        self.record("POST", "/items", X_Id="1")
+        self.assertEqual("1", future.result()[0].headers["X_Id"])
+
+    def test_request_log_wait_matches_headers_that_are_not_captured(self):
+        self.log = RequestLog(RecordingPolicy(capture_headers=False))
+        future = self.log.wait("GET", "/items", headers={"X_Id": "1"})
+        self.record("GET", "/items", X_Id="2")
+        self.assertFalse(future.done())
+        self.record("GET", "/items", X_Id="1")
+        self.assertTrue(future.done())
+
+    def test_request_log_wait_counts_merged_requests(self):
+        future = self.log.wait("GET", "/items", count=5)
+        headers_future = self.log.wait(
+            "GET", "/items", headers={"X_Id": "1"}, count=2)
+        worker = RequestLog(RecordingPolicy(limit=1))
+        for index in range(5):
+            worker.record(HTTPServerRequest(
+                method="GET", uri="/items",
+                headers=HTTPHeaders({"X_Id": str(index % 2)})))
+
+        self.log.merge(*worker.export())
+        self.assertEqual(1, len(future.result()))
+        # only the held request could be checked for headers
+        self.assertFalse(headers_future.done())
+
+    def test_request_log_cancel_wait(self):
+        future = self.log.wait("GET", "/items")
+        self.assertEqual(0, self.log.cancel(future))
+        self.assertEqual({}, self.log._waiters)
+        self.record("GET", "/items")
+        self.assertFalse(future.done())
@@ -0,0 +1,249 @@
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from testnado import runner
+from testnado.profiling import get_profiler
+
+
+SAMPLE_TESTS = """
+import os
+import unittest
+
+
+class TestFirst(unittest.TestCase):
+
+    def test_pass(self):
+        self.pid = os.getpid()
+
+    def test_fail(self):
+        self.fail("nope")
+
+
+class TestSecond(unittest.TestCase):
+
+    def test_pass(self):
+        pass
+
+    @unittest.skip("later")
+    def test_skip(self):
+        pass
+"""
+
+
+PROFILED_TESTS = """
+from tornado.web import Application, RequestHandler
+
+from testnado import HandlerTestCase
+
+
+class PingHandler(RequestHandler):
+
+    def get(self):
+        self.finish("pong")
+
+
+class ProfiledCase(HandlerTestCase):
+
+    profile_functions = True
+
+    def get_app(self):
+        return Application([("/ping", PingHandler)])
+
+
+class TestOne(ProfiledCase):
+
+    def test_ping(self):
+        self.fetch("/ping")
+
+
+class TestTwo(ProfiledCase):
+
+    def test_ping(self):
+        self.fetch("/ping")
+        self.fetch("/ping")
+"""
+
+
+LOAD_TESTS_SAMPLE = """
+import unittest
+
+
+class TestValue(unittest.TestCase):
+
+    def __init__(self, value):
+        super(TestValue, self).__init__("test_value")
+        self.value = value
+
+    def test_value(self):
+        self.assertTrue(self.value)
+
+
+def load_tests(loader, tests, pattern):
+    return unittest.TestSuite([TestValue(1), TestValue(0)])
+"""
+
+
+PROCESS_TESTS = """
+import multiprocessing
+import os
+import unittest
+
+
+class TestForks(unittest.TestCase):
+
+    def test_child_process(self):
+        process = multiprocessing.Process(target=os.getpid)
+        process.start()
+        process.join()
+        self.assertEqual(0, process.exitcode)
+
+
+class TestCrashes(unittest.TestCase):
+
+    def test_crash(self):
+        os._exit(3)
+"""
+
+
+class TestRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, "runner_sample.py"), "w") as \
+                sample:
+            sample.write(SAMPLE_TESTS)
+        sys.path.insert(0, self.directory)
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        sys.modules.pop("runner_sample", None)
+        sys.modules.pop("runner_profiled", None)
+        sys.modules.pop("runner_load_tests", None)
+        sys.modules.pop("runner_processes", None)
+        shutil.rmtree(self.directory)
+
+    def test_partition_balances_with_timings(self):
+        groups = [
+            ("a", ["a.1"]), ("b", ["b.1"]), ("c", ["c.1"]), ("d", ["d.1"])]
+        timings = {"a": 6.0, "b": 3.0, "c": 2.0, "d": 1.0}
+
+        shards = runner.partition(groups, 2, timings)
+
+        self.assertEqual([["a.1"], ["b.1", "c.1", "d.1"]], shards)
+
+    def test_partition_uses_average_for_unknown_classes(self):
+        groups = [("a", ["a.1"]), ("b", ["b.1"]), ("c", ["c.1"])]
+
+        shards = runner.partition(groups, 2, {"a": 4.0, "b": 1.0})
+
+        self.assertEqual([["a.1"], ["b.1", "c.1"]], shards)
+
+    def test_group_by_class_keeps_order(self):
+        suite = runner.load_tests(["runner_sample"])
+
+        groups = runner.group_by_class(suite)
+
+        self.assertEqual(
+            ["runner_sample.TestFirst", "runner_sample.TestSecond"],
+            [key for key, _ in groups])
+        self.assertEqual(2, len(groups[0][1]))
+
+    def test_run_merges_results_from_workers(self):
+        suite = runner.load_tests(["runner_sample"])
+
+        result = runner.run(suite, 2)
+
+        self.assertEqual(4, result.testsRun)
+        self.assertEqual(
+            ["runner_sample.TestFirst.test_fail"],
+            [test_id for test_id, _ in result.failures])
+        self.assertTrue("nope" in result.failures[0][1])
+        self.assertEqual(1, len(result.skipped))
+        self.assertFalse(result.was_successful())
+        self.assertEqual(
+            set(["runner_sample.TestFirst", "runner_sample.TestSecond"]),
+            set(result.timings))
+
+    def test_run_keeps_tests_that_cannot_be_reloaded(self):
+        with open(os.path.join(self.directory, "runner_load_tests.py"), \
+                "w") as sample:
+            sample.write(LOAD_TESTS_SAMPLE)
+        suite = runner.load_tests(
+            ["runner_sample", "runner_load_tests", "runner_missing"])
+        self.assertEqual(
+            [True] * 4 + [False] * 3,
+            [runner.reloadable(test) for test in runner._iter_tests(suite)])
+
+        result = runner.run(suite, 2)
+
+        self.assertEqual(7, result.testsRun)
+        self.assertEqual(
+            ["runner_load_tests.TestValue.test_value",
+             "runner_sample.TestFirst.test_fail"],
+            sorted(test_id for test_id, _ in result.failures))
+        self.assertEqual(1, len(result.errors))
+        self.assertIn("runner_missing", result.errors[0][0])
+        self.assertIn("runner_missing", result.errors[0][1])
+
+    def test_run_reports_dead_workers_and_allows_child_processes(self):
+        with open(os.path.join(self.directory, "runner_processes.py"), \
+                "w") as sample:
+            sample.write(PROCESS_TESTS)
+        suite = runner.load_tests(["runner_processes"])
+
+        result = runner.run(suite, 2)
+
+        self.assertEqual(2, result.testsRun)
+        self.assertEqual([], result.failures)
+        self.assertEqual(
+            ["runner_processes.TestCrashes.test_crash"],
+            [test_id for test_id, _ in result.errors])
+        self.assertIn("exit code 3", result.errors[0][1])
+        self.assertIn("other 0 test(s)", result.errors[0][1])
+        self.assertIn(
+            ("runner_processes.TestForks.test_child_process", "ok"),
+            result.outcomes)
+
+    def test_run_merges_profiles_from_workers(self):
+        with open(os.path.join(self.directory, "runner_profiled.py"), "w") \
+                as sample:
+            sample.write(PROFILED_TESTS)
+        profiler = get_profiler()
+        profiler.reset()
+        self.addCleanup(profiler.reset)
+        suite = runner.load_tests(["runner_profiled"])
+
+        result = runner.run(suite, 2)
+
+        self.assertTrue(result.was_successful())
+        self.assertEqual(3, profiler.client["GET /ping"].count)
+        self.assertEqual(
+            3, profiler.server["GET runner_profiled.PingHandler"].count)
+        self.assertEqual(2, len(profiler.merged_functions))
+        stream = io.StringIO()
+        profiler.report(stream, limit=1000)
+        self.assertIn("Hottest functions", stream.getvalue())
+        self.assertIn("runner_profiled.py", stream.getvalue())
+
+    def test_main_saves_timings_and_returns_status(self):
+        timings_path = os.path.join(self.directory, "timings.json")
+        stream = io.StringIO()
+        stderr, sys.stderr = sys.stderr, stream
+        try:
+            status = runner.main([
+                "-j", "2", "--timings", timings_path,
+                "runner_sample.TestSecond"])
+        finally:
+            sys.stderr = stderr
+
+        self.assertEqual(0, status)
+        self.assertTrue("Ran 2 tests" in stream.getvalue())
+        self.assertTrue("OK (skipped=1)" in stream.getvalue())
+        with open(timings_path) as timings_file:
+            timings = json.load(timings_file)
+        self.assertEqual(["runner_sample.TestSecond"], list(timings))
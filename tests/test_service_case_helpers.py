@@ -1,5 +1,7 @@
 import json
+import unittest
 
+from tornado import gen
 from tornado.httpclient import AsyncHTTPClient
 from tornado.testing import gen_test, AsyncTestCase
 
@@ -73,3 +75,74 @@ class TestServiceTestCase(TestCaseTestCase):
                 yield self.assert_closed(service3.url("/"))
 
         self.execute_case(BasicTest)
+
+    def test_service_case_helpers_class_pool_reuses_services(self):
+
+        ports = []
+
+        def handle_get(handler):
+            handler.finish({"foo": "bar"})
+
+        class PooledTest(ServiceCaseHelpers, AsyncTestCase):
+
+            service_pool_scope = "class"
+
+            @gen_test
+            def test_first(self):
+                yield self._check()
+
+            @gen_test
+            def test_second(self):
+                yield self._check()
+
+            @gen.coroutine
+            def _check(self):
+                service = self.add_service()
+                # routes and requests from the previous test are gone
+                self.assertEqual({}, service.routes)
+                service.assert_not_requested("GET", "/endpoint")
+                service.add_method("GET", "/endpoint", handle_get)
+                self.start_services()
+                ports.append(service.port)
+
+                client = AsyncHTTPClient()
+                response = yield client.fetch(service.url("/endpoint"))
+                self.assertEqual(200, response.code)
+                service.assert_requested("GET", "/endpoint")
+
+        result = unittest.TestResult()
+        unittest.defaultTestLoader.loadTestsFromTestCase(PooledTest).run(
+            result)
+
+        self.assertEqual([], result.errors + result.failures)
+        self.assertEqual(2, result.testsRun)
+        self.assertEqual(2, len(ports))
+        self.assertEqual(ports[0], ports[1])
+        # tearDownClass closes the pooled services
+        self.assertEqual(-1, PooledTest._class_services[0].socket.fileno())
+
+    def test_service_case_helpers_in_process_services(self):
+        clients = []
+
+        def handle_get(handler):
+            handler.finish({"foo": "bar"})
+
+        class InProcessTest(ServiceCaseHelpers, AsyncTestCase):
+
+            in_process_services = True
+
+            @gen_test
+            def test_in_process(self):
+                service = self.add_service()
+                service.add_method("GET", "/endpoint", handle_get)
+                self.start_services()
+                client = AsyncHTTPClient()
+                clients.append(type(client).__name__)
+                response = yield client.fetch(service.url("/endpoint"))
+                self.assertEqual(200, response.code)
+                service.assert_requested("GET", "/endpoint")
+
+        self.execute_case(InProcessTest)
+        self.assertEqual(["InProcessHTTPClient"], clients)
+        self.assertNotEqual(
+            "InProcessHTTPClient", AsyncHTTPClient.configured_class().__name__)
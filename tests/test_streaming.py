@@ -0,0 +1,141 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from tornado import gen
+from tornado.httpclient import AsyncHTTPClient, HTTPError, HTTPRequest
+from tornado.testing import AsyncTestCase, gen_test
+
+from testnado.mock_service import MockService
+from testnado.streaming import (
+    file_chunks, file_responder, payload_chunks, streaming_responder)
+
+
+class TestStreaming(AsyncTestCase):
+
+    def setUp(self):
+        super(TestStreaming, self).setUp()
+        self.service = MockService(self.io_loop)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.service.stop()
+        shutil.rmtree(self.directory)
+        super(TestStreaming, self).tearDown()
+
+    @gen.coroutine
+    def stream(self, path):
+        # returns (chunks received, total bytes, sha1 of the body)
+        received = {"chunks": 0, "bytes": 0}
+        digest = hashlib.sha1()
+
+        def on_chunk(chunk):
+            received["chunks"] += 1
+            received["bytes"] += len(chunk)
+            digest.update(chunk)
+
+        response = yield AsyncHTTPClient().fetch(HTTPRequest(
+            self.service.url(path), streaming_callback=on_chunk))
+        raise gen.Return((response, received, digest.hexdigest()))
+
+    @gen_test
+    def test_streaming_responder_sends_generated_chunks(self):
+        def rows(handler):
+            for index in range(5):
+                yield "row {}\n".format(index)
+
+        self.service.add_method(
+            "GET", "/rows", streaming_responder(rows, content_type="text/csv"))
+        self.service.listen()
+
+        for _ in range(2):
+            response = yield AsyncHTTPClient().fetch(self.service.url("/rows"))
+            self.assertEqual(
+                "".join("row {}\n".format(i) for i in range(5)),
+                response.body.decode("utf-8"))
+            self.assertEqual("text/csv", response.headers["Content-Type"])
+            self.assertEqual("chunked", response.headers["Transfer-Encoding"])
+
+    @gen_test
+    def test_streaming_responder_large_payload(self):
+        size = 32 * 1024 * 1024
+        self.service.add_method(
+            "GET", "/big", streaming_responder(
+                lambda handler: payload_chunks(size), content_length=size))
+        self.service.listen()
+
+        response, received, _ = yield self.stream("/big")
+
+        self.assertEqual(200, response.code)
+        self.assertEqual(size, received["bytes"])
+        self.assertEqual(str(size), response.headers["Content-Length"])
+        self.service.assert_requested("GET", "/big")
+
+    @gen_test
+    def test_file_responder_serves_file(self):
+        path = os.path.join(self.directory, "download.json")
+        contents = os.urandom(300 * 1024)
+        with open(path, "wb") as download:
+            download.write(contents)
+
+        self.service.add_method("GET", "/mmap", file_responder(path))
+        self.service.add_method(
+            "GET", "/read", file_responder(path, use_mmap=False))
+        self.service.listen()
+
+        for route in ("/mmap", "/read"):
+            response, received, digest = yield self.stream(route)
+            self.assertEqual(hashlib.sha1(contents).hexdigest(), digest)
+            self.assertEqual(
+                "application/json", response.headers["Content-Type"])
+            self.assertTrue(received["chunks"] > 1)
+
+    @gen_test
+    def test_streaming_responder_bandwidth_limit(self):
+        self.service.add_method(
+            "GET", "/slow", streaming_responder(
+                lambda handler: payload_chunks(64 * 1024, chunk_size=8192),
+                bandwidth=256 * 1024))
+        self.service.listen()
+
+        started = time.time()
+        response, received, _ = yield self.stream("/slow")
+
+        self.assertEqual(64 * 1024, received["bytes"])
+        # 64KB at 256KB/s, minus the first chunk that goes out immediately
+        self.assertTrue(time.time() - started >= 0.2)
+
+    def test_file_chunks_and_payload_chunks(self):
+        path = os.path.join(self.directory, "empty")
+        open(path, "wb").close()
+        self.assertEqual([], list(file_chunks(path)))
+
+        chunks = list(payload_chunks(10, chunk_size=4, fill=b"ab"))
+        self.assertEqual([b"abab", b"abab", b"ab"], chunks)
+
+    @gen_test
+    def test_streaming_responder_stops_when_client_disconnects(self):
+        closed = []
+
+        def chunks(handler):
+            try:
+                for chunk in payload_chunks(1024 * 1024, chunk_size=1024):
+                    yield chunk
+            finally:
+                closed.append(True)
+
+        self.service.add_method(
+            "GET", "/slow", streaming_responder(chunks, bandwidth=64 * 1024))
+        self.service.listen()
+
+        with self.assertRaises(HTTPError):
+            yield AsyncHTTPClient().fetch(
+                self.service.url("/slow"), request_timeout=0.1)
+
+        for _ in range(20):
+            if closed:
+                break
+            yield gen.sleep(0.05)
+        self.assertEqual([True], closed)
@@ -0,0 +1,91 @@
+import threading
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from testnado.faults import FaultPolicy
+from testnado.threaded_service import ThreadedMockService
+
+try:
+    from urllib2 import HTTPError, urlopen
+except ImportError:
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+
+
+class TestThreadedMockService(unittest.TestCase):
+
+    def setUp(self):
+        self.service = ThreadedMockService()
+
+    def tearDown(self):
+        self.service.stop()
+
+    def test_blocking_client(self):
+        threads = []
+
+        def get_user(handler, user_id):
+            threads.append(threading.current_thread())
+            handler.finish({"id": user_id})
+
+        self.service.add_method("GET", "/users/(\\w+)", get_user)
+        self.service.listen()
+        self.assertTrue(self.service.listening)
+
+        response = urlopen(self.service.url("/users/foo"))
+        self.assertEqual(b'{"id": "foo"}', response.read())
+        self.assertEqual([self.service._thread], threads)
+
+        request = self.service.assert_requested("GET", "/users/foo")
+        self.assertEqual("/users/foo", request.path)
+        self.service.assert_not_requested("POST", "/users/foo")
+        self.assertEqual(1, self.service.request_count("GET", "/users/foo"))
+        with self.assertRaises(AssertionError):
+            self.service.assert_requested("GET", "/users/bar")
+
+    def test_thread_pool_clients(self):
+        self.service.add_method(
+            "POST", "/events", lambda handler: handler.set_status(202))
+        self.service.listen()
+
+        def post(index):
+            return urlopen(
+                self.service.url("/events"), data=b"event").getcode()
+
+        with ThreadPoolExecutor(8) as pool:
+            codes = list(pool.map(post, range(50)))
+
+        self.assertEqual([202] * 50, codes)
+        self.assertEqual(50, self.service.request_count("POST", "/events"))
+        stats = self.service.stats()["/events"]["POST"]
+        self.assertEqual(50, stats.completed)
+        self.assertEqual(50 * len(b"event"), stats.bytes_in)
+
+    def test_routes_and_faults_after_listen(self):
+        self.service.listen()
+        self.service.add_method(
+            "GET", "/flaky", lambda handler: handler.finish("OK"),
+            faults=FaultPolicy(error_rate=1.0, error_codes=(503,)))
+
+        with self.assertRaises(HTTPError) as context:
+            urlopen(self.service.url("/flaky"))
+        self.assertEqual(503, context.exception.code)
+
+        self.service.reset()
+        self.assertEqual({}, self.service.stats())
+
+    def test_stop(self):
+        self.service.listen()
+        self.service.stop()
+        self.assertFalse(self.service.running)
+        with self.assertRaises(RuntimeError):
+            self.service.request_count("GET", "/")
+        # stopping twice is fine
+        self.service.stop()
+
+    def test_context_manager(self):
+        with ThreadedMockService() as service:
+            service.add_method("GET", "/", lambda handler: handler.finish())
+            service.listen()
+            self.assertEqual(200, urlopen(service.url("/")).getcode())
+        self.assertFalse(service.running)